@@ -0,0 +1,67 @@
+#!/usr/bin/python
+"""Compare load time and peak memory usage of elf file loading modes.
+
+Every mode is measured in separate interpreter, so peak RSS of one mode
+does not hide the other.
+
+    benchmarks/elf_load.py ELFFILE [--repeat N]
+"""
+import sys
+import json
+import pathlib
+import argparse
+import subprocess
+
+SRC_DIR = pathlib.Path(__file__).resolve().parent.parent / 'src'
+
+MODES: dict[str, bool] = {
+    'read': False,
+    'mmap': True,
+}
+
+MEASURE_SCRIPT = """
+import sys
+import time
+import json
+import resource
+
+sys.path.append({src!r})
+from elf.elfdata import ELFData
+
+start = time.perf_counter()
+with ELFData({elffile!r}, use_mmap={use_mmap!r}) as efile:
+    loaded = time.perf_counter()
+    efile.parse_elffile()
+    parsed = time.perf_counter()
+
+print(json.dumps(dict(load=loaded - start, parse=parsed - loaded,
+                      maxrss_kb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)))
+"""
+
+
+def measure(elffile: pathlib.Path, use_mmap: bool) -> dict[str, float]:
+    """Run single measurement in fresh interpreter"""
+    script = MEASURE_SCRIPT.format(src=str(SRC_DIR), elffile=str(elffile), use_mmap=use_mmap)
+    output = subprocess.run([sys.executable, '-c', script], check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main(args: list[str]) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark elf file loading modes')
+    parser.add_argument('elffile', type=pathlib.Path, help='Elffile with dwarf debug information')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of measurements per mode')
+    args = parser.parse_args(args)
+
+    print(f'{"mode":<6} {"load [s]":>10} {"parse [s]":>10} {"peak RSS [MiB]":>15}')
+    for mode, use_mmap in MODES.items():
+        results = [measure(args.elffile, use_mmap) for _ in range(args.repeat)]
+        load = min(result['load'] for result in results)
+        parse = min(result['parse'] for result in results)
+        maxrss = min(result['maxrss_kb'] for result in results) / 1024
+        print(f'{mode:<6} {load:>10.4f} {parse:>10.4f} {maxrss:>15.1f}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,74 @@
+#!/usr/bin/python
+"""Compare cold import time of generated modules with and without precompiled bytecode.
+
+Code of given elf is generated once per mode, then all generated modules are
+imported in fresh interpreter, which never writes bytecode itself. Without
+bytecode every import compiles the module, with --pyc bytecode generated by
+parser is loaded.
+
+    benchmarks/import_time.py ELFFILE [--repeat N] [--jobs N]
+"""
+import sys
+import json
+import pathlib
+import argparse
+import tempfile
+import subprocess
+
+PARSER = pathlib.Path(__file__).resolve().parent.parent / 'src' / 'parser.py'
+
+# Parser options of every mode, without --pyc only sources are generated
+MODES: dict[str, list[str]] = {
+    'source': [],
+    'checked': ['--pyc', 'checked'],
+    'unchecked': ['--pyc', 'unchecked'],
+}
+
+MEASURE_SCRIPT = """
+import sys
+import json
+import time
+import importlib
+
+sys.path.insert(0, {dst!r})
+modules = {modules!r}
+start = time.perf_counter()
+for module in modules:
+    importlib.import_module(module)
+print(json.dumps(dict(modules=len(modules), imported=time.perf_counter() - start)))
+"""
+
+
+def generate(elffile: pathlib.Path, dst: pathlib.Path, options: list[str], jobs: int) -> list[str]:
+    """Generate code of elf with given parser options, returns names of generated modules"""
+    subprocess.run([sys.executable, str(PARSER), str(elffile), '--dst', str(dst), '--withbackend', '-j', str(jobs)]
+                   + options, check=True)
+    return sorted(path.stem for path in dst.glob('*.py') if path.stem != 'backend')
+
+
+def measure(dst: pathlib.Path, modules: list[str]) -> dict[str, float]:
+    """Import generated modules in fresh interpreter, which does not write bytecode"""
+    script = MEASURE_SCRIPT.format(dst=str(dst), modules=modules)
+    output = subprocess.run([sys.executable, '-B', '-c', script], check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main(args: list[str]) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark import time of generated modules')
+    parser.add_argument('elffile', type=pathlib.Path, help='Elffile with dwarf debug information')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of measurements per mode')
+    parser.add_argument('--jobs', type=int, default=1, help='Number of jobs of parser')
+    args = parser.parse_args(args)
+
+    print(f'{"mode":<10} {"modules":>8} {"import [s]":>11}')
+    for mode, options in MODES.items():
+        with tempfile.TemporaryDirectory() as directory:
+            modules = generate(args.elffile, pathlib.Path(directory), options, args.jobs)
+            imported = min(measure(pathlib.Path(directory), modules)['imported'] for _ in range(args.repeat))
+            print(f'{mode:<10} {len(modules):>8} {imported:>11.4f}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
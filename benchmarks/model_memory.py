@@ -0,0 +1,74 @@
+#!/usr/bin/python
+"""Compare memory retained by parsed program model of different source trees.
+
+Every source tree is measured in separate interpreter. Memory is traced while
+all files of elf are parsed, then elf data is closed and memory still allocated
+is reported - it is held by program model (and everything it references).
+Pass source directory of older revision to see the difference, eg.:
+
+    git worktree add /tmp/baseline HEAD~1
+    benchmarks/model_memory.py ELFFILE --baseline /tmp/baseline/src
+"""
+import sys
+import json
+import pathlib
+import argparse
+import subprocess
+
+SRC_DIR = pathlib.Path(__file__).resolve().parent.parent / 'src'
+
+MEASURE_SCRIPT = """
+import gc
+import sys
+import json
+import resource
+import tracemalloc
+
+sys.path.insert(0, {src!r})
+from elf.elfdata import ELFData
+
+tracemalloc.start()
+efile = ELFData({elffile!r})
+files = efile.parse_elffile()
+if hasattr(efile, 'close'):
+    efile.close()
+del efile
+gc.collect()
+retained, peak = tracemalloc.get_traced_memory()
+
+objects = sum(len(file.types) + len(file.variables) + len(file.functions) for file in files)
+print(json.dumps(dict(objects=objects, retained=retained, peak=peak,
+                      maxrss_kb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)))
+"""
+
+
+def measure(elffile: pathlib.Path, src: pathlib.Path) -> dict[str, int]:
+    """Run single measurement of given source tree in fresh interpreter"""
+    script = MEASURE_SCRIPT.format(src=str(src), elffile=str(elffile))
+    output = subprocess.run([sys.executable, '-c', script], check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main(args: list[str]) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark memory retained by parsed program model')
+    parser.add_argument('elffile', type=pathlib.Path, help='Elffile with dwarf debug information')
+    parser.add_argument('--baseline', type=pathlib.Path, help='Source directory of revision to compare with')
+    args = parser.parse_args(args)
+
+    sources = {'current': SRC_DIR}
+    if args.baseline is not None:
+        sources['baseline'] = args.baseline
+
+    print(f'{"source":<9} {"objects":>8} {"retained [KiB]":>15} {"per object [B]":>15} '
+          f'{"peak [KiB]":>11} {"peak RSS [MiB]":>15}')
+    for name, src in sources.items():
+        result = measure(args.elffile, src)
+        per_object = result['retained'] / max(result['objects'], 1)
+        print(f'{name:<9} {result["objects"]:>8} {result["retained"] / 1024:>15.1f} {per_object:>15.0f} '
+              f'{result["peak"] / 1024:>11.1f} {result["maxrss_kb"] / 1024:>15.1f}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
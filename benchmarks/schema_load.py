@@ -0,0 +1,84 @@
+#!/usr/bin/python
+"""Compare load time of schema with import time of equivalent generated modules.
+
+Output of given elf is generated once per mode, then it is loaded in fresh
+interpreter, which never writes bytecode itself. Load time is measured along
+with time of creating every named type afterwards.
+
+    benchmarks/schema_load.py ELFFILE [--repeat N] [--jobs N]
+"""
+import sys
+import json
+import pathlib
+import argparse
+import tempfile
+import subprocess
+
+PARSER = pathlib.Path(__file__).resolve().parent.parent / 'src' / 'parser.py'
+
+# Parser options of every mode, schema mode writes schema.json to destination
+MODES: dict[str, list[str]] = {
+    'source': [],
+    'pyc': ['--pyc', 'unchecked'],
+    'lazy pyc': ['--pyc', 'unchecked', '--lazytypes'],
+    'schema': ['--schema', '{dst}/schema.json'],
+}
+
+MEASURE_SCRIPT = """
+import sys
+import json
+import time
+import importlib
+
+sys.path.insert(0, {dst!r})
+start = time.perf_counter()
+if {schema!r}:
+    from backend import load_schema
+    modules = list(load_schema({schema!r}).values())
+else:
+    modules = [importlib.import_module(name) for name in {modules!r}]
+loaded = time.perf_counter()
+for module in modules:
+    for name in dir(module):
+        getattr(module, name)
+print(json.dumps(dict(modules=len(modules), load=loaded - start, types=time.perf_counter() - loaded)))
+"""
+
+
+def generate(elffile: pathlib.Path, dst: pathlib.Path, options: list[str], jobs: int) -> list[str]:
+    """Generate output of elf with given parser options, returns names of generated modules"""
+    options = [option.format(dst=dst) for option in options]
+    subprocess.run([sys.executable, str(PARSER), str(elffile), '--dst', str(dst), '--withbackend', '-j', str(jobs)]
+                   + options, check=True)
+    return sorted(path.stem for path in dst.glob('*.py') if path.stem != 'backend')
+
+
+def measure(dst: pathlib.Path, modules: list[str], schema: str) -> dict[str, float]:
+    """Load generated output in fresh interpreter, which does not write bytecode"""
+    script = MEASURE_SCRIPT.format(dst=str(dst), modules=modules, schema=schema)
+    output = subprocess.run([sys.executable, '-B', '-c', script], check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main(args: list[str]) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark loading of schema and generated modules')
+    parser.add_argument('elffile', type=pathlib.Path, help='Elffile with dwarf debug information')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of measurements per mode')
+    parser.add_argument('--jobs', type=int, default=1, help='Number of jobs of parser')
+    args = parser.parse_args(args)
+
+    print(f'{"mode":<10} {"modules":>8} {"load [s]":>9} {"types [s]":>10}')
+    for mode, options in MODES.items():
+        with tempfile.TemporaryDirectory() as directory:
+            dst = pathlib.Path(directory)
+            modules = generate(args.elffile, dst, options, args.jobs)
+            schema = str(dst / 'schema.json') if '--schema' in options else ''
+            results = [measure(dst, modules, schema) for _ in range(args.repeat)]
+            best = min(results, key=lambda result: result['load'])
+            print(f'{mode:<10} {best["modules"]:>8} {best["load"]:>9.4f} {best["types"]:>10.4f}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
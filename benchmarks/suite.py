@@ -0,0 +1,277 @@
+#!/usr/bin/python
+"""Benchmark stages of parser on synthetic corpus and compare them with baseline.
+
+Synthetic C sources are built with gcc into single elf with given number of
+compilation units. Every unit includes shared header with common types and
+defines its own chains of nested structures, unions, enums, typedefs, arrays,
+global variables and functions. Stages are measured separately, in fresh
+interpreter: loading elf, parsing (decoding DIEs, creating objects, resolving
+references) and code generation (ordering types and generating code). Times are
+the best of repeated runs. Memory is traced and phases are profiled in separate
+runs, as both slow python down. Time of phase is its share of the profiled stage
+applied to the best time of the stage, phases are reported by trees having profiler.
+
+Results may be saved and later compared with, failing when any stage is slower or
+takes more memory than allowed by tolerance. Source tree of other revision may be
+measured on the same corpus too, eg.:
+
+    benchmarks/suite.py --cus 200 --types 100 --save baseline.json
+    benchmarks/suite.py --cus 200 --types 100 --compare baseline.json --tolerance 0.2
+
+    git worktree add /tmp/baseline HEAD~1
+    benchmarks/suite.py --baseline /tmp/baseline/src
+"""
+import os
+import sys
+import json
+import shutil
+import pathlib
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+SRC_DIR = pathlib.Path(__file__).resolve().parent.parent / 'src'
+
+# Version of saved results, results of other version are not compared
+RESULTS_VERSION = 1
+
+# Parameters of corpus, results are compared only when they are the same
+CORPUS_PARAMETERS = ('cus', 'types', 'depth', 'globals', 'functions', 'shared')
+
+# Measured values, stage times in seconds and memory in bytes
+TIME_METRICS = ('load', 'parse', 'decode', 'create', 'resolve', 'codegen', 'sort', 'total')
+MEMORY_METRICS = ('load_peak', 'parse_peak', 'codegen_peak', 'model')
+
+# Stage and profiler phases of reported phases, time of the first phase without time of the others
+PHASES = {
+    'decode': ('parse', ('decode_dies',)),
+    'create': ('parse', ('create_objects', 'decode_dies')),
+    'resolve': ('parse', ('resolve_refs',)),
+    'sort': ('codegen', ('sort_types',)),
+}
+
+MEASURE_SCRIPT = """
+import gc
+import sys
+import json
+import time
+import tracemalloc
+
+sys.path.insert(0, {src!r})
+from elf.elfdata import ELFData
+try:
+    from common.profiler import profiler
+except ImportError:
+    profiler = None
+
+mode = {mode!r}
+trace_memory = mode == 'traced'
+results = {{}}
+
+def stage(name, function):
+    gc.collect()
+    if trace_memory:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    value = function()
+    results[name] = time.perf_counter() - start
+    if trace_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        results[name + '_peak'] = peak - before
+        results[name + '_retained'] = current - before
+    return value
+
+if trace_memory:
+    tracemalloc.start()
+elif mode == 'profiled' and profiler is not None:
+    profiler.start()
+
+efile = stage('load', lambda: ELFData({elffile!r}))
+files = stage('parse', lambda: efile.parse_elffile())
+stage('codegen', lambda: [file.generate_code() for file in files])
+
+if profiler is not None and profiler.enabled:
+    profiler.stop()
+    phases = {{name: phase['seconds'] for name, phase in profiler.report(0)['phases'].items()}}
+    results['phases'] = phases
+results['objects'] = sum(len(file.types) + len(file.variables) + len(file.functions) for file in files)
+print(json.dumps(results))
+"""
+
+
+def create_header(shared: int) -> str:
+    """Create header with types shared by all units"""
+    code = '#include <stdint.h>\n\n'
+    for index in range(shared):
+        code += (f'typedef struct Shared{index} {{\n\tuint32_t id;\n\tint16_t values[{index % 7 + 1}];\n'
+                 f'\tconst char *name;\n}} Shared{index}_t;\n')
+    return code
+
+
+def create_source(unit: int, types: int, depth: int, globals: int, functions: int, shared: int) -> str:
+    """Create C source of unit with given number of types, structures are nested in chains of given depth"""
+    code = '#include "shared.h"\n\n'
+    code += f'enum Mode{unit} {{ MODE{unit}_OFF, MODE{unit}_ON, MODE{unit}_AUTO = 8 }};\n'
+    structures = max(types - 1, 1)
+    for index in range(structures):
+        prefix = f'U{unit}S{index}'
+        nested = f'\tU{unit}S{index - 1}_t nested[2];\n' if index % depth else ''
+        shared_member = f'\tShared{index % shared}_t shared;\n' if shared else ''
+        if index % 5 == 4:
+            code += f'typedef union {prefix} {{\n\tint32_t raw;\n\tfloat real;\n{nested}}} {prefix}_t;\n'
+        else:
+            code += (f'typedef struct {prefix} {{\n\tint value;\n\tunsigned flags : 3;\n\tenum Mode{unit} mode;\n'
+                     f'{shared_member}\tstruct {prefix} *next;\n{nested}}} {prefix}_t;\n')
+
+    for index in range(globals):
+        code += f'U{unit}S{index % structures}_t unit{unit}_global{index}[{index % 3 + 1}];\n'
+    for index in range(functions):
+        structure = f'U{unit}S{index % structures}_t'
+        code += (f'int unit{unit}_function{index}({structure} *item, int count) '
+                 f'{{ return count + (item != 0); }}\n')
+    if unit == 0:
+        code += 'int main(void) { return 0; }\n'
+    return code
+
+
+def build(directory: pathlib.Path, args: argparse.Namespace) -> pathlib.Path:
+    """Build elf of synthetic corpus in given directory, units are compiled in parallel"""
+    (directory / 'shared.h').write_text(create_header(args.shared))
+    sources = []
+    for unit in range(args.cus):
+        source = f'unit{unit}.c'
+        (directory / source).write_text(create_source(unit, args.types, args.depth, args.globals, args.functions,
+                                                      args.shared))
+        sources.append(source)
+
+    # Relative paths keep names of units relative, as they are in usual builds
+    def compile_unit(source: str) -> str:
+        subprocess.run(['gcc', '-g', '-gdwarf-4', '-O0', '-c', source, '-o', f'{source}.o'], cwd=directory,
+                       check=True)
+        return f'{source}.o'
+
+    with ThreadPoolExecutor(os.cpu_count()) as executor:
+        objects = list(executor.map(compile_unit, sources))
+    subprocess.run(['gcc', '-o', 'corpus.elf', *objects], cwd=directory, check=True)
+    return directory / 'corpus.elf'
+
+
+def measure(elffile: pathlib.Path, src: pathlib.Path, mode: str) -> dict:
+    """Run single measurement of given source tree in fresh interpreter, mode is timed, profiled or traced"""
+    script = MEASURE_SCRIPT.format(src=str(src), elffile=str(elffile), mode=mode)
+    process = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True)
+    if process.returncode:
+        raise RuntimeError(f'Measurement of {src} failed:\n{process.stderr}')
+    return json.loads(process.stdout)
+
+
+def benchmark(elffile: pathlib.Path, src: pathlib.Path, repeat: int) -> dict[str, float | int | None]:
+    """Measure stages of given source tree, best time of repeated runs, phases of profiled run and memory of
+    traced run"""
+    runs = [measure(elffile, src, 'timed') for _ in range(repeat)]
+    profiled = measure(elffile, src, 'profiled')
+    traced = measure(elffile, src, 'traced')
+
+    results = {stage: min(run[stage] for run in runs) for stage in ('load', 'parse', 'codegen')}
+    results['total'] = min(run['load'] + run['parse'] + run['codegen'] for run in runs)
+
+    phases = profiled.get('phases')
+    for phase, (stage, (name, *excluded)) in PHASES.items():
+        if phases is None:
+            results[phase] = None
+            continue
+        seconds = phases.get(name, 0.0) - sum(phases.get(other, 0.0) for other in excluded)
+        results[phase] = results[stage] * seconds / profiled[stage]
+
+    results.update(objects=traced['objects'], load_peak=traced['load_peak'], parse_peak=traced['parse_peak'],
+                   codegen_peak=traced['codegen_peak'], model=traced['parse_retained'])
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Names of metrics exceeding baseline by more than tolerance"""
+    regressions = []
+    for metric in TIME_METRICS + MEMORY_METRICS:
+        current, previous = results.get(metric), baseline.get(metric)
+        if current is not None and previous and current > previous * (1 + tolerance):
+            regressions.append(metric)
+    return regressions
+
+
+def format_value(metric: str, value: float | int | None) -> str:
+    """Format time in milliseconds and memory in KiB"""
+    if value is None:
+        return '-'
+    return f'{value * 1000:.1f}' if metric in TIME_METRICS else f'{value / 1024:.0f}'
+
+
+def main(args: list[str]) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark parser stages on synthetic corpus')
+    parser.add_argument('--cus', type=int, default=50, help='Number of compilation units')
+    parser.add_argument('--types', type=int, default=100, help='Number of structures and unions of every unit')
+    parser.add_argument('--depth', type=int, default=10, help='Depth of chains of nested structures')
+    parser.add_argument('--globals', type=int, default=50, help='Number of global variables of every unit')
+    parser.add_argument('--functions', type=int, default=20, help='Number of functions of every unit')
+    parser.add_argument('--shared', type=int, default=20, help='Number of types of header shared by all units')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs, the best one is reported')
+    parser.add_argument('--corpus', type=pathlib.Path, help='Keep built corpus in given directory')
+    parser.add_argument('--baseline', type=pathlib.Path, help='Source directory of revision to compare with')
+    parser.add_argument('--save', type=pathlib.Path, help='Save results of current source tree to given file')
+    parser.add_argument('--compare', type=pathlib.Path, help='Compare with results saved by --save')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='Allowed relative increase of every metric over compared results')
+    args = parser.parse_args(args)
+
+    if shutil.which('gcc') is None:
+        print('gcc is required to build synthetic corpus', file=sys.stderr)
+        return os.EX_UNAVAILABLE
+
+    parameters = {name: getattr(args, name) for name in CORPUS_PARAMETERS}
+    stored = None
+    if args.compare is not None:
+        stored = json.loads(args.compare.read_text())
+        if stored.get('version') != RESULTS_VERSION or stored.get('parameters') != parameters:
+            print(f'Results in {args.compare} are of other version or corpus: {stored.get("parameters")}',
+                  file=sys.stderr)
+            return os.EX_DATAERR
+
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = args.corpus or pathlib.Path(directory)
+        corpus.mkdir(parents=True, exist_ok=True)
+        elffile = build(corpus, args)
+
+        sources = {'current': SRC_DIR}
+        if args.baseline is not None:
+            sources['baseline'] = args.baseline
+        results = {name: benchmark(elffile, src, args.repeat) for name, src in sources.items()}
+
+    columns = list(results)
+    if stored is not None:
+        results['saved'] = stored['results']
+        columns.append('saved')
+
+    print(f'corpus: {", ".join(f"{name}={value}" for name, value in parameters.items())}, '
+          f'{results["current"]["objects"]} objects')
+    print(f'{"metric":<14}' + ''.join(f'{column:>12}' for column in columns) + '  (time [ms], memory [KiB])')
+    for metric in TIME_METRICS + MEMORY_METRICS:
+        print(f'{metric:<14}' + ''.join(f'{format_value(metric, results[column].get(metric)):>12}'
+                                        for column in columns))
+
+    if args.save is not None:
+        args.save.write_text(json.dumps(dict(version=RESULTS_VERSION, parameters=parameters,
+                                             results=results['current']), indent=2) + '\n')
+
+    if stored is not None:
+        regressions = compare(results['current'], stored['results'], args.tolerance)
+        if regressions:
+            print(f'Regressions over {args.tolerance:.0%} tolerance: {", ".join(regressions)}')
+            return 1
+        print('No regressions')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,90 @@
+#!/usr/bin/python
+"""Measure time of generating code of a file with many types.
+
+Synthetic C file with chains of nested structures, typedefs and arrays is built
+with gcc, then code of its only file is generated. Variables are defined in
+reverse order of types, so dependent types precede their dependencies in debug
+information. Pass source directory of older revision to compare, eg.:
+
+    git worktree add /tmp/baseline HEAD~1
+    benchmarks/type_order.py --types 30000 --baseline /tmp/baseline/src
+"""
+import sys
+import json
+import pathlib
+import argparse
+import tempfile
+import subprocess
+
+SRC_DIR = pathlib.Path(__file__).resolve().parent.parent / 'src'
+
+# Number of structures in a single chain of nested structures
+CHAIN_LENGTH = 50
+
+MEASURE_SCRIPT = """
+import sys
+import json
+import time
+
+sys.path.insert(0, {src!r})
+from elf.elfdata import ELFData
+
+program_file = ELFData({elffile!r}).parse_elffile()[0]
+start = time.perf_counter()
+program_file.generate_code()
+print(json.dumps(dict(types=len(program_file.types), generate=time.perf_counter() - start)))
+"""
+
+
+def create_source(structures: int) -> str:
+    """Create C source with given number of structures, each with its typedef and array type"""
+    code = ''
+    for index in range(structures):
+        nested = f'\tS{index - 1}_t previous[2];\n' if index % CHAIN_LENGTH else ''
+        code += f'typedef struct S{index} {{\n\tint value;\n{nested}}} S{index}_t;\n'
+    for index in reversed(range(structures)):
+        code += f'S{index}_t variable{index};\n'
+    code += 'int main(void) { return 0; }\n'
+    return code
+
+
+def build(directory: pathlib.Path, structures: int) -> pathlib.Path:
+    """Build elf of synthetic source in given directory"""
+    source = directory / 'types.c'
+    elffile = directory / 'types.elf'
+    source.write_text(create_source(structures))
+    subprocess.run(['gcc', '-g', '-gdwarf-4', '-O0', '-o', str(elffile), str(source)], check=True)
+    return elffile
+
+
+def measure(elffile: pathlib.Path, src: pathlib.Path) -> dict[str, float]:
+    """Run single measurement of given source tree in fresh interpreter"""
+    script = MEASURE_SCRIPT.format(src=str(src), elffile=str(elffile))
+    output = subprocess.run([sys.executable, '-c', script], check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main(args: list[str]) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark code generation of file with many types')
+    parser.add_argument('--types', type=int, default=30000, help='Approximate number of types in generated file')
+    parser.add_argument('--baseline', type=pathlib.Path, help='Source directory of revision to compare with')
+    args = parser.parse_args(args)
+
+    sources = {'current': SRC_DIR}
+    if args.baseline is not None:
+        sources['baseline'] = args.baseline
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Every structure brings its typedef and array type
+        elffile = build(pathlib.Path(directory), args.types // 3)
+
+        print(f'{"source":<9} {"types":>8} {"generate [s]":>13}')
+        for name, src in sources.items():
+            result = measure(elffile, src)
+            print(f'{name:<9} {result["types"]:>8} {result["generate"]:>13.3f}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
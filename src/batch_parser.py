@@ -0,0 +1,176 @@
+#!/usr/bin/python
+"""Generate code of many elf files in one run, sharing worker processes and parsed compilation units.
+
+    batch_parser.py --elf ELFFILE DST [--elf ELFFILE DST ...] [--list LIST] [options]
+
+List file holds one elf file and its destination catalogue per line, separated by
+whitespace. Relative paths are relative to catalogue of the list. Empty lines and
+lines starting with # are skipped.
+"""
+import os
+import sys
+import inspect
+import logging
+import pathlib
+import argparse
+import functools
+import contextlib
+
+from elf.batch import BatchTarget, iter_batch_generated
+from elf.cache import ParseCache
+from program.generator.output import BYTECODE_MODES, compiling_bytecode, write_file
+import program.generator.generator_backend as backend
+
+from parser import VERSION, add_profile_args, init_logging, positive_int, run_profiled
+
+
+def read_targets(path: pathlib.Path) -> list[BatchTarget]:
+    """Read targets of batch from list file, relative paths are resolved against catalogue of the list"""
+    targets = []
+    with open(path, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            elffile, dst = line.split()
+            targets.append(BatchTarget(path.parent / elffile, path.parent / dst))
+    return targets
+
+
+def parse_args(args: list[str]) -> argparse.Namespace:
+    """Parse given arguments"""
+    parser = argparse.ArgumentParser(description='Generate code of many elf files in one run, compilation units '
+                                     'shared by elf files are parsed once', exit_on_error=False)
+    parser.add_argument('-e',
+                        '--elf',
+                        dest='targets',
+                        nargs=2,
+                        metavar=('ELFFILE', 'DST'),
+                        help='Elffile with dwarf debug information and destination catalogue of its output, '
+                        'may be given many times',
+                        default=[],
+                        action='append')
+    parser.add_argument('--list',
+                        type=pathlib.Path,
+                        help='File with elf file and destination catalogue on every line',
+                        action='store')
+    parser.add_argument('--version',
+                        action='version',
+                        version='%(prog)s ' + VERSION)
+    parser.add_argument('--log',
+                        type=pathlib.Path,
+                        help='Save logs to given file',
+                        action='store')
+    parser.add_argument('-v',
+                        '--verbose',
+                        default=0,
+                        help='Increase verbosity level of arguments',
+                        action='count')
+    parser.add_argument('--withbackend',
+                        help='Include backend template in every destination catalogue',
+                        action='store_true')
+    parser.add_argument('--mmap',
+                        help='Memory map elf files instead of reading them to memory',
+                        action='store_true')
+    parser.add_argument('-j',
+                        '--jobs',
+                        type=positive_int,
+                        help='Number of processes parsing and generating compilation units of all elf files',
+                        default=1,
+                        action='store')
+    parser.add_argument('--cache',
+                        type=pathlib.Path,
+                        help='Directory of cache with parsed compilation units, shared by all elf files and runs',
+                        action='store')
+    parser.add_argument('--lazytypes',
+                        help='Create types of generated modules on first use instead of on import',
+                        action='store_true')
+    parser.add_argument('--pyc',
+                        choices=BYTECODE_MODES,
+                        help='Compile generated files to bytecode in __pycache__ for current python version. '
+                        'Checked bytecode is validated against hash of its source on import, unchecked is not',
+                        action='store')
+    parser.add_argument('--file',
+                        dest='files',
+                        metavar='GLOB',
+                        help='Generate only source files matching pattern, may be given many times',
+                        action='append')
+    add_profile_args(parser)
+    parsed_args = parser.parse_args(args)
+    parsed_args.targets = [BatchTarget(pathlib.Path(elffile), pathlib.Path(dst))
+                           for elffile, dst in parsed_args.targets]
+    if not parsed_args.targets and not parsed_args.list:
+        parser.error('one of the arguments --elf --list is required')
+    return parsed_args
+
+
+def main() -> int:
+    """Main program procedure"""
+
+    # Parse arguments
+    try:
+        args = parse_args(sys.argv[1:])
+    except argparse.ArgumentError as error:
+        logging.error(error.message)
+        return os.EX_USAGE
+
+    # Initialize logging module
+    try:
+        init_logging(args.log, args.verbose)
+    except FileNotFoundError as error:
+        logging.error(f' Error while trying to open logging file {error.filename} - {error.strerror}')
+        return error.errno
+
+    # Read list of elf files
+    try:
+        targets = args.targets + (read_targets(args.list) if args.list else [])
+    except OSError as error:
+        logging.error(f' Error while reading list of elf files {error.filename} - {error.strerror}')
+        return error.errno
+    except ValueError:
+        logging.error(f' Every line of {args.list} has to hold elf file and destination catalogue')
+        return os.EX_USAGE
+
+    return run_profiled(args, functools.partial(generate_batch, args, targets))
+
+
+def generate_batch(args: argparse.Namespace, targets: list[BatchTarget]) -> int:
+    """Generate code of all targets for parsed arguments, returns exit code"""
+    error_prefix = 'Error while parsing elf files'
+    try:
+        cache = ParseCache(args.cache) if args.cache else None
+
+        for dst in set(target.dst for target in targets):
+            os.makedirs(dst, exist_ok=True)
+
+        logging.info(f'Generating code of {len(targets)} elf files')
+        with contextlib.ExitStack() as stack:
+            compile_file = stack.enter_context(compiling_bytecode(args.pyc, args.jobs)) if args.pyc else None
+
+            for target, filename, code in iter_batch_generated(targets, args.mmap, args.jobs, cache, args.files,
+                                                               args.lazytypes):
+                logging.info(f'Writing {target.dst / filename}')
+                write_file(target.dst / filename, [code])
+                if compile_file is not None:
+                    compile_file(target.dst / filename)
+
+            if args.withbackend:
+                logging.info('Adding backend code')
+                for dst in set(target.dst for target in targets):
+                    write_file(dst / 'backend.py', [inspect.getsource(backend)])
+                    if compile_file is not None:
+                        compile_file(dst / 'backend.py')
+
+    except OSError as error:
+        logging.error(f' {error_prefix}: {error.filename} - {error.strerror}')
+        return error.errno
+
+    except Exception:
+        logging.exception(f' {error_prefix}')
+        return os.EX_SOFTWARE
+
+    return os.EX_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
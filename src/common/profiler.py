@@ -0,0 +1,200 @@
+import json
+import time
+import inspect
+import resource
+import functools
+import tracemalloc
+import multiprocessing
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+# Version of profile report, increased with every incompatible change of its content
+REPORT_VERSION = 1
+
+# Kilobytes of maximum resident set size reported by getrusage() on Linux
+RSS_UNIT = 1024
+
+
+class Profiler(object):
+    """Collector of timings of phases and statistics of compilation units of a run.
+
+    Phases may nest, time of every phase includes phases called from it. Phase
+    entered again while it is active (eg. by recursion) is counted once. Worker
+    processes created by create_pool() collect their own statistics, which are
+    merged with statistics of the main process as results of tasks are received.
+    Profiler does nothing until it is started, so instrumented code runs at full
+    speed otherwise. Tracing of allocated memory is optional, as it slows python
+    down several times and so distorts timings.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.trace_memory = False
+        self._start = 0.0
+        self._phases: dict[str, list[float | int]] = defaultdict(lambda: [0.0, 0])
+        self._active: dict[str, int] = defaultdict(int)
+        self._units: list[dict[str, Any]] = []
+        self._workers_peak: Optional[int] = None
+        self._peak: Optional[int] = None
+        self._wall = 0.0
+
+    def start(self, trace_memory: bool = False) -> None:
+        """Clear collected statistics and start collecting, optionally with tracing of allocated memory"""
+        self.__init__()
+        self.enabled = True
+        self.trace_memory = trace_memory
+        self._start = time.perf_counter()
+
+        # Forked worker inherits traces of its parent, they are dropped
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        if trace_memory:
+            tracemalloc.start()
+
+    def stop(self) -> None:
+        """Stop collecting statistics, collected ones are kept until report is created"""
+        self.enabled = False
+        self._wall = time.perf_counter() - self._start
+        if self.trace_memory:
+            self._peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    @contextmanager
+    def phase(self, name: str, is_call: bool = True) -> Iterator[None]:
+        """Context manager adding time spent in its block to given phase, block is counted as call of the phase
+        unless stated otherwise"""
+        if not self.enabled:
+            yield
+            return
+
+        self._active[name] += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._active[name] -= 1
+            if not self._active[name]:
+                stats = self._phases[name]
+                stats[0] += time.perf_counter() - start
+                stats[1] += is_call
+
+    def iterate(self, name: str, iterable: Iterable) -> Iterable:
+        """Add time spent producing items of iterable to given phase, time of consumer is not counted.
+        Whole iteration is counted as single call of the phase."""
+        if not self.enabled:
+            return iterable
+        return self._iterate(name, iter(iterable))
+
+    def _iterate(self, name: str, iterator: Iterator) -> Iterator:
+        is_call = True
+        while True:
+            with self.phase(name, is_call):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            is_call = False
+            yield item
+
+    def add_unit(self, file_name: str, seconds: float, **counts: int) -> None:
+        """Record statistics of parsed compilation unit"""
+        if self.enabled:
+            self._units.append(dict(file=file_name, seconds=seconds, **counts))
+
+    def collect(self) -> dict[str, Any]:
+        """Take statistics collected since the last call, used by worker processes"""
+        peak = tracemalloc.get_traced_memory()[1] if self.trace_memory else None
+        collected = dict(phases=dict(self._phases), units=self._units, peak=peak)
+        self._phases.clear()
+        self._units = []
+        return collected
+
+    def merge(self, collected: dict[str, Any]) -> None:
+        """Add statistics collected by worker process"""
+        for name, (seconds, calls) in collected['phases'].items():
+            stats = self._phases[name]
+            stats[0] += seconds
+            stats[1] += calls
+        self._units.extend(collected['units'])
+        if collected['peak'] is not None:
+            self._workers_peak = max(self._workers_peak or 0, collected['peak'])
+
+    def create_pool(self, processes: int, initializer: Callable, initargs: tuple) -> multiprocessing.Pool:
+        """Create pool of worker processes, which collect statistics when profiler is started"""
+        if not self.enabled:
+            return multiprocessing.Pool(processes, initializer, initargs)
+        return multiprocessing.Pool(processes, _init_profiled_worker, (self.trace_memory, initializer, initargs))
+
+    def imap(self, pool: multiprocessing.Pool, func: Callable, iterable: Iterable) -> Iterator:
+        """Pool.imap() merging statistics collected by workers with results of tasks"""
+        if not self.enabled:
+            yield from pool.imap(func, iterable)
+            return
+
+        for result, collected in pool.imap(functools.partial(_run_profiled, func), iterable):
+            self.merge(collected)
+            yield result
+
+    def report(self, top: int) -> dict[str, Any]:
+        """Report of the last profiled run, with given number of the slowest compilation units.
+        Peaks of traced memory are None when memory was not traced."""
+        units = sorted(self._units, key=lambda unit: unit['file'])
+        totals = {count: sum(unit[count] for unit in units) for count in ('dies', 'types', 'variables', 'functions')}
+        return {
+            'version': REPORT_VERSION,
+            'seconds': self._wall,
+            'phases': {name: {'seconds': seconds, 'calls': calls}
+                       for name, (seconds, calls) in sorted(self._phases.items(), key=lambda item: -item[1][0])},
+            'units': {'count': len(units), **totals},
+            'slowest_units': sorted(units, key=lambda unit: -unit['seconds'])[:top],
+            'memory': {
+                'tracemalloc_peak': self._peak,
+                'workers_tracemalloc_peak': self._workers_peak,
+                'max_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_UNIT,
+                'workers_max_rss': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * RSS_UNIT,
+            },
+            'unit_statistics': units,
+        }
+
+    def write_report(self, path: Path, top: int) -> None:
+        """Write JSON report of the last profiled run to given file"""
+        with open(path, 'w') as file:
+            json.dump(self.report(top), file, indent=2)
+            file.write('\n')
+
+
+# Profiler of current process, instrumented code records to it
+profiler = Profiler()
+
+
+def profiled(name: str) -> Callable[[Callable], Callable]:
+    """Decorator adding time spent in function to given phase of profiler.
+    Time of generator function is counted only while it produces items."""
+    def decorator(func: Callable) -> Callable:
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                return profiler.iterate(name, func(*args, **kwargs))
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not profiler.enabled:
+                    return func(*args, **kwargs)
+                with profiler.phase(name):
+                    return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _init_profiled_worker(trace_memory: bool, initializer: Callable, initargs: tuple) -> None:
+    """Start profiler of worker process before its initializer, so it is profiled too"""
+    profiler.start(trace_memory)
+    initializer(*initargs)
+
+
+def _run_profiled(func: Callable, item: Any) -> tuple[Any, dict[str, Any]]:
+    """Run task in worker process, returns its result along with statistics collected by it"""
+    result = func(item)
+    return result, profiler.collect()
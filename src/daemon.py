@@ -0,0 +1,233 @@
+#!/usr/bin/python
+"""Parser daemon keeping parsed elf files in memory and serving requests over unix domain socket.
+
+Every request and response is a single line of JSON. Requests are served one at
+a time, in working directory of the client:
+
+    - {"command": "generate", "cwd": DIR, "args": [parser.py arguments]}
+      -> {"status": EXIT_CODE, "stdout": PRINTED_CODE, "log": LOG}
+    - {"command": "query", "cwd": DIR, "elffile": PATH, "kind": "variable" | "function" | "type",
+       "name": NAME} or {..., "kind": "address", "address": START, "end": END}
+      -> {"status": EXIT_CODE, "results": [OBJECT_DESCRIPTION], "log": LOG}
+    - {"command": "shutdown"} -> {"status": 0}
+
+Request failing unexpectedly gets {"status": "error", "log": ERROR}, the error is
+logged by the daemon.
+
+See parser_client.py for client of the daemon.
+"""
+import io
+import os
+import sys
+import json
+import pathlib
+import logging
+import argparse
+import contextlib
+import socketserver
+from typing import Any, Iterator, Optional
+
+from elf.cache import MemoryCache
+from elf.elfdata import ELFData
+from program.program_function import ProgramFunction
+from program.program_index import ProgramIndex, Symbol, get_type_size
+from program.program_variable import ProgramVariable
+
+from parser import LOG_FORMAT, VERSION, get_log_level, init_logging, parse_args, positive_int, run
+
+
+def describe(symbol: Symbol) -> dict[str, Any]:
+    """JSON description of object found in index"""
+    obj = symbol.object
+    if isinstance(obj, ProgramVariable):
+        type = obj.dependency[0] if obj.dependency else None
+        return dict(file=symbol.file_name, kind='variable', name=obj.name, address=obj.address,
+                    type=type.alias if type is not None else None, size=get_type_size(type))
+    if isinstance(obj, ProgramFunction):
+        return dict(file=symbol.file_name, kind='function', name=obj.name, address=obj.address,
+                    args=[arg.alias for arg in obj.dependencies[1:]], returns=obj.dependencies[0].alias)
+    return dict(file=symbol.file_name, kind='type', name=obj.alias, type=obj.get_class().__name__,
+                size=get_type_size(obj))
+
+
+class ParserDaemon(socketserver.UnixStreamServer):
+    """Server of parser requests, parsed elf files are kept in memory cache and reused by requests.
+
+    Keyword Arguments:
+        - socket_path -- path of unix domain socket, existing socket is replaced
+        - max_elfs -- number of parsed elf files kept in memory
+    """
+
+    def __init__(self, socket_path: pathlib.Path, max_elfs: int) -> None:
+        self.cache = MemoryCache(max_elfs)
+        self.running = True
+        self._indexes: dict[str, ProgramIndex] = {}
+        self._request_handler: Optional[logging.Handler] = None
+
+        # Handlers of daemon logs get its level, so they skip more verbose logs of requests
+        self._daemon_level = logging.getLogger().level
+        for handler in logging.getLogger().handlers:
+            handler.setLevel(self._daemon_level)
+
+        if socket_path.is_socket():
+            socket_path.unlink()
+        super().__init__(str(socket_path), ParserRequestHandler)
+
+    def serve(self) -> None:
+        """Serve requests until shutdown is requested"""
+        while self.running:
+            self.handle_request()
+
+    def handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Serve single request, returns response"""
+        match request.get('command'):
+            case 'generate':
+                with self._request_context(request) as output:
+                    try:
+                        args = parse_args(request['args'])
+                        self._set_verbosity(args.verbose)
+                        status = run(args, self.cache)
+                    except argparse.ArgumentError as error:
+                        logging.error(error.message)
+                        status = os.EX_USAGE
+                    except SystemExit as error:
+                        status = error.code
+                return dict(status=status, stdout=output['stdout'].getvalue(), log=output['log'].getvalue())
+            case 'query':
+                with self._request_context(request) as output:
+                    try:
+                        results = [describe(symbol) for symbol in self._query(request)]
+                        status = os.EX_OK
+                    except (OSError, KeyError, ValueError) as error:
+                        logging.error(f'Query failed: {error!r}')
+                        results, status = [], os.EX_USAGE
+                return dict(status=status, results=results, log=output['log'].getvalue())
+            case 'shutdown':
+                self.running = False
+                return dict(status=os.EX_OK)
+            case command:
+                return dict(status=os.EX_USAGE, log=f'Unknown command {command}\n')
+
+    def get_index(self, elffile: str) -> ProgramIndex:
+        """Index of all files of given elf, elf is parsed only if it is not in memory cache"""
+        key = self.cache.get_key(elffile)
+        files = self.cache.load(key)
+        if files is None:
+            with ELFData(elffile) as efile:
+                files = efile.parse_elffile()
+            self.cache.store(key, files)
+
+        # Indexes of evicted entries are dropped along with them
+        self._indexes = {indexed: index for indexed, index in self._indexes.items() if indexed in self.cache}
+        if key not in self._indexes:
+            self._indexes[key] = ProgramIndex(files)
+        return self._indexes[key]
+
+    def _query(self, request: dict[str, Any]) -> list[Symbol]:
+        """Find objects described by query request"""
+        index = self.get_index(request['elffile'])
+        match request['kind']:
+            case 'variable':
+                return index.find_variables(request['name'])
+            case 'function':
+                return index.find_functions(request['name'])
+            case 'type':
+                return index.find_types(request['name'])
+            case 'address':
+                start = request['address']
+                end = request.get('end', start + 1 if _is_int(start) else None)
+                if not _is_int(start) or not _is_int(end):
+                    raise ValueError(f'Addresses of query have to be integers, got {start!r} and {end!r}')
+                return index.variables_in(start, end)
+            case kind:
+                raise ValueError(f'Unknown kind of query {kind}')
+
+    @contextlib.contextmanager
+    def _request_context(self, request: dict[str, Any]) -> Iterator[dict[str, io.StringIO]]:
+        """Run request in working directory of client, capturing printed output and logs of the request"""
+        output = dict(stdout=io.StringIO(), log=io.StringIO())
+        self._request_handler = logging.StreamHandler(output['log'])
+        self._request_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root_logger = logging.getLogger()
+        previous_level = root_logger.level
+        root_logger.addHandler(self._request_handler)
+        self._set_verbosity(request.get('verbose', 0))
+        cwd = os.getcwd()
+        try:
+            os.chdir(request.get('cwd', cwd))
+            with contextlib.redirect_stdout(output['stdout']), contextlib.redirect_stderr(output['log']):
+                yield output
+        finally:
+            os.chdir(cwd)
+            root_logger.removeHandler(self._request_handler)
+            root_logger.setLevel(previous_level)
+
+    def _set_verbosity(self, verbosity: int) -> None:
+        """Set level of logs sent back with response, logs of daemon keep their own level"""
+        self._request_handler.setLevel(get_log_level(verbosity))
+        logging.getLogger().setLevel(min(self._request_handler.level, self._daemon_level))
+
+
+class ParserRequestHandler(socketserver.StreamRequestHandler):
+    """Handler reading request line and writing response line"""
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+            if not isinstance(request, dict):
+                raise ValueError(f'expected object, got {type(request).__name__}')
+        except ValueError as error:
+            response = dict(status=os.EX_USAGE, log=f'Malformed request: {error}\n')
+        else:
+            try:
+                response = self.server.handle(request)
+            except Exception as error:
+                logging.exception(f'Request {request.get("command")} failed')
+                response = dict(status='error', log=f'Request failed: {error!r}\n')
+        self.wfile.write(json.dumps(response).encode() + b'\n')
+
+
+def _is_int(value: Any) -> bool:
+    """Check if value of request is integer, JSON booleans are not"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def main() -> int:
+    """Run parser daemon"""
+    parser = argparse.ArgumentParser(description='Daemon serving parser requests, parsed elf files are kept in '
+                                     'memory between requests')
+    parser.add_argument('socket',
+                        type=pathlib.Path,
+                        help='Path of unix domain socket to listen on')
+    parser.add_argument('--version',
+                        action='version',
+                        version='%(prog)s ' + VERSION)
+    parser.add_argument('--max-elfs',
+                        dest='max_elfs',
+                        type=positive_int,
+                        help='Number of parsed elf files kept in memory, least recently used are dropped',
+                        default=4,
+                        action='store')
+    parser.add_argument('--log',
+                        type=pathlib.Path,
+                        help='Save logs of daemon to given file',
+                        action='store')
+    parser.add_argument('-v',
+                        '--verbose',
+                        default=0,
+                        help='Increase verbosity level of daemon logs',
+                        action='count')
+    args = parser.parse_args(sys.argv[1:])
+    init_logging(args.log, args.verbose)
+
+    with ParserDaemon(args.socket, args.max_elfs) as daemon:
+        logging.info(f'Serving requests on {args.socket}')
+        try:
+            daemon.serve()
+        finally:
+            args.socket.unlink(missing_ok=True)
+    return os.EX_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
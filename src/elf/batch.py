@@ -0,0 +1,136 @@
+import logging
+import functools
+import contextlib
+from collections import namedtuple
+from typing import Callable, Iterable, Iterator, Optional
+
+from common.profiler import profiler
+
+from elf.cache import MemoryCache, ParseCache
+from elf.elfdata import ELFData
+
+from program.program_file import ProgramFile
+
+# Elf file and destination catalogue of its generated files
+BatchTarget = namedtuple('BatchTarget', ['elffile', 'dst'])
+
+# Elf file and name of source file of compilation unit parsed from it
+UnitSource = namedtuple('UnitSource', ['elffile', 'file_name'])
+
+# Output file name, whole generated code and parsed file of compilation unit, None for unit without objects
+GeneratedUnit = tuple[Optional[str], Optional[str], Optional[ProgramFile]]
+
+# Elf data of the last elf used by worker process, elf files are processed one after another
+_worker_elfdata: Optional[ELFData] = None
+_worker_file_name: Optional[str] = None
+_worker_use_mmap: bool = False
+
+
+def _init_worker(use_mmap: bool) -> None:
+    """Set options of worker process, elf files are opened on demand"""
+    global _worker_use_mmap
+    _worker_use_mmap = use_mmap
+
+
+def _open_elf(file_name: str) -> ELFData:
+    """Return elf data of given elf in worker process, elf used before is closed"""
+    global _worker_elfdata, _worker_file_name
+    if _worker_elfdata is None or _worker_file_name != file_name:
+        _close_elf()
+        _worker_elfdata = ELFData(file_name, _worker_use_mmap)
+        _worker_file_name = file_name
+    return _worker_elfdata
+
+
+def _close_elf() -> None:
+    """Close elf data of worker process"""
+    global _worker_elfdata
+    if _worker_elfdata is not None:
+        _worker_elfdata.close()
+        _worker_elfdata = None
+
+
+def _get_unit_keys(file_name: str, files: Optional[list[str]]) -> list[tuple[str, str]]:
+    """Names of selected files of elf along with keys of their compilation units"""
+    efile = _open_elf(file_name)
+    return [(name, efile.get_unit_key(name)) for name in efile.select_file_names(files)]
+
+
+def _generate_unit(source: UnitSource, lazy_types: bool, keep_file: bool) -> GeneratedUnit:
+    """Parse compilation unit and generate its code, parsed file is returned if requested"""
+    program_file = _open_elf(source.elffile).parse_file(source.file_name)
+    kept_file = program_file if keep_file else None
+    if program_file.is_empty:
+        return None, None, kept_file
+    return program_file.filename, program_file.generate_code(lazy_types=lazy_types), kept_file
+
+
+@contextlib.contextmanager
+def _open_pool(jobs: int, use_mmap: bool) -> Iterator[Callable[[Callable, Iterable], Iterator]]:
+    """Context manager returning map function running tasks in worker processes, or serially with one job"""
+    if jobs == 1:
+        _init_worker(use_mmap)
+        try:
+            yield map
+        finally:
+            _close_elf()
+        return
+
+    with profiler.create_pool(jobs, _init_worker, (use_mmap,)) as pool:
+        yield functools.partial(profiler.imap, pool)
+
+
+def iter_batch_generated(targets: list[BatchTarget], use_mmap: bool = False, jobs: int = 1,
+                         cache: Optional[ParseCache | MemoryCache] = None, files: Optional[list[str]] = None,
+                         lazy_types: bool = False) -> Iterator[tuple[BatchTarget, str, str]]:
+    """Yield target, output file name and whole generated code of every file of every elf of the batch.
+
+    Compilation units of all elf files are scheduled on one pool of worker processes.
+    Units are identified by keys independent of layout of their elf, see
+    ELFData.get_unit_key(), so the same unit present in many elf files (eg. built
+    from the same source with the same options) is parsed and generated once, its
+    code is yielded for every target containing it. Targets sharing the same elf
+    file share all of its units.
+    If cache is given, parsed units are stored in it under their keys and units found
+    in it are not parsed, so they are also shared between batches.
+    Files select source files of every elf, see ELFData.select_file_names().
+    With lazy types, generated modules create types on first use, see iter_lazy_types_code().
+    """
+    with _open_pool(jobs, use_mmap) as map_tasks:
+        # Keys are computed from raw bytes of units, which is much faster than parsing
+        target_units = map_tasks(functools.partial(_get_unit_keys, files=files),
+                                 [target.elffile for target in targets])
+
+        # Every unit is generated once, from the first elf containing it
+        unit_targets: dict[str, list[BatchTarget]] = {}
+        unit_sources: dict[str, UnitSource] = {}
+        for target, units in zip(targets, target_units):
+            for file_name, key in units:
+                unit_targets.setdefault(key, []).append(target)
+                unit_sources.setdefault(key, UnitSource(target.elffile, file_name))
+        logging.info(f'{sum(map(len, unit_targets.values()))} files of {len(targets)} elf files '
+                     f'share {len(unit_targets)} compilation units')
+
+        pending = []
+        for key, sharing_targets in unit_targets.items():
+            program_files = cache.load(key) if cache is not None else None
+            if program_files is None:
+                pending.append(key)
+                continue
+
+            for program_file in program_files:
+                code = program_file.generate_code(lazy_types=lazy_types)
+                for target in sharing_targets:
+                    yield target, program_file.filename, code
+
+        logging.info(f'Parsing {len(pending)} compilation units with {jobs} jobs')
+        generated_units = map_tasks(functools.partial(_generate_unit, lazy_types=lazy_types,
+                                                      keep_file=cache is not None),
+                                    [unit_sources[key] for key in pending])
+        for key, (filename, code, program_file) in zip(pending, generated_units):
+            if cache is not None:
+                cache.store(key, [] if program_file.is_empty else [program_file])
+            if code is None:
+                continue
+            for target in unit_targets[key]:
+                yield target, filename, code
@@ -0,0 +1,170 @@
+import os
+import pickle
+import hashlib
+import logging
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional
+
+from elf.constants import ENCODING
+
+from program.program_file import ProgramFile
+
+# Version of cached program model, has to be increased with every change of
+# program classes or parsing results, so stale entries are not used
+CACHE_VERSION = 3
+
+# Errors raised by unpickling of damaged or incompatible entry
+CACHE_ENTRY_ERRORS = (pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError)
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+class ParseCache(object):
+    """Persistent cache of parsed elf files.
+
+    Entries hold resolved program model of all files of an elf and are keyed
+    by hash of elf content. Files are pickled one after another, so entry can be
+    written and read without holding all files in memory.
+
+    Keyword Arguments:
+        - directory -- directory in which cache entries are stored
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+
+    @staticmethod
+    def get_key(file_name: str, selection: Optional[tuple[Optional[list[str]], ...]] = None) -> str:
+        """Return cache key of given elf file, selection of files and symbols is part of the key"""
+        digest = hashlib.sha256()
+        with open(file_name, 'rb') as file:
+            while chunk := file.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        if selection is not None and any(selection):
+            digest.update(repr([sorted(set(names)) if names else None for names in selection]).encode(ENCODING))
+        return digest.hexdigest()
+
+    def load(self, key: str) -> Optional[list[ProgramFile]]:
+        """Return parsed files stored under given key, None if there is no valid entry"""
+        files = self.iter_entry(key)
+        if files is None:
+            return None
+
+        try:
+            return list(files)
+        except CACHE_ENTRY_ERRORS as error:
+            logging.warning(f'Cache entry {key} is damaged: {error}')
+            return None
+
+    def iter_entry(self, key: str) -> Optional[Iterator[ProgramFile]]:
+        """Return iterator loading parsed files stored under given key one at a time,
+        None if there is no entry of current version"""
+        try:
+            file = open(self._entry_path(key), 'rb')
+        except FileNotFoundError:
+            logging.info(f'Cache miss for {key}')
+            return None
+
+        try:
+            version = pickle.load(file)
+        except CACHE_ENTRY_ERRORS as error:
+            file.close()
+            logging.warning(f'Cache entry {key} is damaged: {error}')
+            return None
+
+        if version != CACHE_VERSION:
+            file.close()
+            logging.info(f'Cache entry {key} has version {version}, expected {CACHE_VERSION}')
+            return None
+
+        logging.info(f'Cache hit for {key}')
+        return self._iter_files(file)
+
+    def store(self, key: str, files: Iterable[ProgramFile]) -> None:
+        """Store parsed files under given key, entry is replaced atomically"""
+        with self.writer(key) as add_file:
+            for program_file in files:
+                add_file(program_file)
+
+    @contextmanager
+    def writer(self, key: str) -> Iterator[Callable[[ProgramFile], None]]:
+        """Context manager writing entry under given key one file at a time, files are added
+        with returned function. Entry replaces previous one when context exits without error."""
+        os.makedirs(self.directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile('wb', dir=self.directory, delete=False) as file:
+            try:
+                pickle.dump(CACHE_VERSION, file, protocol=pickle.HIGHEST_PROTOCOL)
+                yield lambda program_file: pickle.dump(program_file, file, protocol=pickle.HIGHEST_PROTOCOL)
+            except BaseException:
+                file.close()
+                os.remove(file.name)
+                raise
+        os.replace(file.name, self._entry_path(key))
+
+    @staticmethod
+    def _iter_files(file: BinaryIO) -> Iterator[ProgramFile]:
+        """Load files pickled one after another until the end of entry"""
+        with file:
+            while True:
+                try:
+                    yield pickle.load(file)
+                except EOFError:
+                    return
+
+    def _entry_path(self, key: str) -> Path:
+        """Return path of entry, version is part of the name so entries of different versions can coexist"""
+        return self.directory / f'{key}.v{CACHE_VERSION}.pickle'
+
+
+class MemoryCache(object):
+    """Cache of parsed elf files kept in memory, with the same interface as ParseCache.
+
+    Entries are keyed like entries of ParseCache. When there are more entries than
+    given limit, the least recently used one is dropped.
+
+    Keyword Arguments:
+        - max_entries -- number of entries kept in memory
+    """
+
+    get_key = staticmethod(ParseCache.get_key)
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, list[ProgramFile]] = OrderedDict()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def load(self, key: str) -> Optional[list[ProgramFile]]:
+        """Return parsed files stored under given key, None if there is no entry"""
+        files = self._entries.get(key)
+        if files is None:
+            logging.info(f'Memory cache miss for {key}')
+            return None
+
+        logging.info(f'Memory cache hit for {key}')
+        self._entries.move_to_end(key)
+        return files
+
+    def iter_entry(self, key: str) -> Optional[Iterator[ProgramFile]]:
+        """Return iterator over parsed files stored under given key, None if there is no entry"""
+        files = self.load(key)
+        return iter(files) if files is not None else None
+
+    def store(self, key: str, files: Iterable[ProgramFile]) -> None:
+        """Store parsed files under given key, least recently used entries are dropped above the limit"""
+        self._entries[key] = list(files)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            logging.info(f'Memory cache entry {evicted} evicted')
+
+    @contextmanager
+    def writer(self, key: str) -> Iterator[Callable[[ProgramFile], None]]:
+        """Context manager collecting entry under given key one file at a time, see ParseCache.writer()"""
+        files = []
+        yield files.append
+        self.store(key, files)
@@ -11,38 +11,19 @@ SECTION_MAP_TYPE: dict[str, str] = {
     'SHT_PROGBITS': '.bss',
     'SHT_HASH': '.hash'}
 
-# Tags of type modifiers
-DIE_TYPE_MODIFIER_TAGS: tuple[str] = (
-    'DW_TAG_pointer_type',
-    'DW_TAG_const_type',
-    'DW_TAG_volatile_type'
-)
-
-# Tags of types that aggregate values
-DIE_TYPE_COLLECTION_TAGS: tuple[str] = (
-    'DW_TAG_structure_type',
-    'DW_TAG_union_type',
-)
-
-# Tags of types
-DIE_TYPE_TAGS: tuple[str] = (
-    'DW_TAG_base_type',
-    'DW_TAG_typedef',
-    'DW_TAG_array_type',
-    'DW_TAG_enumeration_type',
-    'DW_TAG_subroutine_type',
-    *DIE_TYPE_COLLECTION_TAGS,
-    *DIE_TYPE_MODIFIER_TAGS
-)
+# Symbol types (STT_*) from st_info field of symbol table entry
+SYMBOL_TYPE_OBJECT = 1
+SYMBOL_TYPE_FUNC = 2
+SYMBOL_TYPE_FILE = 4
 
 # Tags of functions
 DIE_FUNCTION_TAGS: tuple[str] = (
-    'DW_TAG_subprogram'
+    'DW_TAG_subprogram',
 )
 
 # Tags of variables
 DIE_VARIABLE_TAGS: tuple[str] = (
-    'DW_TAG_variable'
+    'DW_TAG_variable',
 )
 
 REFERENCE_FORM_WITH_OFFSET: tuple[str] = (
@@ -52,4 +33,34 @@ REFERENCE_FORM_WITH_OFFSET: tuple[str] = (
     'DW_FORM_ref8',
 )
 
+# Form of reference to type unit by its signature
+REFERENCE_FORM_SIGNATURE = 'DW_FORM_ref_sig8'
+
+# DIEs of type units in .debug_types section are identified by their offsets moved by this one,
+# so they do not collide with offsets of DIEs in .debug_info section
+TYPE_UNITS_OFFSET = 1 << 64
+
 ENCODING = 'utf8'
+
+# Attributes of skeleton unit of split dwarf (-gsplit-dwarf), naming and identifying its split unit
+# and giving base of its entries in .debug_addr section
+SPLIT_NAME_ATTRIBUTE = 'DW_AT_GNU_dwo_name'
+SPLIT_ID_ATTRIBUTE = 'DW_AT_GNU_dwo_id'
+SPLIT_ADDR_BASE_ATTRIBUTE = 'DW_AT_GNU_addr_base'
+
+# Skeleton units of dwarf 5 (-gdwarf-5 -gsplit-dwarf) have their own unit type and standard attributes
+SPLIT_DWARF5_UNIT_TYPES = ('DW_UT_skeleton', 'DW_UT_split_compile')
+SPLIT_DWARF5_NAME_ATTRIBUTE = 'DW_AT_dwo_name'
+
+# Package of split units is looked up next to elf, with this suffix appended to its name
+SPLIT_PACKAGE_SUFFIX = '.dwp'
+
+# Sections of split units, by names of DWARFInfo arguments and columns of unit index of package (DW_SECT_*)
+SPLIT_SECTIONS: dict[str, tuple[str, int]] = {
+    'debug_info_sec': ('.debug_info.dwo', 1),
+    'debug_abbrev_sec': ('.debug_abbrev.dwo', 3),
+    'debug_line_sec': ('.debug_line.dwo', 4),
+    'debug_str_offsets_sec': ('.debug_str_offsets.dwo', 6),
+}
+SPLIT_STRINGS_SECTION = '.debug_str.dwo'
+SPLIT_UNIT_INDEX_SECTION = '.debug_cu_index'
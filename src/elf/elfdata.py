@@ -1,21 +1,44 @@
 import io
+import os
+import mmap
+import fnmatch
+import bisect
+import hashlib
+import time
 import logging
 import itertools
-from typing import Optional
-from elftools.dwarf.die import DIE
+from collections import Counter
+from typing import Iterator, Optional
 
 import elftools.elf.elffile as elffile
 from elftools.dwarf.compileunit import CompileUnit
+from elftools.dwarf.aranges import ARanges
+from elftools.dwarf.die import DIE
+from elftools.dwarf.dwarfinfo import DebugSectionDescriptor
+from elftools.dwarf.typeunit import TypeUnit
 
+from common.profiler import profiled, profiler
+
+from elf.constants import REFERENCE_FORM_SIGNATURE, SYMBOL_TYPE_FUNC
 from elf.exceptions import MissingDwarfInfoError
-from elf.utils import get_die_type, read_ELF_symbol_section
+from elf.mapped_elffile import MappedELFFile
+from elf.split_dwarf import SplitDwarf
+from elf.unit_key import get_unit_key
+from elf.utils import DIE_FACTORIES, read_ELF_symbol_section, release_unit_caches
 
 
-from program.program_file import ProgramFile
+from program.program_abc import ProgramABC
+from program.program_file import ProgramFile, resolve_refs
+from program.program_index import ProgramIndex
 from program.program_type import ProgramType
 from program.program_function import ProgramFunction
 from program.program_variable import ProgramVariable
-from program.exceptions import FuncitonAddressMissingError, LocalVariableError
+from program.type_table import get_type_fingerprint
+from program.utils import get_signature_key, get_unit_base
+from program.exceptions import FuncitonAddressMissingError, LocalVariableError, ModifierTypeWithNoReferenceError
+
+# Errors raised by factories for DIEs that do not represent objects of generated code
+SKIPPED_DIE_ERRORS = (LocalVariableError, FuncitonAddressMissingError, ModifierTypeWithNoReferenceError)
 
 
 class ELFData(object):
@@ -23,105 +46,424 @@ class ELFData(object):
 
     Keyword Arguemnts:
         - file_name -- executable elf file name from which data will be exctracted
+        - use_mmap -- memory map the file instead of reading it to memory, debug sections
+         are then read on demand and ELFData has to be closed after use
+        - max_memory -- bound memory usage, file is memory mapped and decoded state of
+         every compilation unit (DIEs, abbreviations, mapped pages) is released as soon as
+         the unit is parsed. Peak RSS is then bounded by the sum of: interpreter with
+         imported modules, symbol table arrays (about 40 B per symbol), unit headers
+         (about 1 KiB per unit) and the largest unit with its decoded DIEs and program
+         model. Files parsed again are decoded again.
+
+    Types placed in type units (eg. built with -fdebug-types-section) are referenced by
+    signatures of their units. Type unit is parsed once, when its signature is referenced
+    by a parsed file for the first time, its types are shared by all files using them.
+
+    Units of elf built with -gsplit-dwarf are skeletons of split units placed in .dwo
+    files or in their .dwp package, see SplitDwarf. Only headers and top DIEs of split
+    units are read on load, split unit is decoded when its file is parsed.
     """
 
-    def __init__(self, file_name: str):
+    @profiled('load_elf')
+    def __init__(self, file_name: str, use_mmap: bool = False, max_memory: bool = False):
         self._file_name = file_name
+        self._max_memory = max_memory
+        self._file_map: Optional[mmap.mmap] = None
+        self._shared_digest: Optional[bytes] = None
+        self._abbrev_offsets: list[int] = []
+        self._string_sections: Optional[tuple[bytes, bytes]] = None
+        self._index: Optional[ProgramIndex] = None
+        self._type_units: dict[int, CompileUnit | TypeUnit] = {}
+        self._type_units_read = False
+        self._type_refs: dict[int, ProgramType] = {}
+        self._type_fingerprints: dict[ProgramType, str] = {}
+        self._distinct_types: dict[str, ProgramType] = {}
+        self._split_dwarf: Optional[SplitDwarf] = None
 
-        # Read file to memory
-        with open(self._file_name, 'rb', buffering=0) as file:
-            logging.debug(f'Loading file {self._file_name}')
-            file_image = io.BytesIO(file.readall())
+        if use_mmap or max_memory:
+            # Map file to memory, mapping stays open as long as dwarf info is in use
+            with open(self._file_name, 'rb') as file:
+                logging.debug(f'Mapping file {self._file_name}')
+                self._file_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            elf_file = MappedELFFile(self._file_map)
+        else:
+            # Read file to memory
+            with open(self._file_name, 'rb', buffering=0) as file:
+                logging.debug(f'Loading file {self._file_name}')
+                file_image = io.BytesIO(file.readall())
+            elf_file = elffile.ELFFile(file_image)
 
         # Create elffile class instance
-        elf_file = elffile.ELFFile(file_image)
         if not elf_file.has_dwarf_info():
+            self.close()
             raise MissingDwarfInfoError(f'{self._file_name} is missing dwarf information')
 
         # Extract needed information
         self._dwarfinfo = elf_file.get_dwarf_info()
-        self._cus = list(self._dwarfinfo.iter_CUs())
         self._symbols = read_ELF_symbol_section(elf_file)
 
-        # Release file cached in memory
-        file_image.close()
+        # Release file cached in memory, debug sections were copied by elftools
+        if self._file_map is None:
+            file_image.close()
 
         # Collect all filenames from which elf was built,
         self._files: dict[str, Optional[CompileUnit]] = dict(
-            zip([symbol.name for symbol in self._symbols if symbol.name.endswith('.c')], itertools.repeat(None)))
+            zip([name for name in self._symbols.file_names if name.endswith('.c')], itertools.repeat(None)))
 
-        # Assign cus to their files
-        for cu in self._cus:
-            file_name = str(cu.get_top_DIE().attributes['DW_AT_name'].value, 'utf8')
+        # Assign cus to their files, only unit headers and top DIEs are read here.
+        # Type units of dwarf 5 are placed among compilation units.
+        # Skeleton unit is named by top DIE of its split unit.
+        for cu in self._dwarfinfo.iter_CUs():
+            if cu.header.get('unit_type') == 'DW_UT_type':
+                self._type_units[cu['type_signature']] = cu
+                continue
+            top_die = cu.get_top_DIE()
+            if SplitDwarf.is_skeleton(cu):
+                if self._split_dwarf is None:
+                    self._split_dwarf = SplitDwarf(self._file_name, self._dwarfinfo)
+                top_die = self._split_dwarf.get_top_DIE(cu)
+            file_name = str(top_die.attributes['DW_AT_name'].value, 'utf8')
             self._files[file_name] = cu
+            if self._max_memory:
+                self._release_cu(cu)
+
+    def __enter__(self) -> 'ELFData':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release memory mapping of the file, if file was mapped, and of files of split units."""
+        if self._file_map is not None:
+            self._file_map.close()
+            self._file_map = None
+        if self._split_dwarf is not None:
+            self._split_dwarf.close()
 
     @property
     def file_names(self) -> list[str]:
         """List of all file names that were used during compilation of a program."""
         return self._files.keys()
 
-    def parse_elffile(self) -> list[ProgramFile]:
-        """Eject information about separate files from elf data."""
-        parsed_files = []
-        for file_name, cu in self._files.items():
-            if cu is None:
-                continue
-            logging.debug(f'Parsing file {file_name}')
+    @property
+    def dwarf_file_names(self) -> list[str]:
+        """List of file names that have debug information in elf file, in order of parsing."""
+        return [file_name for file_name, cu in self._files.items() if cu is not None]
+
+    def get_fingerprint(self, file_name: str) -> str:
+        """Return fingerprint of debug information of a file.
+        Fingerprint covers raw bytes of compilation unit, its abbreviations table and
+        sections shared by all units (eg. strings), so it changes whenever parsing
+        result of the file could change. Split unit of skeleton unit is covered too."""
+        cu = self._files[file_name]
+        if cu is None:
+            raise MissingDwarfInfoError(f'{file_name} has no debug information in {self._file_name}')
+
+        digest = hashlib.sha256(self._get_shared_digest())
+        digest.update(_read_section(self._dwarfinfo.debug_info_sec, cu.cu_offset, cu.size))
+        digest.update(self._read_abbrevs(cu))
+        if self._is_skeleton(cu):
+            for data in (*self._split_dwarf.read_unit(cu), self._split_dwarf.get_digest(cu)):
+                digest.update(data)
+        return digest.hexdigest()
+
+    def get_unit_key(self, file_name: str) -> str:
+        """Return key of compilation unit of a file, which does not depend on layout of sections shared
+        by all units. Unit parsed to the same program model gets the same key in different elf files,
+        so it can be shared between them. See get_unit_key() of unit_key module.
+        Key of skeleton unit is key of its split unit, along with strings and addresses indexed by it."""
+        cu = self._files[file_name]
+        if cu is None:
+            raise MissingDwarfInfoError(f'{file_name} has no debug information in {self._file_name}')
+
+        if self._is_skeleton(cu):
+            return get_unit_key(self._split_dwarf.get_unit(cu), *self._split_dwarf.read_unit(cu), b'', b'',
+                                self._split_dwarf.get_digest(cu))
+
+        if self._string_sections is None:
+            self._string_sections = tuple(_read_section(section, 0, section.size) if section is not None else b''
+                                          for section in (self._dwarfinfo.debug_str_sec,
+                                                          self._dwarfinfo.debug_line_str_sec))
+        return get_unit_key(cu, _read_section(self._dwarfinfo.debug_info_sec, cu.cu_offset, cu.size),
+                            self._read_abbrevs(cu), *self._string_sections, self._get_shared_digest())
+
+    def select_file_names(self, files: Optional[list[str]] = None, symbols: Optional[list[str]] = None) -> list[str]:
+        """Names of files which have to be parsed to extract given files and symbols.
+
+        Files are selected by glob patterns matched against file name or its base name.
+        Symbols are names of variables, functions or types, files defining them are
+        found using name lookup tables, address ranges and symbol table, so without
+        parsing compilation units. If any symbol cannot be located this way, all
+        files selected by patterns are returned.
+        """
+        file_names = self.dwarf_file_names
+        if files:
+            file_names = [name for name in file_names
+                          if any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(os.path.basename(name), pattern)
+                                 for pattern in files)]
+
+        if symbols:
+            cu_offsets = self._find_symbols_cus(symbols)
+            if cu_offsets is not None:
+                file_names = [name for name in file_names if self._files[name].cu_offset in cu_offsets]
+
+        return file_names
+
+    def parse_file(self, file_name: str, symbols: Optional[list[str]] = None) -> ProgramFile:
+        """Eject information about single file from elf data.
+        If symbols are given, only objects of given names and their types are kept."""
+        cu = self._files[file_name]
+        if cu is None:
+            raise MissingDwarfInfoError(f'{file_name} has no debug information in {self._file_name}')
+
+        program_file = self._parse_cu(file_name, cu)
+        if symbols:
+            program_file.select(symbols)
+        return program_file
+
+    def parse_elffile(self, files: Optional[list[str]] = None,
+                      symbols: Optional[list[str]] = None) -> list[ProgramFile]:
+        """Eject information about separate files from elf data.
+        Parsed files are indexed, see index."""
+        program_files = list(self.iter_elffile(files, symbols))
+        self._index = ProgramIndex(program_files)
+        return program_files
+
+    @property
+    def index(self) -> ProgramIndex:
+        """Index of variables, functions and types of files returned by the last parse_elffile().
+        Whole elf is parsed when index is used before parse_elffile() is called."""
+        if self._index is None:
+            self.parse_elffile()
+        return self._index
+
+    def iter_elffile(self, files: Optional[list[str]] = None,
+                     symbols: Optional[list[str]] = None) -> Iterator[ProgramFile]:
+        """Eject information about separate files from elf data one file at a time.
+        Compilation unit is parsed only when its file is requested from the iterator.
+        Files and symbols select what is parsed, see select_file_names(), files
+        without any selected symbol are omitted."""
+        for file_name in self.select_file_names(files, symbols):
+            program_file = self.parse_file(file_name, symbols)
+            if not program_file.is_empty:
+                yield program_file
 
-            # Sort die's by object which they represent
-            cu_objects = self._get_cu_objects(cu)
+    @profiled('parse_file')
+    def _parse_cu(self, file_name: str, cu: CompileUnit) -> ProgramFile:
+        """Create representation of single compilation unit."""
+        logging.debug(f'Parsing file {file_name}')
+        start = time.perf_counter()
 
-            # Create coresponding object representations
-            file_types = self._create_types(cu_objects[ProgramType])
-            file_variables = self._create_variables(cu_objects[ProgramVariable])
-            file_functions = self._create_functions(cu_objects[ProgramFunction])
+        # Unnamed objects are numbered per cu, so result does not depend on previously parsed files
+        ProgramABC.Unnamed_count = 0
 
+        # Create coresponding object representations
+        file_types, file_variables, file_functions, die_count, signatures = self._create_objects(cu)
+        if self._max_memory:
+            self._release_cu(cu)
+        if signatures:
+            self._parse_type_units(signatures)
+
+        logging.info(f'Parsed {file_name}: {die_count} DIEs, {len(file_types)} types, '
+                     f'{len(file_variables)} variables, {len(file_functions)} functions')
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
             for object in itertools.chain(file_types, file_variables, file_functions):
-                logging.info(object)
+                logging.debug(object)
 
-            # Create representations of object file/cu
-            parsed_files.append(ProgramFile(file_name, file_types, file_variables, file_functions))
+        # Create representations of object file/cu
+        program_file = ProgramFile(file_name, file_types, file_variables, file_functions,
+                                   self._type_refs if signatures else None)
+        profiler.add_unit(file_name, time.perf_counter() - start, dies=die_count, types=len(file_types),
+                          variables=len(file_variables), functions=len(file_functions))
+        return program_file
 
-        return parsed_files
+    @profiled('create_objects')
+    def _create_objects(self, cu: CompileUnit | TypeUnit) -> tuple[list[ProgramType], list[ProgramVariable],
+                                                                   list[ProgramFunction], int, set[int]]:
+        """Create program objects of all DIEs in compilation unit in a single pass, returns them
+        along with number of DIEs and signatures of type units referenced by them. DIEs without
+        corresponding program object are only counted."""
+        objects = {ProgramType: [], ProgramVariable: [], ProgramFunction: []}
+        skipped_tags = Counter()
+        signatures = set()
+        die_count = 0
+        for die in profiler.iterate('decode_dies', self._iter_DIEs(cu)):
+            die_count += 1
+            type_attribute = die.attributes.get('DW_AT_type')
+            if type_attribute is not None and type_attribute.form == REFERENCE_FORM_SIGNATURE:
+                signatures.add(type_attribute.value)
 
-    def _create_types(self, type_dies: list[DIE]) -> list[ProgramType]:
-        """Get all types defined in a given file."""
-        return list(filter(None, (ProgramType.create(die) for die in type_dies)))
+            try:
+                category, factory = DIE_FACTORIES[die.tag]
+            except KeyError:
+                if die.tag is not None:
+                    skipped_tags[die.tag] += 1
+                continue
 
-    def _create_variables(self, variable_dies: list[DIE]) -> list[ProgramVariable]:
-        """Get all variables defined in a given file."""
-        variables = []
-        for var_die in variable_dies:
             try:
-                variables.append(ProgramVariable(var_die))
-            except LocalVariableError as error:
-                logging.debug(f'{error.args[0]}')
-                logging.debug(f'Variables: skipping {var_die}\t')
+                object = factory(die)
+            except SKIPPED_DIE_ERRORS as error:
+                logging.debug(f'Skipping DIE with offset {die.offset}: {error.args[0]}')
+                continue
 
-        return variables
+            if object is not None:
+                object.release_die()
+                objects[category].append(object)
 
-    def _create_functions(self, function_dies: list[DIE]) -> list[ProgramFunction]:
-        """Get all functions defined in a given file."""
-        functions = []
-        for func_die in function_dies:
-            try:
-                functions.append(ProgramFunction(func_die))
-            except FuncitonAddressMissingError:
-                logging.debug(f'Functions: skipping {func_die}')
+        if skipped_tags:
+            logging.info(f'DIEs without corresponding program object: {dict(skipped_tags)}')
 
-        return functions
+        return objects[ProgramType], objects[ProgramVariable], objects[ProgramFunction], die_count, signatures
 
-    def _get_cu_objects(self, cu: CompileUnit) -> dict[str, list[DIE]]:
-        """Segregates die's in compilation unit by object which dies represent."""
-        objects = {ProgramFunction: [], ProgramVariable: [], ProgramType: []}
-        for die in cu.iter_DIEs():
-            if die.is_null():
+    @profiled('parse_type_units')
+    def _parse_type_units(self, signatures: set[int]) -> None:
+        """Parse type units of given signatures, along with type units they refer to, which were not parsed yet.
+        Their types are resolved and added to types shared by files, see ProgramFile."""
+        created = []
+        created_keys = []
+        pending = [signature for signature in signatures if get_signature_key(signature) not in self._type_refs]
+        while pending:
+            signature = pending.pop()
+            key = get_signature_key(signature)
+            if key in self._type_refs:
                 continue
 
+            # Unnamed types get names unique in every file, regardless of order of parsing
+            unit = self._get_type_unit(signature)
+            ProgramABC.Unnamed_prefix = f'{ProgramABC.UNNAMED_PREFIX}{signature:016x}_'
+            ProgramABC.Unnamed_count = 0
             try:
-                objects[get_die_type(die)].append(die)
-            except KeyError:
-                logging.warning(f'DIE with offset {die.offset} does not have corresponding program object')
-                logging.debug(f'DIE: {die}')
+                types, _, _, _, references = self._create_objects(unit)
+            finally:
+                ProgramABC.Unnamed_prefix = ProgramABC.UNNAMED_PREFIX
+            if self._max_memory:
+                self._release_cu(unit)
+
+            self._type_refs.update((type.offset, type) for type in types)
+            self._type_refs[key] = self._type_refs[unit.cu_offset + unit['type_offset'] + get_unit_base(unit)]
+            created += types
+            created_keys += [type.offset for type in types] + [key]
+            pending += references
+
+        resolve_refs(created, self._type_refs)
+
+        # Type units hold their own copies of types they use (eg. base types and typedefs), equal copies are merged
+        merged = {}
+        for type in created:
+            fingerprint = get_type_fingerprint(type, self._type_fingerprints, pointed=True)
+            merged[type] = self._distinct_types.setdefault(fingerprint, type)
+        for key in created_keys:
+            self._type_refs[key] = merged[self._type_refs[key]]
+        resolve_refs([type for type in created if merged[type] is type], self._type_refs)
+        logging.debug(f'Parsed {len(created)} types of type units, {len(set(merged.values()))} of them distinct')
+
+    def _get_type_unit(self, signature: int) -> CompileUnit | TypeUnit:
+        """Type unit of given signature, headers of type units in .debug_types section are read on first use"""
+        if signature not in self._type_units and not self._type_units_read:
+            self._type_units_read = True
+            for unit in self._dwarfinfo.iter_TUs():
+                self._type_units[unit['signature']] = unit
+
+        try:
+            return self._type_units[signature]
+        except KeyError:
+            raise MissingDwarfInfoError(f'Type unit of signature {signature:#018x} is missing in {self._file_name}')
+
+    def _iter_DIEs(self, cu: CompileUnit | TypeUnit) -> Iterator[DIE]:
+        """Iterate over DIEs of unit, DIEs of split unit are iterated for skeleton unit"""
+        if self._is_skeleton(cu):
+            return self._split_dwarf.iter_DIEs(cu)
+        return cu.iter_DIEs()
+
+    def _is_skeleton(self, cu: CompileUnit | TypeUnit) -> bool:
+        """Check if unit is skeleton of split unit"""
+        return self._split_dwarf is not None and SplitDwarf.is_skeleton(cu)
+
+    def _release_cu(self, cu: CompileUnit | TypeUnit) -> None:
+        """Drop decoded DIEs and abbreviations of compilation unit and mapped pages of the file.
+        Split unit of skeleton unit is dropped along with it."""
+        if self._split_dwarf is not None:
+            self._split_dwarf.release(cu)
+        release_unit_caches(cu)
+
+        # Pages of read-only file mapping are loaded again from the file when accessed
+        if self._file_map is not None and hasattr(mmap, 'MADV_DONTNEED'):
+            self._file_map.madvise(mmap.MADV_DONTNEED)
+
+    def _find_symbols_cus(self, symbols: list[str]) -> Optional[set[int]]:
+        """Offsets of compilation units defining given symbols, None if any symbol can't be located"""
+        pubnames = self._dwarfinfo.get_pubnames()
+        pubtypes = self._dwarfinfo.get_pubtypes()
+        aranges = self._dwarfinfo.get_aranges()
+
+        cu_offsets = set()
+        for symbol in symbols:
+            found = False
+            for lookup_table in filter(None, (pubnames, pubtypes)):
+                if symbol in lookup_table:
+                    cu_offsets.add(lookup_table[symbol].cu_ofs)
+                    found = True
+
+            # Only code addresses are covered by address ranges
+            if aranges is not None:
+                for index in self._symbols.find(symbol):
+                    if self._symbols.type(index) != SYMBOL_TYPE_FUNC:
+                        continue
+                    cu_offset = self._cu_offset_at_addr(aranges, self._symbols.address(index))
+                    if cu_offset is not None:
+                        cu_offsets.add(cu_offset)
+                        found = True
+
+            if not found:
+                logging.info(f'Symbol {symbol} can not be located without parsing')
+                return None
+
+        return cu_offsets
+
+    @staticmethod
+    def _cu_offset_at_addr(aranges: ARanges, address: int) -> Optional[int]:
+        """Offset of compilation unit which code contains given address"""
+        if not aranges.entries:
+            return None
+        return aranges.cu_offset_at_addr(address)
+
+    def _get_shared_digest(self) -> bytes:
+        """Digest of shared sections, computed on first use along with offsets of abbreviation tables"""
+        if self._shared_digest is None:
+            self._shared_digest = self._get_shared_sections_digest()
+            self._abbrev_offsets = sorted(set(unit['debug_abbrev_offset'] for unit in self._files.values()
+                                              if unit is not None))
+        return self._shared_digest
+
+    def _read_abbrevs(self, cu: CompileUnit) -> bytes:
+        """Raw bytes of abbreviations table of compilation unit, table ends where the next one starts"""
+        self._get_shared_digest()
+        abbrev_offset = cu['debug_abbrev_offset']
+        abbrev_index = bisect.bisect_right(self._abbrev_offsets, abbrev_offset)
+        abbrev_end = (self._abbrev_offsets[abbrev_index] if abbrev_index < len(self._abbrev_offsets)
+                      else self._dwarfinfo.debug_abbrev_sec.size)
+        return _read_section(self._dwarfinfo.debug_abbrev_sec, abbrev_offset, abbrev_end - abbrev_offset)
+
+    def _get_shared_sections_digest(self) -> bytes:
+        """Digest of debug sections referenced by all compilation units"""
+        digest = hashlib.sha256()
+        for section in (self._dwarfinfo.debug_str_sec, self._dwarfinfo.debug_line_str_sec,
+                        self._dwarfinfo.debug_str_offsets_sec, self._dwarfinfo.debug_addr_sec,
+                        self._dwarfinfo.debug_types_sec):
+            if section is not None:
+                digest.update(_read_section(section, 0, section.size))
+            digest.update(b'\0')
+
+        # Type units of dwarf 5 are placed in .debug_info, their offsets identify their types
+        for unit in self._type_units.values():
+            if isinstance(unit, CompileUnit):
+                digest.update(f'{unit.cu_offset}:'.encode())
+                digest.update(_read_section(self._dwarfinfo.debug_info_sec, unit.cu_offset, unit.size))
+        return digest.digest()
+
 
-        return objects
+def _read_section(section: DebugSectionDescriptor, offset: int, size: int) -> bytes:
+    """Read raw bytes of debug section"""
+    section.stream.seek(offset)
+    return section.stream.read(size)
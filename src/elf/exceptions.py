@@ -14,3 +14,8 @@ class MissingSymbolTableError(ParserException):
 class FilenameNotFoundError(ParserException):
     """Exception for missing symbol table section in elf file"""
     pass
+
+
+class UnsupportedElftoolsError(ParserException):
+    """Exception for version of elftools lacking its internals used by parser"""
+    pass
@@ -0,0 +1,87 @@
+import io
+import mmap
+from typing import Optional
+
+import elftools.elf.elffile as elffile
+from elftools.dwarf.dwarfinfo import DebugSectionDescriptor
+from elftools.elf.sections import Section
+
+
+class SectionView(object):
+    """Read-only stream over a region of memory mapped file.
+
+    Keyword Arguments:
+        - buffer -- memory map of whole file
+        - offset -- offset of the region in the file
+        - size -- size of the region in bytes
+    """
+
+    def __init__(self, buffer: mmap.mmap, offset: int, size: int) -> None:
+        self._buffer = buffer
+        self._start = offset
+        self._size = size
+        self._position = 0
+
+    def read(self, size: int = -1) -> bytes:
+        """Read up to size bytes from current position, whole rest of the region for negative size"""
+        end = self._size if size < 0 else min(self._position + size, self._size)
+        start = self._start + self._position
+        data = self._buffer[start:self._start + end] if end > self._position else b''
+        self._position = max(end, self._position)
+        return data
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """Change stream position, same semantic as io.IOBase.seek"""
+        match(whence):
+            case io.SEEK_SET:
+                self._position = offset
+            case io.SEEK_CUR:
+                self._position += offset
+            case io.SEEK_END:
+                self._position = self._size + offset
+            case _:
+                raise ValueError(f'Invalid whence value {whence}')
+        return self._position
+
+    def tell(self) -> int:
+        """Return current stream position"""
+        return self._position
+
+    def slice(self, offset: int, size: int) -> 'SectionView':
+        """View of part of the region, offset is relative to start of the region"""
+        return SectionView(self._buffer, self._start + offset, min(size, max(self._size - offset, 0)))
+
+
+class MappedELFFile(elffile.ELFFile):
+    """ELFFile reading dwarf sections directly from memory mapped file.
+
+    Base class copies every debug section into separate BytesIO stream, this one
+    exposes them as views of the mapping, so pages are loaded on demand and shared
+    between processes mapping the same file. Sections that need to be transformed
+    (relocated, compressed) are still copied.
+    """
+
+    def __init__(self, buffer: mmap.mmap) -> None:
+        super().__init__(buffer)
+        self._buffer = buffer
+
+    def _read_dwarf_section(self, section: Section, relocate_dwarf_sections: bool) -> DebugSectionDescriptor:
+        """Return descriptor of section backed by the mapping if section can be used as is"""
+        if (section.compressed or section['sh_type'] == 'SHT_NOBITS' or self.has_phantom_bytes() or
+                (relocate_dwarf_sections and self['e_type'] == 'ET_REL')):
+            return super()._read_dwarf_section(section, relocate_dwarf_sections)
+
+        return DebugSectionDescriptor(
+            stream=SectionView(self._buffer, section['sh_offset'], section['sh_size']),
+            name=section.name,
+            global_offset=section['sh_offset'],
+            size=section['sh_size'],
+            address=section['sh_addr'])
+
+    def get_debug_section(self, name: str) -> Optional[DebugSectionDescriptor]:
+        """Return descriptor of debug section of given name, None if there is no such section.
+        Used for sections unknown to elftools, eg. sections of split dwarf"""
+        section = self.get_section_by_name(name)
+        if section is None:
+            return None
+        return self._read_dwarf_section(section, relocate_dwarf_sections=False)
@@ -0,0 +1,201 @@
+import logging
+import functools
+from typing import Iterable, Iterator, Optional
+
+from common.exceptions import WrongArgumentValueError
+from common.profiler import profiler
+
+from elf.cache import ParseCache
+from elf.elfdata import ELFData
+
+from program.program_file import ProgramFile
+from program.type_table import TypeTable
+from program.generator.constants import SHARED_TYPES_MODULE
+from program.generator.manifest import OutputManifest
+
+# Glob patterns of files and names of symbols to generate, None selects everything
+Selection = tuple[Optional[list[str]], Optional[list[str]]]
+
+# Source file name, output file name, chunks of generated code and parsed file
+GeneratedFile = tuple[str, str, Iterable[str], Optional[ProgramFile]]
+
+# Elf data opened once per worker process by pool initializer, along with selected symbols
+_worker_elfdata: Optional[ELFData] = None
+_worker_symbols: Optional[list[str]] = None
+
+
+def _init_worker(file_name: str, use_mmap: bool, max_memory: bool, symbols: Optional[list[str]]) -> None:
+    """Open elf file in worker process"""
+    global _worker_elfdata, _worker_symbols
+    _worker_elfdata = ELFData(file_name, use_mmap, max_memory)
+    _worker_symbols = symbols
+
+
+def _generate_file(file_name: str, keep_file: bool, lazy_types: bool) -> Optional[GeneratedFile]:
+    """Parse single file in worker process and generate its code, parsed file is returned if requested.
+    None is returned for file without selected symbols."""
+    program_file = _worker_elfdata.parse_file(file_name, _worker_symbols)
+    if program_file.is_empty:
+        return None
+    code = program_file.generate_code(lazy_types=lazy_types)
+    return file_name, program_file.filename, (code,), program_file if keep_file else None
+
+
+def _parse_file(file_name: str) -> Optional[ProgramFile]:
+    """Parse single file in worker process, None is returned for file without selected symbols"""
+    program_file = _worker_elfdata.parse_file(file_name, _worker_symbols)
+    return program_file if not program_file.is_empty else None
+
+
+def iter_generated(file_name: str, use_mmap: bool = False, jobs: int = 1, cache: Optional[ParseCache] = None,
+                   manifest: Optional[OutputManifest] = None, share_types: bool = False,
+                   files: Optional[list[str]] = None, symbols: Optional[list[str]] = None,
+                   max_memory: bool = False, lazy_types: bool = False) -> Iterator[tuple[str, str, Iterable[str]]]:
+    """Yield source file name, output file name and chunks of generated code of every file of elf.
+
+    Code of a file is generated while its chunks are consumed, so it should be
+    written to its destination before the next file is requested.
+    With more than one job compilation units are parsed and generated in worker
+    processes, results are yielded in the same order as in serial run.
+    If cache is given and has entry for the elf, elf is not parsed at all,
+    otherwise parsed files are stored in the cache once all of them are generated.
+    If manifest is given without cache, files with unchanged debug information are
+    not parsed. Generated code has to be recorded in manifest by the caller.
+    With shared types, types present in many files are generated once to shared
+    types module, which is yielded first. All files have to be parsed before
+    any code is generated then.
+    Files and symbols restrict generated code, see ELFData.select_file_names().
+    With max memory every file is dropped as soon as its code is yielded and files
+    are streamed to and from cache, so memory usage of every process is bounded as
+    described in ELFData. Shared types need all files at once and can't be used then.
+    With lazy types, generated modules create types on first use, see iter_lazy_types_code().
+    """
+    if max_memory and share_types:
+        raise WrongArgumentValueError('Shared types can not be generated with bounded memory usage')
+
+    selection = (files, symbols)
+    key = cache.get_key(file_name, selection) if cache is not None else None
+    program_files = None
+    if cache is not None:
+        program_files = cache.iter_entry(key) if max_memory else cache.load(key)
+
+    if program_files is None and share_types:
+        program_files = list(_iter_program_files(file_name, use_mmap, jobs, selection))
+        if cache is not None:
+            cache.store(key, program_files)
+
+    if program_files is not None:
+        yield from _iter_files_code(program_files, share_types, lazy_types)
+    else:
+        yield from _iter_parsed_code(file_name, use_mmap, jobs, cache, key, manifest, selection, max_memory,
+                                     lazy_types)
+
+
+def iter_program_files(file_name: str, use_mmap: bool = False, jobs: int = 1, cache: Optional[ParseCache] = None,
+                       files: Optional[list[str]] = None, symbols: Optional[list[str]] = None,
+                       max_memory: bool = False) -> Iterator[ProgramFile]:
+    """Yield parsed files of elf without generating their code, see iter_generated() for arguments.
+    Files are loaded from cache if it has entry for the elf, otherwise they are stored in it as they are parsed."""
+    selection = (files, symbols)
+    key = cache.get_key(file_name, selection) if cache is not None else None
+    program_files = None
+    if cache is not None:
+        program_files = cache.iter_entry(key) if max_memory else cache.load(key)
+
+    if program_files is not None:
+        yield from program_files
+    elif cache is None:
+        yield from _iter_program_files(file_name, use_mmap, jobs, selection, max_memory)
+    else:
+        with cache.writer(key) as add_file:
+            for program_file in _iter_program_files(file_name, use_mmap, jobs, selection, max_memory):
+                add_file(program_file)
+                yield program_file
+
+
+def _iter_files_code(program_files: Iterable[ProgramFile], share_types: bool,
+                     lazy_types: bool) -> Iterator[tuple[str, str, Iterable[str]]]:
+    """Generate code of parsed files, yield source file name, output file name and chunks of generated code"""
+    if not share_types:
+        for program_file in program_files:
+            yield program_file.name, program_file.filename, program_file.iter_code(lazy_types=lazy_types)
+        return
+
+    type_table = TypeTable(program_files)
+    yield SHARED_TYPES_MODULE, type_table.filename, type_table.iter_code(lazy_types)
+    for program_file in program_files:
+        shared_types = frozenset(type_table.shared_types(program_file))
+        yield program_file.name, program_file.filename, program_file.iter_code(shared_types, lazy_types)
+
+
+def _iter_parsed_code(file_name: str, use_mmap: bool, jobs: int, cache: Optional[ParseCache], key: Optional[str],
+                      manifest: Optional[OutputManifest], selection: Selection,
+                      max_memory: bool, lazy_types: bool) -> Iterator[tuple[str, str, Iterable[str]]]:
+    """Parse files and generate their code, yield source file name, output file name and chunks of generated code.
+    Parsed files are written to cache entry as they are generated, entry is stored after the last one."""
+    if cache is None:
+        for source, filename, chunks, _ in _iter_parsed(file_name, use_mmap, jobs, False, manifest, selection,
+                                                        max_memory, lazy_types):
+            yield source, filename, chunks
+        return
+
+    # Cache entry has to hold all files, so nothing can be skipped when it is created
+    with cache.writer(key) as add_file:
+        for source, filename, chunks, program_file in _iter_parsed(file_name, use_mmap, jobs, True, None, selection,
+                                                                   max_memory, lazy_types):
+            add_file(program_file)
+            yield source, filename, chunks
+
+
+def _iter_program_files(file_name: str, use_mmap: bool, jobs: int, selection: Selection,
+                        max_memory: bool = False) -> Iterator[ProgramFile]:
+    """Parse elf serially or in worker processes, yield parsed files"""
+    files, symbols = selection
+    with ELFData(file_name, use_mmap, max_memory) as efile:
+        if jobs == 1:
+            yield from efile.iter_elffile(files, symbols)
+            return
+
+        file_names = efile.select_file_names(files, symbols)
+
+    logging.info(f'Parsing {len(file_names)} files with {jobs} jobs')
+    with profiler.create_pool(jobs, _init_worker, (file_name, use_mmap, max_memory, symbols)) as pool:
+        yield from filter(None, profiler.imap(pool, _parse_file, file_names))
+
+
+def _iter_parsed(file_name: str, use_mmap: bool, jobs: int, keep_files: bool, manifest: Optional[OutputManifest],
+                 selection: Selection, max_memory: bool, lazy_types: bool) -> Iterator[GeneratedFile]:
+    """Parse elf serially or in worker processes, yield source file name, output file name, chunks of generated
+    code and parsed file if requested. Files that are current in given manifest are not parsed."""
+    files, symbols = selection
+    with ELFData(file_name, use_mmap, max_memory) as efile:
+        file_names = efile.select_file_names(files, symbols)
+        if manifest is not None:
+            # Selected symbols and style of types change generated code, so they are part of the fingerprint
+            file_names = [name for name in file_names
+                          if not manifest.is_current(name, _get_fingerprint(efile, name, symbols, lazy_types))]
+            logging.info(f'{len(file_names)} files changed since last generation')
+
+        if jobs == 1:
+            for name in file_names:
+                program_file = efile.parse_file(name, symbols)
+                if program_file.is_empty:
+                    continue
+                yield (name, program_file.filename, program_file.iter_code(lazy_types=lazy_types),
+                       program_file if keep_files else None)
+            return
+
+    logging.info(f'Parsing {len(file_names)} files with {jobs} jobs')
+    with profiler.create_pool(jobs, _init_worker, (file_name, use_mmap, max_memory, symbols)) as pool:
+        yield from filter(None, profiler.imap(pool, functools.partial(_generate_file, keep_file=keep_files,
+                                                                      lazy_types=lazy_types), file_names))
+
+
+def _get_fingerprint(efile: ELFData, file_name: str, symbols: Optional[list[str]], lazy_types: bool) -> str:
+    """Fingerprint of file debug information extended with selected symbols and style of types"""
+    fingerprint = efile.get_fingerprint(file_name)
+    if symbols:
+        fingerprint += ':' + ','.join(sorted(set(symbols)))
+    if lazy_types:
+        fingerprint += ':lazy'
+    return fingerprint
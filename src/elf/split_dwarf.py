@@ -0,0 +1,335 @@
+import io
+import os
+import mmap
+import bisect
+import hashlib
+import logging
+from collections import namedtuple
+from typing import Iterator, Optional
+
+from elftools.dwarf.compileunit import CompileUnit
+from elftools.dwarf.die import DIE
+from elftools.dwarf.dwarf_expr import DW_OP_name2opcode, DWARFExprParser
+from elftools.dwarf.dwarfinfo import DebugSectionDescriptor, DWARFInfo
+
+from common.profiler import profiled
+
+from elf.constants import (ENCODING, SPLIT_ADDR_BASE_ATTRIBUTE, SPLIT_DWARF5_NAME_ATTRIBUTE, SPLIT_DWARF5_UNIT_TYPES,
+                           SPLIT_ID_ATTRIBUTE, SPLIT_NAME_ATTRIBUTE, SPLIT_PACKAGE_SUFFIX, SPLIT_SECTIONS,
+                           SPLIT_STRINGS_SECTION, SPLIT_UNIT_INDEX_SECTION)
+from elf.exceptions import MissingDwarfInfoError, UnsupportedElftoolsError
+from elf.mapped_elffile import MappedELFFile, SectionView
+from elf.utils import add_uleb128_forms
+
+# Split unit along with its skeleton unit, base of its entries in .debug_addr section and file holding it
+SplitUnit = namedtuple('SplitUnit', ['unit', 'skeleton', 'addr_base', 'path'])
+
+# Contributions of unit of package to its sections, offset and size by column (DW_SECT_*) of unit index
+UnitContributions = dict[int, tuple[int, int]]
+
+# Forms of split units indexing strings and addresses, both unknown to elftools and encoded as unsigned LEB128
+INDEX_FORMS = ('DW_FORM_GNU_str_index', 'DW_FORM_GNU_addr_index')
+
+ADDR_INDEX_OPCODE = DW_OP_name2opcode['DW_OP_GNU_addr_index']
+ADDR_OPCODE = DW_OP_name2opcode['DW_OP_addr']
+
+
+class SplitDwarf(object):
+    """Split units of skeleton units of elf built with -gsplit-dwarf.
+
+    Skeleton unit placed in elf holds only name and id of its split unit and base of
+    its addresses in .debug_addr section, DIEs are in the split unit placed in .dwo
+    file or in package of .dwo files made by dwp. Package named after elf with .dwp
+    suffix is used when present, otherwise .dwo files are looked up in compilation
+    directory of their units and in catalogue of elf. Files are memory mapped and
+    split unit is read only when it is requested, only its own contributions to
+    sections of package are read (see .debug_cu_index).
+    Indexed strings and addresses of split units are translated when their DIEs are
+    decoded, so program objects see them as in units of elf, see iter_DIEs().
+    Split units of dwarf 4 (GNU extension, -gdwarf-4 -gsplit-dwarf) are supported,
+    skeleton units of dwarf 5 are rejected.
+
+    Keyword Arguments:
+        - file_name -- name of elf file
+        - dwarfinfo -- dwarf information of elf, holding skeleton units
+    """
+
+    def __init__(self, file_name: str | os.PathLike, dwarfinfo: DWARFInfo) -> None:
+        self._file_name = os.fspath(file_name)
+        self._dwarfinfo = dwarfinfo
+        self._byteorder = 'little' if dwarfinfo.config.little_endian else 'big'
+        self._files: dict[str, tuple[mmap.mmap, MappedELFFile]] = {}
+        self._units: dict[CompileUnit, SplitUnit] = {}
+        self._addr_bases: Optional[list[int]] = None
+        self._package: Optional[str] = None
+        self._package_sections: dict[str, Optional[DebugSectionDescriptor]] = {}
+        self._package_index: dict[int, UnitContributions] = {}
+
+        package = self._file_name + SPLIT_PACKAGE_SUFFIX
+        if os.path.isfile(package):
+            logging.debug(f'Mapping package of split units {package}')
+            package_file = self._open_file(package)
+            index = package_file.get_debug_section(SPLIT_UNIT_INDEX_SECTION)
+            if index is None:
+                raise MissingDwarfInfoError(f'{package} is missing index of units')
+            self._package = package
+            self._package_index = read_unit_index(_read_section(index, 0, index.size), self._byteorder)
+            self._package_sections = {argument: package_file.get_debug_section(name)
+                                      for argument, (name, _) in SPLIT_SECTIONS.items()}
+            self._package_sections['debug_str_sec'] = package_file.get_debug_section(SPLIT_STRINGS_SECTION)
+
+    @staticmethod
+    def is_skeleton(cu: CompileUnit) -> bool:
+        """Check if compilation unit is skeleton of split unit, MissingDwarfInfoError is raised for skeleton
+        of dwarf 5, its split unit can not be read"""
+        attributes = cu.get_top_DIE().attributes
+        if cu.header.get('unit_type') in SPLIT_DWARF5_UNIT_TYPES or SPLIT_DWARF5_NAME_ATTRIBUTE in attributes:
+            raise MissingDwarfInfoError('Split dwarf 5 is not supported, rebuild elf with -gdwarf-4 -gsplit-dwarf')
+        return SPLIT_ID_ATTRIBUTE in attributes
+
+    def close(self) -> None:
+        """Release memory mappings of package and .dwo files"""
+        self._units.clear()
+        self._package_sections.clear()
+        for file_map, _ in self._files.values():
+            file_map.close()
+        self._files.clear()
+
+    def get_unit(self, skeleton: CompileUnit) -> CompileUnit:
+        """Split unit of skeleton unit, its file is opened on first request"""
+        return self._get_split_unit(skeleton).unit
+
+    def get_top_DIE(self, skeleton: CompileUnit) -> DIE:
+        """Top DIE of split unit of skeleton unit with translated attributes, the only DIE decoded"""
+        split_unit = self._get_split_unit(skeleton)
+        top_die = split_unit.unit.get_top_DIE()
+        self._translate_attributes(top_die, split_unit)
+        return top_die
+
+    def iter_DIEs(self, skeleton: CompileUnit) -> Iterator[DIE]:
+        """Iterate over DIEs of split unit of skeleton unit, with indexed strings and addresses translated.
+        All DIEs are decoded and translated before the first one is returned, as program objects
+        read children of their DIEs."""
+        split_unit = self._get_split_unit(skeleton)
+        dies = list(split_unit.unit.iter_DIEs())
+        for die in dies:
+            self._translate_attributes(die, split_unit)
+        yield from dies
+
+    def read_unit(self, skeleton: CompileUnit) -> tuple[bytes, bytes]:
+        """Raw bytes of split unit of skeleton unit, including its header, and of its abbreviations"""
+        unit = self.get_unit(skeleton)
+        abbrevs = unit.dwarfinfo.debug_abbrev_sec
+        return (_read_section(unit.dwarfinfo.debug_info_sec, unit.cu_offset, unit.size),
+                _read_section(abbrevs, 0, abbrevs.size))
+
+    def get_digest(self, skeleton: CompileUnit) -> bytes:
+        """Digest of strings and addresses indexed by split unit of skeleton unit"""
+        split_unit = self._get_split_unit(skeleton)
+        digest = hashlib.sha256()
+        offsets = split_unit.unit.dwarfinfo.debug_str_offsets_sec
+        if offsets is not None:
+            for index in range(offsets.size // self._get_offset_size(split_unit.unit)):
+                digest.update(self._get_string(split_unit.unit, index))
+                digest.update(b'\0')
+
+        addresses = self._dwarfinfo.debug_addr_sec
+        if addresses is not None:
+            addr_end = self._get_addr_end(split_unit.addr_base)
+            digest.update(_read_section(addresses, split_unit.addr_base, addr_end - split_unit.addr_base))
+        return digest.digest()
+
+    def release(self, skeleton: CompileUnit) -> None:
+        """Drop split unit of skeleton unit with its decoded DIEs and mapped pages of its file.
+        Unit is read again when it is requested."""
+        split_unit = self._units.pop(skeleton, None)
+        if split_unit is not None and hasattr(mmap, 'MADV_DONTNEED'):
+            self._files[split_unit.path][0].madvise(mmap.MADV_DONTNEED)
+
+    def _get_split_unit(self, skeleton: CompileUnit) -> SplitUnit:
+        split_unit = self._units.get(skeleton)
+        if split_unit is None:
+            split_unit = self._units[skeleton] = self._read_split_unit(skeleton)
+        return split_unit
+
+    @profiled('read_split_unit')
+    def _read_split_unit(self, skeleton: CompileUnit) -> SplitUnit:
+        """Find split unit of skeleton unit, in package or .dwo file, and read its header"""
+        attributes = skeleton.get_top_DIE().attributes
+        unit_id = attributes[SPLIT_ID_ATTRIBUTE].value
+        addr_base = attributes[SPLIT_ADDR_BASE_ATTRIBUTE].value if SPLIT_ADDR_BASE_ATTRIBUTE in attributes else 0
+        if self._package is not None:
+            path = self._package
+            sections = self._get_package_sections(unit_id)
+        else:
+            path = self._find_unit_file(attributes)
+            unit_file = self._open_file(path)
+            sections = {argument: unit_file.get_debug_section(name) for argument, (name, _) in SPLIT_SECTIONS.items()}
+            sections['debug_str_sec'] = unit_file.get_debug_section(SPLIT_STRINGS_SECTION)
+
+        if sections['debug_info_sec'] is None:
+            raise MissingDwarfInfoError(f'{path} is missing dwarf information')
+        try:
+            dwarfinfo = DWARFInfo(config=self._dwarfinfo.config, debug_aranges_sec=None, debug_frame_sec=None,
+                                  eh_frame_sec=None, debug_loc_sec=None, debug_ranges_sec=None,
+                                  debug_pubtypes_sec=None, debug_pubnames_sec=None,
+                                  debug_addr_sec=self._dwarfinfo.debug_addr_sec, debug_line_str_sec=None,
+                                  debug_loclists_sec=None, debug_rnglists_sec=None, debug_sup_sec=None,
+                                  gnu_debugaltlink_sec=None, debug_types_sec=None, **sections)
+        except TypeError as error:
+            raise UnsupportedElftoolsError(f'Split dwarf requires pyelftools 0.33: {error}') from error
+
+        # Id of split unit changes with its content, so it is checked for units rebuilt after elf was linked
+        unit = next(dwarfinfo.iter_CUs(), None)
+        if unit is not None:
+            add_uleb128_forms(unit, INDEX_FORMS)
+        split_id = unit.get_top_DIE().attributes.get(SPLIT_ID_ATTRIBUTE) if unit is not None else None
+        if split_id is None or split_id.value != unit_id:
+            raise MissingDwarfInfoError(f'{path} does not hold split unit {unit_id:#018x} of {self._file_name}, '
+                                        f'it is out of date')
+        return SplitUnit(unit, skeleton, addr_base, path)
+
+    def _find_unit_file(self, attributes: dict) -> str:
+        """Path of .dwo file named by skeleton unit, relative name is looked up in compilation directory
+        and in catalogue of elf"""
+        name = str(attributes[SPLIT_NAME_ATTRIBUTE].value, ENCODING)
+        elf_directory = os.path.dirname(self._file_name)
+        candidates = [os.path.join(elf_directory, name), os.path.join(elf_directory, os.path.basename(name))]
+        if 'DW_AT_comp_dir' in attributes:
+            candidates.insert(0, os.path.join(str(attributes['DW_AT_comp_dir'].value, ENCODING), name))
+
+        for path in candidates:
+            if os.path.isfile(path):
+                return path
+        raise MissingDwarfInfoError(f'Split unit {name} of {self._file_name} not found, neither is package '
+                                    f'{self._file_name}{SPLIT_PACKAGE_SUFFIX}')
+
+    def _get_package_sections(self, unit_id: int) -> dict[str, Optional[DebugSectionDescriptor]]:
+        """Sections of package limited to contributions of unit of given id"""
+        try:
+            contributions = self._package_index[unit_id]
+        except KeyError:
+            raise MissingDwarfInfoError(f'Split unit {unit_id:#018x} of {self._file_name} is missing in '
+                                        f'{self._package}')
+
+        sections = {'debug_str_sec': self._package_sections['debug_str_sec']}
+        for argument, (_, column) in SPLIT_SECTIONS.items():
+            section = self._package_sections[argument]
+            if section is None or column not in contributions:
+                sections[argument] = None
+            else:
+                sections[argument] = _slice_section(section, *contributions[column])
+        return sections
+
+    def _open_file(self, path: str) -> MappedELFFile:
+        """Memory map file of split units, file is mapped once"""
+        if path not in self._files:
+            with open(path, 'rb') as file:
+                file_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._files[path] = file_map, MappedELFFile(file_map)
+        return self._files[path][1]
+
+    def _translate_attributes(self, die: DIE, split_unit: SplitUnit) -> None:
+        """Replace values of attributes indexing strings and addresses by strings and addresses, location
+        given by indexed address is replaced by location with the address"""
+        for name, attribute in die.attributes.items():
+            match attribute.form:
+                case 'DW_FORM_GNU_str_index':
+                    value = self._get_string(split_unit.unit, attribute.raw_value)
+                case 'DW_FORM_GNU_addr_index':
+                    value = self._get_address(split_unit, attribute.raw_value)
+                case 'DW_FORM_exprloc' if attribute.raw_value[:1] == [ADDR_INDEX_OPCODE]:
+                    value = self._translate_location(attribute.raw_value, split_unit)
+                case _:
+                    continue
+            die.attributes[name] = attribute._replace(value=value)
+
+    def _translate_location(self, location: list[int], split_unit: SplitUnit) -> list[int]:
+        """Location consisting of indexed address only is replaced by location with the address,
+        other locations are kept"""
+        operations = DWARFExprParser(split_unit.unit.structs).parse_expr(location)
+        if len(operations) != 1:
+            return location
+        address = self._get_address(split_unit, operations[0].args[0])
+        return [ADDR_OPCODE, *address.to_bytes(split_unit.skeleton['address_size'], self._byteorder)]
+
+    def _get_string(self, unit: CompileUnit, index: int) -> bytes:
+        """String of split unit at given index of its string offsets table"""
+        offset_size = self._get_offset_size(unit)
+        offset = _read_section(unit.dwarfinfo.debug_str_offsets_sec, index * offset_size, offset_size)
+        return unit.dwarfinfo.get_string_from_table(int.from_bytes(offset, self._byteorder))
+
+    def _get_address(self, split_unit: SplitUnit, index: int) -> int:
+        """Address of split unit at given index of its table in .debug_addr section of elf"""
+        address_size = split_unit.skeleton['address_size']
+        address = _read_section(self._dwarfinfo.debug_addr_sec, split_unit.addr_base + index * address_size,
+                                address_size)
+        return int.from_bytes(address, self._byteorder)
+
+    def _get_addr_end(self, addr_base: int) -> int:
+        """End of table of addresses starting at given base, table ends where table of the next unit starts"""
+        if self._addr_bases is None:
+            self._addr_bases = sorted(set(cu.get_top_DIE().attributes[SPLIT_ADDR_BASE_ATTRIBUTE].value
+                                          for cu in self._dwarfinfo.iter_CUs()
+                                          if SPLIT_ADDR_BASE_ATTRIBUTE in cu.get_top_DIE().attributes))
+        index = bisect.bisect_right(self._addr_bases, addr_base)
+        return (self._addr_bases[index] if index < len(self._addr_bases)
+                else self._dwarfinfo.debug_addr_sec.size)
+
+    @staticmethod
+    def _get_offset_size(unit: CompileUnit) -> int:
+        return 8 if unit.dwarf_format() == 64 else 4
+
+
+def read_unit_index(data: bytes, byteorder: str) -> dict[int, UnitContributions]:
+    """Contributions of units of package to its sections, by ids of units.
+
+    Index of version 2 (GNU extension of dwarf 4) and of version 5 have the same
+    layout: header, hash table of unit ids with rows of units, ids of sections of
+    columns and tables of offsets and sizes of contributions, with row for every unit.
+
+    Keyword Arguments:
+        - data -- content of .debug_cu_index section
+        - byteorder -- byte order of the package, 'little' or 'big'
+    """
+    def read_word(position: int, size: int = 4) -> int:
+        return int.from_bytes(data[position:position + size], byteorder)
+
+    # Version 5 has 2 bytes of version followed by 2 bytes of padding
+    version = read_word(0) if read_word(0) == 2 else read_word(0, 2)
+    if version not in (2, 5):
+        raise MissingDwarfInfoError(f'Index of units of version {version} is not supported')
+    columns, units, slots = read_word(4), read_word(8), read_word(12)
+    ids_start = 16
+    rows_start = ids_start + slots * 8
+    sections = [read_word(rows_start + slots * 4 + column * 4) for column in range(columns)]
+    offsets_start = rows_start + slots * 4 + columns * 4
+    sizes_start = offsets_start + units * columns * 4
+
+    index = {}
+    for slot in range(slots):
+        row = read_word(rows_start + slot * 4)
+        if not row:
+            continue
+        row_start = (row - 1) * columns * 4
+        index[read_word(ids_start + slot * 8, 8)] = {
+            section: (read_word(offsets_start + row_start + column * 4),
+                      read_word(sizes_start + row_start + column * 4))
+            for column, section in enumerate(sections)}
+    return index
+
+
+def _slice_section(section: DebugSectionDescriptor, offset: int, size: int) -> DebugSectionDescriptor:
+    """Descriptor of part of debug section, mapped sections are not copied"""
+    if isinstance(section.stream, SectionView):
+        stream = section.stream.slice(offset, size)
+    else:
+        stream = io.BytesIO(_read_section(section, offset, size))
+    return DebugSectionDescriptor(stream=stream, name=section.name, global_offset=section.global_offset + offset,
+                                  size=size, address=section.address)
+
+
+def _read_section(section: DebugSectionDescriptor, offset: int, size: int) -> bytes:
+    """Read raw bytes of debug section"""
+    section.stream.seek(offset)
+    return section.stream.read(size)
@@ -0,0 +1,119 @@
+import sys
+import bisect
+from array import array
+from typing import Optional
+
+from elf.constants import ENCODING, SYMBOL_TYPE_FILE, SYMBOL_TYPE_FUNC, SYMBOL_TYPE_OBJECT
+
+# Layout of symbol table entry for elf class - entry size and offsets of fields
+SymbolLayout = dict[str, int]
+SYMBOL_LAYOUTS: dict[int, SymbolLayout] = {
+    32: dict(size=16, name=0, value=4, symsize=8, info=12, shndx=14),
+    64: dict(size=24, name=0, info=4, shndx=6, value=8, symsize=16),
+}
+
+# Array type codes of field sizes
+ARRAY_TYPECODES: dict[int, str] = {
+    2: 'H',
+    4: 'I',
+    8: 'Q',
+}
+
+
+class SymbolTable(object):
+    """Symbol table decoded in bulk to compact arrays of fields.
+
+    Fields are extracted with strided slices of whole section, so no object is
+    created per symbol. Names are decoded from string table only when requested,
+    indexes for lookup by name and address are sorted on first use.
+
+    Keyword Arguments:
+        - data -- raw content of symbol table section
+        - strings -- raw content of linked string table section
+        - elfclass -- 32 or 64, class of elf file
+        - little_endian -- endianness of elf file
+    """
+
+    def __init__(self, data: bytes, strings: bytes, elfclass: int, little_endian: bool) -> None:
+        layout = SYMBOL_LAYOUTS[elfclass]
+        address_size = elfclass // 8
+        swap = little_endian != (sys.byteorder == 'little')
+
+        self._strings = strings
+        self._name_offsets = self._get_field(data, layout, layout['name'], 4, swap)
+        self._values = self._get_field(data, layout, layout['value'], address_size, swap)
+        self._sizes = self._get_field(data, layout, layout['symsize'], address_size, swap)
+        self._shndx = self._get_field(data, layout, layout['shndx'], 2, swap)
+        self._info = data[layout['info']::layout['size']]
+
+        self._names_index: Optional[list[str]] = None
+        self._names_order: Optional[array] = None
+        self._address_index: Optional[array] = None
+        self._address_order: Optional[array] = None
+
+    def __len__(self) -> int:
+        return len(self._name_offsets)
+
+    def name(self, index: int) -> str:
+        """Name of symbol of given index"""
+        offset = self._name_offsets[index]
+        return str(self._strings[offset:self._strings.index(b'\0', offset)], ENCODING)
+
+    def address(self, index: int) -> int:
+        """Value (address) of symbol of given index"""
+        return self._values[index]
+
+    def size(self, index: int) -> int:
+        """Size of symbol of given index"""
+        return self._sizes[index]
+
+    def type(self, index: int) -> int:
+        """Type (STT_*) of symbol of given index"""
+        return self._info[index] & 0xf
+
+    @property
+    def file_names(self) -> list[str]:
+        """Names of all STT_FILE symbols, in order of the table"""
+        return [self.name(index) for index, info in enumerate(self._info) if info & 0xf == SYMBOL_TYPE_FILE]
+
+    def find(self, name: str) -> list[int]:
+        """Indexes of symbols with given name"""
+        if self._names_index is None:
+            order = sorted(range(len(self)), key=self.name)
+            self._names_order = array('L', order)
+            self._names_index = [self.name(index) for index in order]
+
+        start = bisect.bisect_left(self._names_index, name)
+        end = bisect.bisect_right(self._names_index, name, start)
+        return list(self._names_order[start:end])
+
+    def find_by_address(self, address: int) -> Optional[int]:
+        """Index of defined data or function symbol, which address range contains given address"""
+        if self._address_index is None:
+            order = sorted((index for index, info in enumerate(self._info)
+                            if info & 0xf in (SYMBOL_TYPE_OBJECT, SYMBOL_TYPE_FUNC) and self._shndx[index] != 0),
+                           key=self._values.__getitem__)
+            self._address_order = array('L', order)
+            self._address_index = array(self._values.typecode, (self._values[index] for index in order))
+
+        # Check symbols starting at the closest address below given one
+        position = bisect.bisect_right(self._address_index, address) - 1
+        start = self._address_index[position] if position >= 0 else None
+        while position >= 0 and self._address_index[position] == start:
+            index = self._address_order[position]
+            if address < start + max(self._sizes[index], 1):
+                return index
+            position -= 1
+        return None
+
+    @staticmethod
+    def _get_field(data: bytes, layout: SymbolLayout, offset: int, size: int, swap: bool) -> array:
+        """Extract field of given offset and size from every entry"""
+        if layout['size'] % size != 0 or offset % size != 0:
+            raise ValueError(f'Field at offset {offset} of size {size} is not aligned in symbol entry')
+        values = memoryview(data).cast(ARRAY_TYPECODES[size])[offset // size::layout['size'] // size]
+        field = array(ARRAY_TYPECODES[size])
+        field.frombytes(values.tobytes())
+        if swap:
+            field.byteswap()
+        return field
@@ -0,0 +1,137 @@
+import hashlib
+
+from elftools.dwarf.compileunit import CompileUnit
+from elftools.dwarf.enums import ENUM_DW_FORM
+
+# Sizes of forms with fixed size, in bytes
+FIXED_FORM_SIZES: dict[str, int] = {
+    **dict.fromkeys(('DW_FORM_data1', 'DW_FORM_ref1', 'DW_FORM_flag', 'DW_FORM_strx1', 'DW_FORM_addrx1'), 1),
+    **dict.fromkeys(('DW_FORM_data2', 'DW_FORM_ref2', 'DW_FORM_strx2', 'DW_FORM_addrx2'), 2),
+    **dict.fromkeys(('DW_FORM_strx3', 'DW_FORM_addrx3'), 3),
+    **dict.fromkeys(('DW_FORM_data4', 'DW_FORM_ref4', 'DW_FORM_strx4', 'DW_FORM_addrx4', 'DW_FORM_ref_sup4'), 4),
+    **dict.fromkeys(('DW_FORM_data8', 'DW_FORM_ref8', 'DW_FORM_ref_sig8', 'DW_FORM_ref_sup8'), 8),
+    'DW_FORM_data16': 16,
+    **dict.fromkeys(('DW_FORM_flag_present', 'DW_FORM_implicit_const'), 0),
+}
+
+# Forms of offset size, 4 bytes in 32-bit dwarf and 8 bytes in 64-bit dwarf
+OFFSET_FORMS: tuple[str, ...] = ('DW_FORM_strp', 'DW_FORM_line_strp', 'DW_FORM_sec_offset', 'DW_FORM_strp_sup',
+                                 'DW_FORM_GNU_strp_alt', 'DW_FORM_GNU_ref_alt')
+
+# Forms of variable size encoded as unsigned or signed LEB128
+LEB128_FORMS: tuple[str, ...] = ('DW_FORM_udata', 'DW_FORM_sdata', 'DW_FORM_ref_udata', 'DW_FORM_strx',
+                                 'DW_FORM_addrx', 'DW_FORM_loclistx', 'DW_FORM_rnglistx', 'DW_FORM_GNU_addr_index',
+                                 'DW_FORM_GNU_str_index')
+
+# Forms of blocks prefixed with their length
+BLOCK_LENGTH_SIZES: dict[str, int] = {'DW_FORM_block1': 1, 'DW_FORM_block2': 2, 'DW_FORM_block4': 4}
+LEB128_BLOCK_FORMS: tuple[str, ...] = ('DW_FORM_block', 'DW_FORM_exprloc')
+
+# Forms indexing tables of shared sections, type units or supplementary files, units using them depend on those
+INDEXED_FORMS: frozenset[str] = frozenset(('DW_FORM_strx', 'DW_FORM_strx1', 'DW_FORM_strx2', 'DW_FORM_strx3',
+                                           'DW_FORM_strx4', 'DW_FORM_addrx', 'DW_FORM_addrx1', 'DW_FORM_addrx2',
+                                           'DW_FORM_addrx3', 'DW_FORM_addrx4', 'DW_FORM_GNU_addr_index',
+                                           'DW_FORM_GNU_str_index', 'DW_FORM_strp_sup', 'DW_FORM_ref_sup4',
+                                           'DW_FORM_ref_sup8', 'DW_FORM_GNU_strp_alt', 'DW_FORM_GNU_ref_alt',
+                                           'DW_FORM_ref_sig8'))
+
+# Attributes pointing to sections which are not parsed, their offsets depend only on layout of the elf
+LAYOUT_ATTRIBUTES: frozenset[str] = frozenset(('DW_AT_stmt_list', 'DW_AT_ranges', 'DW_AT_macros',
+                                               'DW_AT_GNU_macros', 'DW_AT_macro_info'))
+
+FORM_NAMES: dict[int, str] = {value: name for name, value in ENUM_DW_FORM.items() if isinstance(value, int)}
+
+
+def get_unit_key(cu: CompileUnit, info: bytes, abbrevs: bytes, strings: bytes, line_strings: bytes,
+                 shared_digest: bytes) -> str:
+    """Key of compilation unit, equal for units parsed to the same program model in any elf.
+
+    Raw bytes of the unit DIEs are hashed along with its abbreviations table, header
+    fields, offset of the unit (program objects are identified by offsets of their
+    DIEs) and strings it refers to, instead of their offsets. So the same unit placed at the same offset of
+    elf files with different string sections gets the same key. Units using forms
+    which index shared sections get digest of those sections instead.
+    DIEs are only scanned, without decoding their attributes.
+
+    Keyword Arguments:
+        - cu -- compilation unit, only its header and abbreviations are used
+        - info -- raw bytes of the unit, including its header
+        - abbrevs -- raw bytes of abbreviations table of the unit
+        - strings -- content of .debug_str section
+        - line_strings -- content of .debug_line_str section
+        - shared_digest -- digest of all sections shared by units, see ELFData.get_fingerprint()
+    """
+    offset_size = 8 if cu.dwarf_format() == 64 else 4
+    address_size = cu['address_size']
+    ref_addr_size = address_size if cu['version'] == 2 else offset_size
+
+    # Offset of abbreviations table is the only header field depending on layout of the elf
+    digest = hashlib.sha256(f'{cu.cu_offset}:{cu["version"]}:{address_size}:{offset_size}:'.encode())
+    digest.update(abbrevs)
+    digest.update(b'\0')
+    byteorder = 'little' if cu.dwarfinfo.config.little_endian else 'big'
+    string_sections = {'DW_FORM_strp': strings, 'DW_FORM_line_strp': line_strings}
+    abbrev_table = cu.get_abbrev_table()
+    specs: dict[int, list[tuple[str, str]]] = {}
+
+    position = hashed = cu.cu_die_offset - cu.cu_offset
+    is_indexed = False
+    while position < len(info):
+        code, position = _read_uleb128(info, position)
+        if code == 0:
+            continue
+
+        if code not in specs:
+            specs[code] = list(abbrev_table.get_abbrev(code).iter_attr_specs())
+        for name, form in specs[code]:
+            while form == 'DW_FORM_indirect':
+                form_code, position = _read_uleb128(info, position)
+                form = FORM_NAMES[form_code]
+
+            if form in FIXED_FORM_SIZES:
+                position += FIXED_FORM_SIZES[form]
+            elif form in LEB128_FORMS:
+                _, position = _read_uleb128(info, position)
+            elif form == 'DW_FORM_addr':
+                position += address_size
+            elif form == 'DW_FORM_ref_addr':
+                position += ref_addr_size
+            elif form == 'DW_FORM_string':
+                position = info.index(b'\0', position) + 1
+            elif form in BLOCK_LENGTH_SIZES:
+                length_size = BLOCK_LENGTH_SIZES[form]
+                position += length_size + int.from_bytes(info[position:position + length_size], byteorder)
+            elif form in LEB128_BLOCK_FORMS:
+                length, position = _read_uleb128(info, position)
+                position += length
+            elif form in OFFSET_FORMS:
+                # Offsets into string sections are replaced by strings, layout offsets are skipped
+                end = position + offset_size
+                section = string_sections.get(form)
+                if section is not None or name in LAYOUT_ATTRIBUTES:
+                    digest.update(info[hashed:position])
+                    if section is not None:
+                        offset = int.from_bytes(info[position:end], byteorder)
+                        digest.update(section[offset:section.index(b'\0', offset) + 1])
+                    hashed = end
+                position = end
+            else:
+                raise ValueError(f'Unknown form {form} in unit at offset {cu.cu_offset}')
+            is_indexed |= form in INDEXED_FORMS
+
+    digest.update(info[hashed:])
+    if is_indexed:
+        digest.update(shared_digest)
+    return digest.hexdigest()
+
+
+def _read_uleb128(data: bytes, position: int) -> tuple[int, int]:
+    """Read unsigned LEB128 number, returns the number and position after it"""
+    value, shift = 0, 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
@@ -1,37 +1,61 @@
-from typing import Optional
+import functools
+from typing import Callable
 
 import elftools.elf.elffile as elffile
-from elftools.elf.sections import SymbolTableSection, Symbol
+from elftools.elf.sections import SymbolTableSection
+from elftools.dwarf.compileunit import CompileUnit
 from elftools.dwarf.die import DIE
+from elftools.dwarf.typeunit import TypeUnit
 
-from elf.constants import DIE_FUNCTION_TAGS, DIE_TYPE_TAGS, DIE_VARIABLE_TAGS, SECTION_MAP_TYPE
-from elf.exceptions import MissingSymbolTableError
+from elf.constants import DIE_FUNCTION_TAGS, DIE_VARIABLE_TAGS, SECTION_MAP_TYPE
+from elf.exceptions import MissingSymbolTableError, UnsupportedElftoolsError
+from elf.symbol_table import SymbolTable
 
 from program.program_abc import ProgramABC
 from program.program_function import ProgramFunction
-from program.program_type import ProgramType
+from program.program_type import ProgramType, TYPE_CLASSES
 from program.program_variable import ProgramVariable
 
+# Program object category and factory of program object for every DIE tag that represents one
+DIE_FACTORIES: dict[str, tuple[type[ProgramABC], Callable[[DIE], ProgramABC]]] = {
+    **{tag: (ProgramType, type_class) for tag, type_class in TYPE_CLASSES.items()},
+    **dict.fromkeys(DIE_VARIABLE_TAGS, (ProgramVariable, ProgramVariable)),
+    **dict.fromkeys(DIE_FUNCTION_TAGS, (ProgramFunction, ProgramFunction)),
+}
 
-def read_ELF_symbol_section(elffile: elffile.ELFFile) -> list[Symbol]:
+
+def read_ELF_symbol_section(elffile: elffile.ELFFile) -> SymbolTable:
     """Read all symbols from symbol table section of elffile"""
 
     symbol_table: SymbolTableSection = elffile.get_section_by_name(SECTION_MAP_TYPE['SHT_SYMTAB'])
     if not symbol_table:
         raise MissingSymbolTableError(f'Elffile is missing symbol table section')
 
-    return list(symbol_table.iter_symbols())
-
-
-def get_die_type(die: DIE) -> Optional[ProgramABC]:
-    """Return Program type which DIE corespondes to"""
-
-    match(die.tag):
-        case x if x in DIE_TYPE_TAGS:
-            return ProgramType
-        case x if x in DIE_FUNCTION_TAGS:
-            return ProgramFunction
-        case x if x in DIE_VARIABLE_TAGS:
-            return ProgramVariable
-        case _:
-            return None
+    string_table = elffile.get_section(symbol_table['sh_link'])
+    return SymbolTable(symbol_table.data(), string_table.data(), elffile.elfclass, elffile.little_endian)
+
+
+def release_unit_caches(unit: CompileUnit | TypeUnit) -> None:
+    """Drop DIEs and abbreviations of unit decoded by elftools, they are decoded again when unit is used.
+    Caches are private to elftools (as of pyelftools 0.33), UnsupportedElftoolsError is raised when they
+    are not found rather than keeping them silently."""
+    dwarfinfo = unit.dwarfinfo
+    if (not isinstance(getattr(unit, '_dielist', None), list) or not isinstance(getattr(unit, '_diemap', None), list)
+            or not isinstance(getattr(type(unit), '_abbrev_table', None), functools.cached_property)
+            or not isinstance(getattr(dwarfinfo, '_abbrevtable_cache', None), dict)):
+        raise UnsupportedElftoolsError('Caches of units are not found in elftools, --max-memory requires '
+                                       'pyelftools 0.33')
+    unit._dielist = []
+    unit._diemap = []
+    unit.__dict__.pop('_abbrev_table', None)
+    dwarfinfo._abbrevtable_cache.pop(unit['debug_abbrev_offset'], None)
+
+
+def add_uleb128_forms(unit: CompileUnit, forms: tuple[str, ...]) -> None:
+    """Add forms unknown to elftools, encoded as unsigned LEB128, to forms decoded by unit. Table of forms
+    is internal to elftools (as of pyelftools 0.33), UnsupportedElftoolsError is raised when it is not found."""
+    structs = unit.structs
+    if not isinstance(getattr(structs, 'Dwarf_dw_form', None), dict) or not hasattr(structs, 'the_Dwarf_uleb128'):
+        raise UnsupportedElftoolsError('Forms of units are not found in elftools, split dwarf requires pyelftools 0.33')
+    for form in forms:
+        structs.Dwarf_dw_form.setdefault(form, structs.the_Dwarf_uleb128)
@@ -6,15 +6,34 @@ import pathlib
 import logging
 import argparse
 import inspect
+import functools
+import contextlib
+from typing import Callable, Optional
 
-import elf.elfdata as elfdata
+import elf.parallel as parallel
+from common.profiler import profiler
+from elf.cache import MemoryCache, ParseCache
+from program.generator.manifest import OutputManifest
+from program.generator.output import (BYTECODE_MODES, compiling_bytecode, has_bytecode, open_archive, write_chunks,
+                                      write_file)
+from program.generator.constants import SHARED_TYPES_MODULE
+from program.generator.schema import write_schema
 
 import program.generator.generator_backend as backend
 
-from common.exceptions import FileWriteError
-
 VERSION = '0.0.1'
 
+LOG_LEVEL_STEP = 10
+LOG_FORMAT = '%(module)s:%(levelname)s: %(message)s'
+
+
+def positive_int(value: str) -> int:
+    """Argument type of integers greater than zero"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'{value} is not a positive integer')
+    return number
+
 
 def create_args_parser() -> argparse.ArgumentParser:
     """Create parser for command line"""
@@ -39,9 +58,22 @@ def create_args_parser() -> argparse.ArgumentParser:
                         type=pathlib.Path,
                         help='Save logs to given file',
                         action='store')
-    parser.add_argument('--print',
-                        help='Print code output instead of saving to file',
-                        action='store_true')
+    output_group = parser.add_mutually_exclusive_group()
+    output_group.add_argument('--print',
+                              help='Print code output instead of saving to file',
+                              action='store_true')
+    output_group.add_argument('--zip',
+                              type=pathlib.Path,
+                              metavar='ARCHIVE',
+                              help='Pack generated files to single zip archive importable with zipimport, '
+                              'instead of saving them to destination catalogue',
+                              action='store')
+    output_group.add_argument('--schema',
+                              type=pathlib.Path,
+                              metavar='SCHEMA',
+                              help='Write compact JSON schema of all files, loaded by load_schema() of backend, '
+                              'instead of generating code',
+                              action='store')
     parser.add_argument('-v',
                         '--verbose',
                         default=0,
@@ -53,19 +85,92 @@ def create_args_parser() -> argparse.ArgumentParser:
     parser.add_argument('--onlybackend',
                         help='Generate only backend template',
                         action='store_true')
+    parser.add_argument('--mmap',
+                        help='Memory map elf file instead of reading it to memory',
+                        action='store_true')
+    parser.add_argument('-j',
+                        '--jobs',
+                        type=positive_int,
+                        help='Number of processes parsing and generating files in parallel',
+                        default=1,
+                        action='store')
+    parser.add_argument('--cache',
+                        type=pathlib.Path,
+                        help='Directory of cache with parsed elf files, elf found in cache is not parsed again',
+                        action='store')
+    memory_group = parser.add_mutually_exclusive_group()
+    memory_group.add_argument('--sharetypes',
+                              help=f'Generate types used by many files once, to {SHARED_TYPES_MODULE} module',
+                              action='store_true')
+    memory_group.add_argument('--max-memory',
+                              dest='max_memory',
+                              help='Bound memory usage for very large elf files, every file is released once it is '
+                              'written. Peak memory of each process is bounded by symbol table, unit headers and '
+                              'the largest compilation unit instead of the whole elf',
+                              action='store_true')
+    parser.add_argument('--lazytypes',
+                        help='Create types of generated modules on first use instead of on import',
+                        action='store_true')
+    parser.add_argument('--pyc',
+                        choices=BYTECODE_MODES,
+                        help='Compile generated files to bytecode in __pycache__ for current python version. '
+                        'Checked bytecode is validated against hash of its source on import, unchecked is not',
+                        action='store')
+    parser.add_argument('--incremental',
+                        help='Regenerate only files which changed since previous generation to the same destination',
+                        action='store_true')
+    parser.add_argument('--file',
+                        dest='files',
+                        metavar='GLOB',
+                        help='Generate only source files matching pattern, may be given many times',
+                        action='append')
+    parser.add_argument('--symbol',
+                        dest='symbols',
+                        metavar='NAME',
+                        help='Generate only variables, functions and types of given name, may be given many times',
+                        action='append')
+    add_profile_args(parser)
     return parser
 
 
+def add_profile_args(parser: argparse.ArgumentParser) -> None:
+    """Add arguments of profiling, see run_profiled()"""
+    parser.add_argument('--profile',
+                        type=pathlib.Path,
+                        metavar='REPORT',
+                        help='Write JSON report with time of every phase, statistics of compilation units and '
+                        'peak memory to given file',
+                        action='store')
+    parser.add_argument('--profile-memory',
+                        dest='profile_memory',
+                        help='Trace allocated memory of profiled run with tracemalloc, which slows the run down',
+                        action='store_true')
+    parser.add_argument('--profile-top',
+                        dest='profile_top',
+                        type=positive_int,
+                        metavar='N',
+                        help='Number of the slowest compilation units listed in profile report',
+                        default=10,
+                        action='store')
+
+
 def parse_args(args: list[str]) -> argparse.Namespace:
     """Parse given arguements"""
-    return create_args_parser().parse_args(args)
+    parser = create_args_parser()
+    parsed_args = parser.parse_args(args)
+    if parsed_args.pyc and (parsed_args.print or parsed_args.zip or parsed_args.schema):
+        parser.error('argument --pyc: only files saved to destination catalogue can be compiled')
+    return parsed_args
+
+
+def get_log_level(verbosity: int) -> int:
+    """Logging level of given verbosity"""
+    return logging.ERROR - verbosity * LOG_LEVEL_STEP
 
 
 def init_logging(filename: pathlib.Path, verbosity: int) -> None:
     """Initialize logging configuration"""
-    LOG_LEVEL_STEP = 10
-    LOG_FORMAT = '%(module)s:%(levelname)s: %(message)s'
-    log_level = logging.ERROR - verbosity * LOG_LEVEL_STEP
+    log_level = get_log_level(verbosity)
 
     logging.basicConfig(format=LOG_FORMAT, filename=filename, level=log_level)
     logging.info(f'Verbosity level: {verbosity}')
@@ -88,53 +193,122 @@ def main() -> int:
         logging.error(f' Error while trying to open logging file {error.filename} - {error.strerror}')
         return error.errno
 
+    return run(args)
+
+
+def run(args: argparse.Namespace, cache: Optional[ParseCache | MemoryCache] = None) -> int:
+    """Generate output for parsed arguments, profiling the run if requested, returns exit code.
+    Given cache is used instead of the one selected by arguments."""
+    return run_profiled(args, functools.partial(generate_output, args, cache))
+
+
+def run_profiled(args: argparse.Namespace, generate: Callable[[], int]) -> int:
+    """Run generation returning exit code, with profiler started if profile report is requested by arguments"""
+    if not args.profile:
+        return generate()
+
+    profiler.start(args.profile_memory)
+    try:
+        status = generate()
+    finally:
+        profiler.stop()
+
+    try:
+        logging.info(f'Writing profile report to {args.profile}')
+        profiler.write_report(args.profile, args.profile_top)
+    except OSError as error:
+        logging.error(f' Error while writing profile report {error.filename} - {error.strerror}')
+        return error.errno
+    return status
+
+
+def generate_output(args: argparse.Namespace, cache: Optional[ParseCache | MemoryCache] = None) -> int:
+    """Generate output for parsed arguments, returns exit code, see run()"""
+
     # If generating only backend, generate/print it and exit
     if args.onlybackend:
         logging.info('Generate only backend code')
         if args.print:
             logging.info('Printing backend code')
             print(inspect.getsource(backend))
+        elif args.zip:
+            with open_archive(args.zip) as add_module:
+                add_module('backend.py', [inspect.getsource(backend)])
         else:
-            backend_code = inspect.getsource(backend)
-            with open(args.dst / 'backend.py', 'w') as file:
-                written = file.write(backend_code)
-                if written < len(backend_code):
-                    raise FileWriteError('Could not write backend code completly')
+            write_file(args.dst / 'backend.py', [inspect.getsource(backend)])
         return os.EX_OK
 
     # Load and parse elf file, generate output
     error_prefix = 'Error while parsing elf file'
     try:
-        logging.info('Generating elffile')
-        efile = elfdata.ELFData(args.elffile)
-
         logging.info('Parsing elffile')
-        program_files = efile.parse_elffile()
+        if cache is None and args.cache:
+            cache = ParseCache(args.cache)
+        to_directory = not (args.print or args.zip or args.schema)
+        manifest = OutputManifest(args.dst) if args.incremental and to_directory else None
+        generated_files = parallel.iter_generated(args.elffile, args.mmap, args.jobs, cache, manifest,
+                                                  args.sharetypes, args.files, args.symbols, args.max_memory,
+                                                  args.lazytypes)
 
-        # Print only
-        if args.print:
+        # Write schema instead of code, schema of every file is written while it is parsed
+        if args.schema:
+            logging.info(f'Writing schema to {args.schema}')
+            write_schema(args.schema, parallel.iter_program_files(args.elffile, args.mmap, args.jobs, cache,
+                                                                  args.files, args.symbols, args.max_memory))
+            if args.withbackend:
+                logging.info('Adding backend code')
+                os.makedirs(args.dst, exist_ok=True)
+                write_file(args.dst / 'backend.py', [inspect.getsource(backend)])
+
+        # Print only, code of every file is printed while it is generated
+        elif args.print:
             logging.info('Printing code')
-            print(*(file.generate_code() for file in program_files))
+            for _, _, chunks in generated_files:
+                write_chunks(sys.stdout, chunks)
+                sys.stdout.write('\n')
             if args.withbackend:
                 logging.info('Printing backend code')
                 print(inspect.getsource(backend))
 
-        # Generate files
+        # Pack files to archive, code of every file is compressed while it is generated
+        elif args.zip:
+            logging.info(f'Generating code to archive {args.zip}')
+            with open_archive(args.zip) as add_module:
+                for _, filename, chunks in generated_files:
+                    logging.info(f'Adding {filename}')
+                    add_module(filename, chunks)
+
+                if args.withbackend:
+                    logging.info('Adding backend code')
+                    add_module('backend.py', [inspect.getsource(backend)])
+
+        # Generate files, code of every file is written while it is generated
         else:
             logging.info(f'Generating code to {args.dst}')
             if not os.path.exists(args.dst):
                 os.makedirs(args.dst)
 
-            for file in program_files:
-                file.generate_file(args.dst)
+            with contextlib.ExitStack() as stack:
+                compile_file = stack.enter_context(compiling_bytecode(args.pyc, args.jobs)) if args.pyc else None
 
-            if args.withbackend:
-                logging.info('Adding backend code')
-                backend_code = inspect.getsource(backend)
-                with open(args.dst / 'backend.py', 'w') as file:
-                    written = file.write(backend_code)
-                    if written < len(backend_code):
-                        raise FileWriteError('Could not write backend code completly')
+                for source, filename, chunks in generated_files:
+                    logging.info(f'Writing {filename}')
+                    is_changed = functools.partial(manifest.update, source, filename) if manifest is not None else None
+                    written = write_file(args.dst / filename, chunks, is_changed)
+                    if not written:
+                        logging.info(f'{filename} is up to date')
+                    if compile_file is not None and (written or not has_bytecode(args.dst / filename)):
+                        compile_file(args.dst / filename)
+
+                if manifest is not None:
+                    manifest.remove_stale()
+                    manifest.save()
+
+                if args.withbackend:
+                    logging.info('Adding backend code')
+                    write_file(args.dst / 'backend.py', [inspect.getsource(backend)])
+                    if compile_file is not None:
+                        compile_file(args.dst / 'backend.py')
 
     except OSError as error:
         logging.error(f' {error_prefix}: {error.filename} - {error.strerror}')
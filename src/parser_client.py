@@ -0,0 +1,103 @@
+#!/usr/bin/python
+"""Client of parser daemon, sends single request and reports its response.
+
+    parser_client.py SOCKET generate ELFFILE [parser.py arguments]
+    parser_client.py SOCKET query ELFFILE (--variable | --function | --type) NAME
+    parser_client.py SOCKET query ELFFILE --address ADDRESS [--end ADDRESS]
+    parser_client.py SOCKET shutdown
+"""
+import os
+import sys
+import json
+import socket
+import argparse
+
+
+def request(socket_path: str, message: dict) -> dict:
+    """Send request to daemon listening on given socket, returns its response.
+    ValueError is raised for empty or malformed response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(message).encode() + b'\n')
+        with connection.makefile('rb') as response:
+            line = response.readline()
+    if not line.strip():
+        raise ValueError('empty response')
+    response = json.loads(line)
+    if not isinstance(response, dict) or 'status' not in response:
+        raise ValueError(f'unexpected response {line[:80]!r}')
+    return response
+
+
+def address(value: str) -> int:
+    """Argument type of addresses, in decimal or with 0x prefix"""
+    return int(value, 0)
+
+
+def parse_args(args: list[str]) -> argparse.Namespace:
+    """Parse command line arguments of client"""
+    parser = argparse.ArgumentParser(description='Client of parser daemon')
+    parser.add_argument('socket', help='Path of unix domain socket of daemon')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help='Generate code, arguments are the same as of parser.py')
+    generate.add_argument('args', nargs=argparse.REMAINDER, help='Arguments of parser.py')
+
+    query = commands.add_parser('query', help='Find variables, functions or types of elf file')
+    query.add_argument('elffile', help='Elffile with dwarf debug information')
+    kind = query.add_mutually_exclusive_group(required=True)
+    kind.add_argument('--variable', metavar='NAME', help='Find variables of given name')
+    kind.add_argument('--function', metavar='NAME', help='Find functions of given name')
+    kind.add_argument('--type', metavar='NAME', help='Find types of given name')
+    kind.add_argument('--address', type=address, help='Find variables occupying given address')
+    query.add_argument('--end', type=address, help='Find variables occupying addresses from --address up to this one')
+    query.add_argument('-v', '--verbose', default=0, help='Increase verbosity level of logs', action='count')
+
+    commands.add_parser('shutdown', help='Stop daemon')
+
+    # Options of parser.py preceding elffile are not known to client, they are passed on in the same order
+    parsed_args, unknown = parser.parse_known_args(args)
+    if unknown and parsed_args.command != 'generate':
+        parser.error(f'unrecognized arguments: {" ".join(unknown)}')
+    if parsed_args.command == 'generate':
+        parsed_args.args = unknown + parsed_args.args
+    return parsed_args
+
+
+def main() -> int:
+    """Send request given by command line arguments to daemon"""
+    args = parse_args(sys.argv[1:])
+    match args.command:
+        case 'generate':
+            message = dict(command='generate', cwd=os.getcwd(), args=args.args)
+        case 'query':
+            message = dict(command='query', cwd=os.getcwd(), elffile=args.elffile, verbose=args.verbose)
+            for kind in ('variable', 'function', 'type'):
+                if getattr(args, kind) is not None:
+                    message.update(kind=kind, name=getattr(args, kind))
+            if args.address is not None:
+                message.update(kind='address', address=args.address)
+                if args.end is not None:
+                    message['end'] = args.end
+        case _:
+            message = dict(command=args.command)
+
+    try:
+        response = request(args.socket, message)
+    except OSError as error:
+        print(f'Could not connect to daemon at {args.socket} - {error.strerror}', file=sys.stderr)
+        return os.EX_UNAVAILABLE
+    except ValueError as error:
+        print(f'Malformed response of daemon at {args.socket} - {error}', file=sys.stderr)
+        return os.EX_PROTOCOL
+
+    sys.stdout.write(response.get('stdout', ''))
+    if 'results' in response:
+        print(json.dumps(response['results'], indent=2))
+    sys.stderr.write(response.get('log', ''))
+    status = response['status']
+    return status if isinstance(status, int) else os.EX_SOFTWARE
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -29,3 +29,8 @@ class FuncitonAddressMissingError(ParserException):
 class NonResolvedReferenceError(ParserException):
     """Error raised when object tries to generate code while not all references are resolved"""
     pass
+
+
+class CyclicTypeDependencyError(ParserException):
+    """Error raised when types depend on each other and none of them can be declared before its definition"""
+    pass
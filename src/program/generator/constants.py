@@ -41,6 +41,12 @@ size_map: dict[int: Type] = {
 
 GENERATED_FILE_IMPORTS = f"""
 from ctypes import {', '.join(types_map.values())}, Union, Structure
-from backend import Enum, PointerClass, Variable, Function, FunctionType, Void
+from backend import Enum, PointerClass, Variable, Function, FunctionType, Void, LazyAttribute
 
 """
+
+# Imports of generated file with types created on first use, see iter_lazy_types_code()
+LAZY_TYPES_FILE_IMPORTS = GENERATED_FILE_IMPORTS.rstrip('\n') + ', LazyTypes\n\n'
+
+# Name of generated module with types shared between files
+SHARED_TYPES_MODULE = 'shared_types'
@@ -1,9 +1,15 @@
+import json
+import ctypes
 from abc import ABC, abstractmethod
 from ctypes import sizeof, Structure, Union, c_uint32, c_uint64
-from typing import Any, Type
+from types import ModuleType
+from typing import Any, Callable, Iterable, Optional, Type
 
 MACHINE_ADDR_SIZE = 8
 
+# Version of schema written by parser, see load_schema()
+SCHEMA_VERSION = 1
+
 ADDR_SIZE_MAP: dict[int, type] = {
     4: c_uint32,
     8: c_uint64
@@ -92,6 +98,97 @@ class Function(GeneratorBackend):
         return self.return_type.from_buffer_copy(value)
 
 
+class LazyAttribute():
+    """Attribute of Code class, which creates its value on first access of each Code instance.
+    Value is stored in instance dictionary, so later accesses do not reach descriptor at all."""
+
+    def __init__(self, factory: Callable[[], Any]) -> None:
+        self.factory = factory
+        self.name = None
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: Any, owner: type = None) -> Any:
+        if instance is None:
+            return self
+
+        value = self.factory()
+        instance.__dict__[self.name] = value
+        return value
+
+
+class LazyTypes():
+    """Types of generated module created on first access of module attribute (PEP 562).
+
+    Every type is described by names of types it depends on, its code and, for
+    collections, code assigning their fields. Collection is declared before its
+    dependencies are created, so types of a cycle can use it. Its fields are
+    assigned once dependencies exist, after the first requested type is created
+    if some of them are still being created. Created types are stored in module namespace.
+    """
+
+    def __init__(self, namespace: dict[str, Any], types: dict[str, tuple[tuple[str, ...], str, Optional[str]]]) -> None:
+        self.namespace = namespace
+        self.types = types
+        self._creating: set[str] = set()
+        self._deferred_fields: list[str] = []
+
+    def get(self, name: str) -> Any:
+        """Create type of given name along with its dependencies"""
+        try:
+            descriptor = self.types.pop(name)
+        except KeyError:
+            raise AttributeError(f'module {self.namespace["__name__"]!r} has no attribute {name!r}') from None
+
+        dependencies, code, fields = descriptor
+        is_first = not self._creating
+        self._creating.add(name)
+        try:
+            if fields is None:
+                self.require(dependencies)
+                exec(code, self.namespace)
+            else:
+                exec(code, self.namespace)
+                self.require(dependencies)
+                if all(dep in self.namespace for dep in dependencies):
+                    exec(fields, self.namespace)
+                else:
+                    self._deferred_fields.append(fields)
+
+            if is_first:
+                while self._deferred_fields:
+                    exec(self._deferred_fields.pop(), self.namespace)
+        except BaseException:
+            self.namespace.pop(name, None)
+            self.types[name] = descriptor
+            if is_first:
+                self._deferred_fields.clear()
+            raise
+        finally:
+            self._creating.discard(name)
+
+        return self.namespace[name]
+
+    def require(self, names: Iterable[str]) -> None:
+        """Create types of given names, which are not created yet"""
+        for name in names:
+            if name not in self.namespace and name not in self._creating:
+                self.get(name)
+
+    def dir(self) -> list[str]:
+        """Names of module including types not created yet"""
+        return sorted(set(self.namespace) | set(self.types))
+
+    def attribute(self, names: tuple[str, ...], factory: Callable[[], Any]) -> LazyAttribute:
+        """Lazy attribute of Code class, which creates types of given names before calling factory"""
+        def create() -> Any:
+            self.require(names)
+            return factory()
+
+        return LazyAttribute(create)
+
+
 class FunctionType():
     """Function type for"""
 
@@ -122,3 +219,100 @@ class Void():
 
     def __sizeof__(self) -> int:
         return 0
+
+
+class SchemaModule(ModuleType):
+    """Module of generated file built from its schema, types are built on first access.
+
+    Module has the same attributes as generated module - types by their names
+    and Code class with handles of variables and functions.
+    """
+
+    COLLECTION_BASES = {'structure': Structure, 'union': Union}
+
+    def __init__(self, schema: dict[str, Any]) -> None:
+        super().__init__(schema['module'])
+        self._types: list[list] = schema['types']
+        self._names: dict[str, int] = schema['names']
+        self._built: dict[int, Any] = {}
+        self._building: set[int] = set()
+
+        attributes = {name: LazyAttribute(lambda entry=entry: self._build_variable(entry))
+                      for name, entry in schema['variables'].items()}
+        attributes.update({name: LazyAttribute(lambda entry=entry: self._build_function(entry))
+                           for name, entry in schema['functions'].items()})
+        self.Code = type('Code', (object,), dict(attributes, __module__=self.__name__))
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            index = self._names[name]
+        except KeyError:
+            raise AttributeError(f'module {self.__name__!r} has no attribute {name!r}') from None
+
+        value = self._build_type(index)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self) -> list[str]:
+        return sorted(set(super().__dir__()) | set(self._names))
+
+    def _build_variable(self, entry: list) -> Variable:
+        """Build variable handle of schema entry"""
+        address, type = entry
+        return Variable(address, self._build_type(type))
+
+    def _build_function(self, entry: list) -> Function:
+        """Build function handle of schema entry"""
+        address, args, return_type = entry
+        return Function(address, [self._build_type(arg) for arg in args], self._build_type(return_type))
+
+    def _build_type(self, index: Optional[int]) -> Any:
+        """Build type of given index, None stands for void"""
+        if index is None:
+            return Void
+        if index in self._built:
+            return self._built[index]
+        if index in self._building:
+            raise TypeError(f'Type {index} of module {self.__name__} depends on itself')
+
+        entry = self._types[index]
+        self._building.add(index)
+        try:
+            match entry[0]:
+                case 'base':
+                    built = getattr(ctypes, entry[1])
+                case 'pointer':
+                    built = PointerClass(entry[1])
+                case 'modifier' | 'typedef':
+                    built = self._build_type(entry[1])
+                case 'array':
+                    built = self._build_type(entry[1]) * entry[2]
+                case 'enum':
+                    base = getattr(ctypes, entry[2])
+                    built = type(entry[1], (base, Enum), dict(entry[3], _type=base, __module__=self.__name__))
+                case 'function':
+                    built = type(entry[1], (FunctionType,), dict(_return_type=self._build_type(entry[2]),
+                                                                 _args=[self._build_type(arg) for arg in entry[3]],
+                                                                 __module__=self.__name__))
+                case 'structure' | 'union':
+                    # Collection is stored before its members are built, so they can refer to it
+                    built = type(entry[1], (self.COLLECTION_BASES[entry[0]],), dict(__module__=self.__name__))
+                    self._built[index] = built
+                    built._fields_ = [(member[0], self._build_type(member[1])) for member in entry[2]]
+                case kind:
+                    raise TypeError(f'Unknown kind {kind} of type {index} in module {self.__name__}')
+        finally:
+            self._building.discard(index)
+
+        self._built[index] = built
+        return built
+
+
+def load_schema(path: str) -> dict[str, SchemaModule]:
+    """Load schema written by parser, returns modules of generated files by their names"""
+    with open(path, 'rb') as file:
+        schema = json.load(file)
+
+    if schema.get('version') != SCHEMA_VERSION:
+        raise ValueError(f'Schema {path} has version {schema.get("version")}, expected {SCHEMA_VERSION}')
+    return {file['module']: SchemaModule(file) for file in schema['files']}
@@ -0,0 +1,85 @@
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Optional
+
+# Name of manifest file stored in output directory
+MANIFEST_NAME = '.parser_manifest.json'
+
+# Version of manifest, has to be increased with every change of generated code,
+# so files generated by previous version are regenerated
+MANIFEST_VERSION = 4
+
+
+class OutputManifest(object):
+    """Record of files generated to output directory.
+
+    For every source file manifest keeps name of generated file, fingerprint of
+    source file debug information and digest of generated code. It is used to
+    skip parsing of unchanged files and writing of unchanged code.
+
+    Keyword Arguments:
+        - directory -- output directory of generated files
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+        self._previous: dict[str, dict[str, Optional[str]]] = self._load()
+        self._current: dict[str, dict[str, Optional[str]]] = {}
+        self._fingerprints: dict[str, str] = {}
+
+    def is_current(self, source: str, fingerprint: str) -> bool:
+        """Check if file generated from given source is up to date, up to date files are kept in manifest.
+        Fingerprint is remembered and stored with code generated later for the source."""
+        self._fingerprints[source] = fingerprint
+        entry = self._previous.get(source)
+        if entry is None or entry['fingerprint'] != fingerprint or not (self.directory / entry['filename']).exists():
+            return False
+
+        self._current[source] = entry
+        return True
+
+    def update(self, source: str, filename: str, digest: str) -> bool:
+        """Record digest of code generated for source file, see output.get_code_digest().
+        Returns True if code differs from code stored on disk"""
+        self._current[source] = dict(filename=filename, fingerprint=self._fingerprints.get(source), digest=digest)
+
+        entry = self._previous.get(source)
+        return (entry is None or entry['filename'] != filename or entry['digest'] != digest or
+                not (self.directory / filename).exists())
+
+    def remove_stale(self) -> list[str]:
+        """Remove generated files of sources that were not recorded in this run, returns names of removed files"""
+        current_filenames = set(entry['filename'] for entry in self._current.values())
+        removed = []
+        for entry in self._previous.values():
+            if entry['filename'] not in current_filenames:
+                logging.info(f'Removing stale file {entry["filename"]}')
+                try:
+                    os.remove(self.directory / entry['filename'])
+                except FileNotFoundError:
+                    pass
+                removed.append(entry['filename'])
+        return removed
+
+    def save(self) -> None:
+        """Store manifest of this run in output directory"""
+        with open(self.directory / MANIFEST_NAME, 'w') as file:
+            json.dump(dict(version=MANIFEST_VERSION, files=self._current), file, indent=1, sort_keys=True)
+
+    def _load(self) -> dict[str, dict[str, Optional[str]]]:
+        """Load manifest of previous run, manifest of other version is ignored"""
+        try:
+            with open(self.directory / MANIFEST_NAME) as file:
+                manifest = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except ValueError as error:
+            logging.warning(f'Manifest in {self.directory} is damaged: {error}')
+            return {}
+
+        if manifest.get('version') != MANIFEST_VERSION:
+            logging.info(f'Manifest in {self.directory} has version {manifest.get("version")}, ignoring it')
+            return {}
+        return manifest['files']
@@ -0,0 +1,122 @@
+import io
+import os
+import hashlib
+import zipfile
+import py_compile
+import importlib.util
+import multiprocessing
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, TextIO
+
+from common.profiler import profiled
+
+from elf.constants import ENCODING
+
+# Fixed metadata of archive entries, so archive depends only on generated code
+ARCHIVE_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+ARCHIVE_FILE_MODE = 0o644
+ARCHIVE_CREATE_SYSTEM_UNIX = 3
+
+# Kinds of hash based bytecode, timestamp based one is left to the interpreter
+BYTECODE_MODES: dict[str, py_compile.PycInvalidationMode] = {
+    'checked': py_compile.PycInvalidationMode.CHECKED_HASH,
+    'unchecked': py_compile.PycInvalidationMode.UNCHECKED_HASH,
+}
+
+
+def get_code_digest(code: str) -> str:
+    """Digest of generated code, the same as returned by write_chunks()"""
+    return hashlib.sha256(code.encode(ENCODING)).hexdigest()
+
+
+@profiled('write_output')
+def write_chunks(stream: TextIO, chunks: Iterable[str]) -> str:
+    """Write chunks of generated code to text stream as they are generated, returns digest of written code"""
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        stream.write(chunk)
+        digest.update(chunk.encode(ENCODING))
+    return digest.hexdigest()
+
+
+def write_file(path: Path, chunks: Iterable[str], is_changed: Optional[Callable[[str], bool]] = None) -> bool:
+    """Write chunks of generated code to temporary file, which replaces file of given path once all are written.
+    If is_changed is given, it is called with digest of the code and file is replaced only if it returns True.
+    Returns True if file was replaced."""
+    temporary_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    try:
+        with open(temporary_path, 'w') as file:
+            digest = write_chunks(file, chunks)
+
+        if is_changed is not None and not is_changed(digest):
+            os.remove(temporary_path)
+            return False
+    except BaseException:
+        if temporary_path.exists():
+            os.remove(temporary_path)
+        raise
+
+    os.replace(temporary_path, path)
+    return True
+
+
+@contextmanager
+def open_archive(path: Path) -> Iterator[Callable[[str, Iterable[str]], str]]:
+    """Context manager writing zip archive of generated modules, importable with zipimport.
+
+    Modules are added with returned function taking file name and chunks of code,
+    which are compressed as they are generated. Entries are stored in order of
+    adding with fixed metadata, so the same modules give identical archive.
+    Archive replaces file of given path when context exits without error.
+    """
+    temporary_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+
+    def add_module(filename: str, chunks: Iterable[str]) -> str:
+        """Write chunks of module code to archive entry, returns digest of the code"""
+        info = zipfile.ZipInfo(filename, date_time=ARCHIVE_DATE_TIME)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.create_system = ARCHIVE_CREATE_SYSTEM_UNIX
+        info.external_attr = ARCHIVE_FILE_MODE << 16
+        # Zip64 entries can't be imported by zipimport before python 3.13, so it is not forced
+        with io.TextIOWrapper(archive.open(info, 'w'), encoding=ENCODING, newline='') as entry:
+            return write_chunks(entry, chunks)
+
+    try:
+        with zipfile.ZipFile(temporary_path, 'w') as archive:
+            yield add_module
+    except BaseException:
+        if temporary_path.exists():
+            os.remove(temporary_path)
+        raise
+
+    os.replace(temporary_path, path)
+
+
+def has_bytecode(path: Path) -> bool:
+    """Check if module of given path has bytecode in its __pycache__ catalogue"""
+    return os.path.exists(importlib.util.cache_from_source(str(path)))
+
+
+def compile_bytecode(path: Path, mode: str) -> Path:
+    """Compile module of given path to bytecode in its __pycache__ catalogue, returns path of bytecode.
+    Mode is one of BYTECODE_MODES, checked bytecode is used only while its source is unchanged."""
+    bytecode_path = Path(importlib.util.cache_from_source(str(path)))
+    py_compile.compile(str(path), cfile=str(bytecode_path), doraise=True, invalidation_mode=BYTECODE_MODES[mode])
+    return bytecode_path
+
+
+@contextmanager
+def compiling_bytecode(mode: str, jobs: int = 1) -> Iterator[Callable[[Path], None]]:
+    """Context manager compiling modules to bytecode, modules are added with returned function.
+    With more than one job modules are compiled in worker processes while next ones are generated,
+    all of them are compiled when context exits."""
+    if jobs == 1:
+        yield lambda path: compile_bytecode(path, mode)
+        return
+
+    with multiprocessing.Pool(jobs) as pool:
+        results = []
+        yield lambda path: results.append(pool.apply_async(compile_bytecode, (path, mode)))
+        for result in results:
+            result.get()
@@ -0,0 +1,23 @@
+import json
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from program.program_file import ProgramFile
+from program.generator.generator_backend import SCHEMA_VERSION
+from program.generator.output import write_file
+
+
+def iter_schema(program_files: Iterable[ProgramFile]) -> Iterator[str]:
+    """Yield chunks of compact JSON schema of given files, schema of every file is generated when it is consumed"""
+    yield f'{{"version":{SCHEMA_VERSION},"files":['
+    separator = ''
+    for program_file in program_files:
+        yield separator + json.dumps(program_file.generate_schema(), separators=(',', ':'))
+        separator = ','
+    yield ']}\n'
+
+
+def write_schema(path: Path, program_files: Iterable[ProgramFile]) -> None:
+    """Write schema of given files to file of given path, which replaces it once all files are written.
+    Schema is loaded by load_schema() of backend."""
+    write_file(path, iter_schema(program_files))
@@ -0,0 +1,48 @@
+from typing import Callable, Iterable, Iterator
+
+from program.program_type import ProgramType, ProgramTypeCollection
+from program.type_order import get_dependencies
+
+# Name of LazyTypes instance in generated module, dunder names of program are normalized so it can't collide
+LAZY_TYPES_NAME = '__lazy_types__'
+
+
+def get_required_names(types: Iterable[ProgramType],
+                       dependencies: Callable[[ProgramType], Iterable[ProgramType]] = get_dependencies) -> list[str]:
+    """Names defined in generated module, which are needed to evaluate aliases of given types.
+    Types not defining their name (eg. const modifiers) are replaced with their own dependencies."""
+    names = {}
+    pending = list(types)
+    while pending:
+        type = pending.pop()
+        if type is None:
+            continue
+        if type.defines_name:
+            names.setdefault(type.alias)
+        else:
+            pending.extend(dependencies(type))
+    return sorted(names)
+
+
+def iter_lazy_types_code(types: list[ProgramType],
+                         dependencies: Callable[[ProgramType], Iterable[ProgramType]] = get_dependencies
+                         ) -> Iterator[str]:
+    """Yield descriptors of given types, from which LazyTypes of backend creates them on first use.
+
+    Descriptor holds names the type depends on and its code. Collections are
+    described by declaration and assignment of fields, so they can be created
+    before their dependencies and depend on each other."""
+    yield f'{LAZY_TYPES_NAME} = LazyTypes(globals(), {{\n'
+    for type in types:
+        if not type.defines_name:
+            continue
+
+        names = get_required_names(dependencies(type), dependencies)
+        if isinstance(type, ProgramTypeCollection):
+            code, fields = type.generate_declaration(), type.generate_fields()
+        else:
+            code, fields = type.generate_code(), None
+        yield f'\t{type.alias!r}: ({tuple(names)!r}, {code!r}, {fields!r}),\n'
+    yield '})\n'
+    yield f'__getattr__ = {LAZY_TYPES_NAME}.get\n'
+    yield f'__dir__ = {LAZY_TYPES_NAME}.dir\n\n'
@@ -1,25 +1,41 @@
+import sys
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Callable, Optional
 
 from elftools.dwarf.die import DIE
 
-from elf.constants import ENCODING, REFERENCE_FORM_WITH_OFFSET
+from elf.constants import ENCODING
+
+from program.utils import get_die_offset, get_die_reference
 
 
 class ProgramABC(ABC):
-    """Abstract class for all Program objects classes"""
-    die: DIE
+    """Abstract class for all Program objects classes.
+    Objects keep attributes in slots, DIE is held only until release_die() is called after parsing.
+    Unnamed objects are named by prefix and count, which are set for every parsed unit."""
+    __slots__ = ('die', 'offset')
+    die: Optional[DIE]
     offset: int
+    UNNAMED_PREFIX = 'Unnamed_type_'
+    Unnamed_prefix: str = UNNAMED_PREFIX
     Unnamed_count: int = 0
     NORMALIZE_STRING = bytes('_normalize_', ENCODING)
 
     def __init__(self, die: DIE) -> None:
         self.die = die
-        self.offset = die.offset
+        self.offset = get_die_offset(die)
 
     def __str__(self) -> str:
         return f'Offset: {self.offset}\n\t'
 
+    def release_die(self) -> None:
+        """Drop reference to DIE, so DIE and its compilation unit can be freed once parsing is done"""
+        self.die = None
+
+    def get_die_name(self) -> str:
+        """Name of object's DIE as interned string, see get_die_attribute()"""
+        return sys.intern(str(self.get_die_attribute('DW_AT_name'), ENCODING))
+
     def get_die_attribute(self, attr: str) -> Any:
         """Wrapper for die attributes.
         Check object's DIE for given attribute, return None if missing."""
@@ -28,7 +44,7 @@ class ProgramABC(ABC):
             value = self.die.attributes[attr].value
         except KeyError:
             if attr == 'DW_AT_name':
-                value = bytes(f'Unnamed_type_{ProgramABC.Unnamed_count}', ENCODING)
+                value = bytes(f'{ProgramABC.Unnamed_prefix}{ProgramABC.Unnamed_count}', ENCODING)
                 ProgramABC.Unnamed_count += 1
             else:
                 return None
@@ -36,8 +52,8 @@ class ProgramABC(ABC):
         if attr == 'DW_AT_name' and (value.startswith(b'__') or value.startswith(ProgramABC.NORMALIZE_STRING)):
             value = ProgramABC.NORMALIZE_STRING + value
 
-        if attr == 'DW_AT_type' and self.die.attributes[attr].form in REFERENCE_FORM_WITH_OFFSET:
-            value += self.die.cu.cu_offset
+        if attr == 'DW_AT_type':
+            value = get_die_reference(self.die, attr)
 
         return value
 
@@ -48,5 +64,8 @@ class ProgramABC(ABC):
     @abstractmethod
     def generate_code(self) -> str: ...
 
+    @abstractmethod
+    def generate_schema(self, get_index: Callable[['ProgramABC'], Optional[int]]) -> list: ...
+
     @abstractmethod
     def resolve_refs(self, object_refs: dict[int, 'ProgramABC']) -> None: ...
@@ -1,18 +1,33 @@
+from collections import ChainMap
 from itertools import chain
 from pathlib import Path
-from common.exceptions import FileWriteError
-from program.generator.constants import GENERATED_FILE_IMPORTS
+from typing import Iterable, Iterator, Mapping, Optional
+
+from common.profiler import profiled
+
+from program.generator.constants import GENERATED_FILE_IMPORTS, LAZY_TYPES_FILE_IMPORTS, SHARED_TYPES_MODULE
+from program.generator.output import write_file
 
 from program.program_abc import ProgramABC
 from program.program_function import ProgramFunction
 from program.program_type import ProgramType, ProgramTypeBase, ProgramTypeEnum, ProgramTypeFunction, ProgramTypePointer, ProgramTypeStructure, ProgramTypeTypedef, ProgramTypeUnion
 from program.program_variable import ProgramVariable
+from program.lazy_types import LAZY_TYPES_NAME, get_required_names, iter_lazy_types_code
+from program.type_order import iter_types_code
 
 
 class ProgramFile(object):
-    """Class instance represents single file which took part in builing of executable."""
+    """Class instance represents single file which took part in builing of executable.
 
-    def __init__(self, name: str, types: list[ProgramType], variables: list[ProgramVariable], functions: list[ProgramFunction]) -> None:
+    Keyword Arguments:
+        - name -- name of the file
+        - types, variables, functions -- objects of the file, their references are resolved
+        - shared_refs -- resolved types shared with other files (eg. types of type units) by their
+         references, shared types used by objects of the file are added to its types
+    """
+
+    def __init__(self, name: str, types: list[ProgramType], variables: list[ProgramVariable],
+                 functions: list[ProgramFunction], shared_refs: Optional[Mapping[int, ProgramType]] = None) -> None:
         self.name = name
         self.filename = f'{self.name.replace(".", "_")}.py'
         self.types = types
@@ -20,68 +35,146 @@ class ProgramFile(object):
         self.functions = functions
         self.objects_ref: dict[int, ProgramABC] = dict([(obj.offset, obj)
                                                        for obj in chain(types, variables, functions)])
-        self._resolve_refs()
+        self._resolve_refs(shared_refs)
 
     def __str__(self) -> str:
         return f'ProgramFile {self.name}'
 
+    @property
+    def is_empty(self) -> bool:
+        """File has no types, variables nor functions"""
+        return not (self.types or self.variables or self.functions)
+
+    def select(self, names: list[str]) -> None:
+        """Restrict file to variables, functions and types of given names, along with types they depend on"""
+        names = set(names)
+        self.variables = [var for var in self.variables if var.name in names]
+        self.functions = [func for func in self.functions if func.name in names]
+
+        # Collect types required by selected objects
+        required = set()
+        pending = [type for type in self.types if type.defines_name and type.alias in names]
+        pending += [dep for var in self.variables for dep in var.dependency]
+        pending += [dep for func in self.functions for dep in func.dependencies]
+        while pending:
+            type = pending.pop()
+            if type is not None and type not in required:
+                required.add(type)
+                pending.extend(type.dependencies)
+
+        self.types = [type for type in self.types if type in required]
+
     def generate_file(self, path: Path) -> None:
         """Generates code for use with testing framework under given path"""
-        code = self.generate_code()
-        with open(path / self.filename, 'w') as file:
-            written = file.write(code)
-            if written < len(code):
-                raise FileWriteError(f'{self.filename}: write did not store all specified data')
-
-    def generate_code(self) -> str:
-        """Returns code inserted to generated file"""
-        code = GENERATED_FILE_IMPORTS
-        code += self._get_code_types()
-        code += 'class Code(object):\n'
-        code += '\tdef __init__(self):\n'
-        code += '\t\t' + '\t\t'.join(self._get_code_variables().splitlines(keepends=True))
-        code += '\n'
-        code += '\t\t' + '\t\t'.join(self._get_code_functions().splitlines(keepends=True))
-
-        return code
-
-    def _get_code_types(self) -> str:
+        write_file(path / self.filename, self.iter_code())
+
+    def generate_code(self, shared_types: frozenset[ProgramType] = frozenset(), lazy_types: bool = False) -> str:
+        """Returns code inserted to generated file, shared types are imported from shared types module.
+        With lazy types, types are created on first use, see iter_lazy_types_code()."""
+        return ''.join(self.iter_code(shared_types, lazy_types))
+
+    @profiled('generate_code')
+    def iter_code(self, shared_types: frozenset[ProgramType] = frozenset(), lazy_types: bool = False) -> Iterator[str]:
+        """Yield chunks of code inserted to generated file as they are generated, see generate_code()"""
+        yield LAZY_TYPES_FILE_IMPORTS if lazy_types else GENERATED_FILE_IMPORTS
+        yield self._get_code_shared_imports(shared_types)
+        if lazy_types:
+            yield from iter_lazy_types_code(self._get_file_types(shared_types))
+        else:
+            yield from self._iter_code_types(shared_types)
+        yield 'class Code(object):\n'
+        if not (self.variables or self.functions):
+            yield '\tpass\n'
+        yield from self._iter_code_attributes(self.variables, lazy_types)
+        yield '\n'
+        yield from self._iter_code_attributes(self.functions, lazy_types)
+
+    @profiled('generate_schema')
+    def generate_schema(self) -> dict:
+        """Returns schema of file, from which backend builds the same types and handles as generated code.
+        Types are listed by index, names map aliases defined in generated code to their types."""
+        indexes = {type: index for index, type in enumerate(self.types)}
+        return {
+            'name': self.name,
+            'module': self.filename.removesuffix('.py'),
+            'types': [type.generate_schema(indexes.get) for type in self.types],
+            'names': {type.alias: indexes[type] for type in self.types if type.defines_name},
+            'variables': {var.name: var.generate_schema(indexes.get) for var in self.variables},
+            'functions': {func.name: func.generate_schema(indexes.get) for func in self.functions},
+        }
+
+    def _get_code_shared_imports(self, shared_types: frozenset[ProgramType]) -> str:
+        """Generate import of shared types defined in shared types module"""
+        names = dict.fromkeys(type.alias for type in self.types if type in shared_types and type.defines_name)
+        if not names:
+            return ''
+        return f'from {SHARED_TYPES_MODULE} import {", ".join(names)}\n\n'
+
+    def _get_file_types(self, shared_types: frozenset[ProgramType]) -> list[ProgramType]:
+        """Types defined in generated file, base types are imported from ctypes"""
+        return [type for type in self.types if type.get_class() is not ProgramTypeBase and type not in shared_types]
+
+    def _iter_code_types(self, shared_types: frozenset[ProgramType]) -> Iterator[str]:
         """Generate code for program types with proper declaration order"""
-        code = ''
-        done = set(type for type in self.types if type.get_class() is ProgramTypeBase)
+        types = self._get_file_types(shared_types)
 
         # Generate enums first, as they don't have dependencies
-        for type in self.types:
+        for type in types:
             if type.get_class() is ProgramTypeEnum:
-                code += type.generate_code() + '\n'
-                done.add(type)
-        code += '\n'
-
-        # Generate the rest of types in given file
-        while len(self.types) != len(done):
-            for type in self.types:
-                if type not in done and all(map(lambda x: x in done, type.dependencies)):
-                    generated = type.generate_code()
-                    if len(generated) > 0:
-                        code += generated + '\n'
-                    done.add(type)
-
-        return code
-
-    def _get_code_variables(self) -> str:
-        """Generate code for program variables"""
-        return ''.join(f'self.{var.generate_code()}' for var in self.variables)
-
-    def _get_code_functions(self) -> str:
-        """Generate code for program functions"""
-        return ''.join(f'self.{func.generate_code()}' for func in self.functions)
-
-    def _resolve_refs(self) -> None:
-        """Resolve referencens with proper size propagation"""
-        for obj in chain(self.variables, self.functions, self.types):
-            if obj.get_class() is not ProgramTypePointer:
-                obj.resolve_refs(self.objects_ref)
-
-        for obj in self.types:
-            if obj.get_class() is ProgramTypePointer:
-                obj.resolve_refs(self.objects_ref)
+                yield type.generate_code() + '\n'
+        yield '\n'
+
+        # Generate the rest of types in given file, each after its dependencies
+        yield from iter_types_code([type for type in types if type.get_class() is not ProgramTypeEnum])
+
+    def _iter_code_attributes(self, objects: list[ProgramVariable | ProgramFunction],
+                              lazy_types: bool) -> Iterator[str]:
+        """Generate attributes of Code class for program variables or functions.
+        Handles are created on first access of attribute and cached by Code instance, see LazyAttribute.
+        With lazy types, types required by handle are created first."""
+        for obj in objects:
+            if lazy_types:
+                names = get_required_names(obj.dependency if isinstance(obj, ProgramVariable) else obj.dependencies)
+                yield f'\t{obj.name} = {LAZY_TYPES_NAME}.attribute({tuple(names)!r}, lambda: {obj.generate_value()})\n'
+            else:
+                yield f'\t{obj.name} = LazyAttribute(lambda: {obj.generate_value()})\n'
+
+    def _resolve_refs(self, shared_refs: Optional[Mapping[int, ProgramType]]) -> None:
+        """Resolve references of objects of file, also against shared types, which are added to file types"""
+        if not shared_refs:
+            resolve_refs(chain(self.variables, self.functions, self.types), self.objects_ref)
+            return
+
+        # Like types of the file, shared types pointed to are added too
+        resolve_refs(chain(self.variables, self.functions, self.types), ChainMap(self.objects_ref, shared_refs))
+        known = set(self.types)
+        pending = [dep for var in self.variables for dep in var.dependency]
+        pending += [dep for func in self.functions for dep in func.dependencies]
+        pending += [dep for type in self.types for dep in _get_referenced_types(type)]
+        while pending:
+            type = pending.pop()
+            if type is not None and type not in known:
+                known.add(type)
+                self.types.append(type)
+                pending.extend(_get_referenced_types(type))
+
+
+def _get_referenced_types(type: ProgramType) -> list[Optional[ProgramType]]:
+    """Types referenced by type, including type pointed to"""
+    if type.get_class() is ProgramTypePointer:
+        return [type.pointed_type]
+    return type.dependencies
+
+
+@profiled('resolve_refs')
+def resolve_refs(objects: Iterable[ProgramABC], object_refs: Mapping[int, ProgramABC]) -> None:
+    """Resolve referencens of objects with proper size propagation, pointers are resolved last"""
+    pointers = []
+    for obj in objects:
+        if obj.get_class() is ProgramTypePointer:
+            pointers.append(obj)
+        else:
+            obj.resolve_refs(object_refs)
+
+    for obj in pointers:
+        obj.resolve_refs(object_refs)
@@ -1,19 +1,24 @@
 from collections import namedtuple
+from typing import Callable, Optional
 
 from elftools.dwarf.die import DIE
-from elf.constants import ENCODING, REFERENCE_FORM_WITH_OFFSET
 
 from program.program_abc import ProgramABC
 from program.exceptions import FuncitonAddressMissingError, UnexpectedChildError
+from program.utils import get_die_reference
+
+# Record is defined on module level, so it can be pickled
+Argument = namedtuple('Argument', ['name', 'reference'])
 
 
 class ProgramFunction(ProgramABC):
     """Instances of this class represent functions of the program"""
-    Argument = namedtuple('Argument', ['name', 'reference'])
+    __slots__ = ('name', 'reference', 'args', 'address', '_dependencies')
+    Argument = Argument
 
     def __init__(self, die: DIE) -> None:
         super().__init__(die)
-        self.name = str(self.get_die_attribute('DW_AT_name'), ENCODING)
+        self.name = self.get_die_name()
         self.reference = self.get_die_attribute('DW_AT_type')
         self.args = self._parse_args()
         self.address = self.get_die_attribute('DW_AT_low_pc')
@@ -33,13 +38,26 @@ class ProgramFunction(ProgramABC):
         self._dependencies = [obj_refs[self.reference]] + [obj_refs[arg.reference] for arg in self.args]
         return
 
+    @property
+    def dependencies(self) -> Optional[list[ProgramABC]]:
+        """Return and argument types of function or None if references were not resolved"""
+        return self._dependencies
+
     def generate_code(self) -> str:
         """Gerenare code with definition of given function"""
-        code = f'{self.name} = Function({self.address:#x},'
+        return f'{self.name} = {self.generate_value()}\n'
+
+    def generate_value(self) -> str:
+        """Generate expression creating backend handle of given function"""
+        code = f'Function({self.address:#x},'
         code += f' [{", ".join(obj.alias for obj in self._dependencies[1:])}],'
-        code += f' {self._dependencies[0].alias})\n'
+        code += f' {self._dependencies[0].alias})'
         return code
 
+    def generate_schema(self, get_index: Callable[[ProgramABC], Optional[int]]) -> list:
+        """Schema of function - address, argument types and return type"""
+        return [self.address, [get_index(obj) for obj in self._dependencies[1:]], get_index(self._dependencies[0])]
+
     def _parse_args(self) -> list[Argument]:
         """Get all function arguments and their types"""
         args = []
@@ -47,9 +65,7 @@ class ProgramFunction(ProgramABC):
             match(child.tag):
                 case 'DW_TAG_formal_parameter':
                     name = child.attributes['DW_AT_name'].value if 'DW_AT_name' in child.attributes else ''
-                    reference = child.attributes['DW_AT_type'].value
-                    if child.attributes['DW_AT_type'].form in REFERENCE_FORM_WITH_OFFSET:
-                        reference += self.die.cu.cu_offset
+                    reference = get_die_reference(child, 'DW_AT_type')
                     args.append(self.Argument(name, reference))
 
                 case 'DW_TAG_unspecified_parameters':
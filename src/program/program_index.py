@@ -0,0 +1,84 @@
+import bisect
+from collections import defaultdict, namedtuple
+from typing import Iterable, Optional
+
+from program.program_file import ProgramFile
+from program.program_type import (ProgramType, ProgramTypeArray, ProgramTypeBase, ProgramTypeConst, ProgramTypeModifier,
+                                  ProgramTypeTypedef, ProgramTypeVolatile)
+
+# Object found in index along with name of file defining it
+Symbol = namedtuple('Symbol', ['file_name', 'object'])
+
+
+def get_type_size(type: Optional[ProgramType]) -> int:
+    """Size of type in bytes, following type aliases, modifiers and arrays. Void and unknown sizes are 0."""
+    match type:
+        case None:
+            return 0
+        case ProgramTypeArray():
+            return getattr(type, 'count', 0) * get_type_size(type.dependencies[0])
+        case ProgramTypeTypedef() | ProgramTypeConst() | ProgramTypeVolatile():
+            dependencies = type.dependencies
+            return get_type_size(dependencies[0]) if dependencies else 0
+        case _:
+            return getattr(type, 'size', None) or 0
+
+
+class ProgramIndex(object):
+    """Index of variables, functions and types of parsed files, usable without generating code.
+
+    Objects are found by name in constant time. Static objects of different files
+    may share a name, so every lookup returns all of them. Variables are also found
+    by address, using addresses sorted once when index is created.
+
+    Keyword Arguments:
+        - files -- parsed files of a program
+    """
+
+    def __init__(self, files: Iterable[ProgramFile]) -> None:
+        self._variables: dict[str, list[Symbol]] = defaultdict(list)
+        self._functions: dict[str, list[Symbol]] = defaultdict(list)
+        self._types: dict[str, list[Symbol]] = defaultdict(list)
+        ranges: list[tuple[int, int, Symbol]] = []
+
+        for file in files:
+            for variable in file.variables:
+                symbol = Symbol(file.name, variable)
+                self._variables[variable.name].append(symbol)
+                size = get_type_size(variable.dependency[0]) if variable.dependency else 0
+                ranges.append((variable.address, variable.address + size, symbol))
+            for function in file.functions:
+                self._functions[function.name].append(Symbol(file.name, function))
+            for type in file.types:
+                # Modifiers and base types do not define names of their own
+                if not isinstance(type, (ProgramTypeModifier, ProgramTypeBase)):
+                    self._types[type.alias].append(Symbol(file.name, type))
+
+        ranges.sort(key=lambda entry: entry[0])
+        self._starts = [start for start, _, _ in ranges]
+        self._ranges = ranges
+
+    def find_variables(self, name: str) -> list[Symbol]:
+        """Variables of given name"""
+        return self._variables.get(name, [])
+
+    def find_functions(self, name: str) -> list[Symbol]:
+        """Functions of given name"""
+        return self._functions.get(name, [])
+
+    def find_types(self, name: str) -> list[Symbol]:
+        """Types defining given name in generated code, eg. structures, enumerations and typedefs"""
+        return self._types.get(name, [])
+
+    def variable_at(self, address: int) -> Optional[Symbol]:
+        """Variable which occupies given address, None if there is no such variable"""
+        found = self.variables_in(address, address + 1)
+        return found[0] if found else None
+
+    def variables_in(self, start: int, end: int) -> list[Symbol]:
+        """Variables overlapping address range from start up to end, ordered by their address"""
+        # Variables do not overlap, so only the last one starting before range can reach into it
+        first = max(bisect.bisect_right(self._starts, start) - 1, 0)
+        last = bisect.bisect_left(self._starts, end)
+        return [symbol for var_start, var_end, symbol in self._ranges[first:last]
+                if var_end > start or var_start == start]
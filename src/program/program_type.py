@@ -1,18 +1,26 @@
+import sys
 from abc import abstractproperty
 from collections import namedtuple
 from math import ceil
-from typing import Optional
+from typing import Callable, Optional
 
 from elftools.dwarf.die import DIE
 
 from common.exceptions import WrongDIEType
 
-from elf.constants import BITS_IN_BYTE, DIE_TYPE_COLLECTION_TAGS, DIE_TYPE_MODIFIER_TAGS, ENCODING, REFERENCE_FORM_WITH_OFFSET
+from elf.constants import BITS_IN_BYTE, ENCODING
 
 from program.exceptions import ModifierTypeWithNoReferenceError, NonResolvedReferenceError, UnexpectedChildError
 from program.program_abc import ProgramABC
+from program.utils import get_die_reference
 from program.generator.constants import size_map, types_map
 
+# Records are defined on module level, so they can be pickled
+Member = namedtuple('Member', ['name', 'reference', 'offset', 'bitfield'])
+BitField = namedtuple('BitField', ['bitsize', 'bitoffset'])
+Enumerator = namedtuple('Enumerator', ['name', 'value'])
+ArgumentType = namedtuple('ArgumentType', ['reference'])
+
 
 class ProgramType(ProgramABC):
     """Class represent types of the program
@@ -23,30 +31,26 @@ class ProgramType(ProgramABC):
         - get_class() - method returns specific class of given type
         - alias - members value is alias of given type in generated code -
          alias is available only after reference resolution
+        - defines_name - class attribute, False for types generating no code
     """
-
+    __slots__ = ('alias',)
     alias: str
 
+    # Code of type defines its alias in generated module, overridden by types which generate no code
+    defines_name: bool = True
+
     @classmethod
     def create(cls, die: DIE) -> Optional['ProgramType']:
         """Create instance of subclass of ProgramType appropriate to given die"""
-        match(die.tag):
-            case x if x in DIE_TYPE_MODIFIER_TAGS:
-                return ProgramTypeModifier.create(die)
-            case x if x in DIE_TYPE_COLLECTION_TAGS:
-                return ProgramTypeCollection.create(die)
-            case 'DW_TAG_enumeration_type':
-                return ProgramTypeEnum(die)
-            case 'DW_TAG_base_type':
-                return ProgramTypeBase(die)
-            case 'DW_TAG_typedef':
-                return ProgramTypeTypedef(die)
-            case 'DW_TAG_array_type':
-                return ProgramTypeArray(die)
-            case 'DW_TAG_subroutine_type':
-                return ProgramTypeFunction(die)
-            case _:
-                raise WrongDIEType(f'Creating ProgramType subclass instance with die of tag {die.tag}')
+        try:
+            type_class = TYPE_CLASSES[die.tag]
+        except KeyError:
+            raise WrongDIEType(f'Creating ProgramType subclass instance with die of tag {die.tag}')
+
+        try:
+            return type_class(die)
+        except ModifierTypeWithNoReferenceError:
+            return None
 
     @abstractproperty
     def dependencies(self) -> Optional[list['ProgramType']]: ...
@@ -54,27 +58,19 @@ class ProgramType(ProgramABC):
 
 class ProgramTypeCollection(ProgramType):
     """Class represents all collection datatypes"""
-    Member = namedtuple('Member', ['name', 'reference', 'offset', 'bitfield'])
-    BitField = namedtuple('Bitfield', ['bitsize', 'bitoffset'])
+    __slots__ = ('size', 'members_refs', '_dependencies')
+    Member = Member
+    BitField = BitField
+    ctypes_base: str
+    schema_kind: str
 
     def __init__(self, die: DIE) -> None:
         super().__init__(die)
-        self.alias: str = str(self.get_die_attribute('DW_AT_name'), ENCODING)
+        self.alias: str = self.get_die_name()
         self.size = self.get_die_attribute('DW_AT_byte_size')
         self.members_refs = self._parse_members()
         self._dependencies = None
 
-    @classmethod
-    def create(cle, die: DIE) -> 'ProgramTypeCollection':
-        """Creates collection type for given DIE"""
-        match(die.tag):
-            case 'DW_TAG_structure_type':
-                return ProgramTypeStructure(die)
-            case 'DW_TAG_union_type':
-                return ProgramTypeUnion(die)
-            case _:
-                raise WrongDIEType(f'Creating ProgramTypeCollection subclass instance with die of tag {die.tag}')
-
     def resolve_refs(self, object_refs: dict[int, ProgramABC]) -> None:
         """Resolve references for collection members"""
         self._dependencies = [object_refs[ref.reference] for ref in self.members_refs]
@@ -86,6 +82,26 @@ class ProgramTypeCollection(ProgramType):
         """
         return self._dependencies
 
+    def generate_code(self) -> str:
+        """Generates code of collection class"""
+        code = f'class {self.alias}({self.ctypes_base}):\n'
+        code += self._generate_members()
+        return code
+
+    def generate_schema(self, get_index: Callable[[ProgramABC], Optional[int]]) -> list:
+        """Schema of collection - kind, name and members with their type, offset and bitfield"""
+        members = [[member.name, get_index(dep), member.offset, *(member.bitfield or (None, None))]
+                   for member, dep in zip(self.members_refs, self._dependencies)]
+        return [self.schema_kind, self.alias, members]
+
+    def generate_declaration(self) -> str:
+        """Generates collection class without fields, so it can be used before fields are assigned"""
+        return f'class {self.alias}({self.ctypes_base}):\n\tpass\n'
+
+    def generate_fields(self) -> str:
+        """Generates assignment of fields to class created by generate_declaration()"""
+        return f'{self.alias}.' + self._generate_members(indent='')
+
     def _parse_members(self) -> list[Member]:
         """Get all structure members, their type references and offsets"""
         members = []
@@ -94,10 +110,8 @@ class ProgramTypeCollection(ProgramType):
             if child.tag != 'DW_TAG_member':
                 raise UnexpectedChildError(f'Collection {self.alias} has child of type {child.tag}')
 
-            name = str(child.attributes['DW_AT_name'].value, ENCODING)
-            reference = child.attributes['DW_AT_type'].value
-            if child.attributes['DW_AT_type'].form in REFERENCE_FORM_WITH_OFFSET:
-                reference += self.die.cu.cu_offset
+            name = sys.intern(str(child.attributes['DW_AT_name'].value, ENCODING))
+            reference = get_die_reference(child, 'DW_AT_type')
 
             offset = 0
             if 'DW_AT_data_member_location' in child.attributes:
@@ -120,19 +134,22 @@ class ProgramTypeCollection(ProgramType):
             description += f'\n\t{member}'
         return description
 
-    def _generate_members(self) -> str:
+    def _generate_members(self, indent: str = '\t') -> str:
         """Generate fields of collections members"""
-        code = f'\t_fields_ = [\n'
-
+        lines = [f'{indent}_fields_ = [\n']
         for member, dep in zip(self.members_refs, self._dependencies):
-            code += f'\t\t("{member.name}", {dep.alias}),\n'
-        code += f'\t]\n'
+            lines.append(f'{indent}\t("{member.name}", {dep.alias}),\n')
+        lines.append(f'{indent}]\n')
 
-        return code
+        return ''.join(lines)
 
 
 class ProgramTypeModifier(ProgramType):
     """Class represents modifier of program type"""
+    __slots__ = ('reference', 'size', '_dependency')
+
+    # Modifiers generate no code, they are replaced by modified type
+    defines_name = False
 
     def __init__(self, die: DIE):
         super().__init__(die)
@@ -160,25 +177,14 @@ class ProgramTypeModifier(ProgramType):
             return [self._dependency] if self._dependency is not None else None
         return []
 
-    @classmethod
-    def create(cls, die: DIE) -> Optional['ProgramTypeModifier']:
-        """Create type modifier for given DIE"""
-        try:
-            match(die.tag):
-                case 'DW_TAG_pointer_type':
-                    return ProgramTypePointer(die)
-                case 'DW_TAG_const_type':
-                    return ProgramTypeConst(die)
-                case 'DW_TAG_volatile_type':
-                    return ProgramTypeVolatile(die)
-                case _:
-                    raise WrongDIEType(f'Creating ProgramTypeModifier subclass instance with die of tag {die.tag}')
-        except ModifierTypeWithNoReferenceError:
-            return None
+    def generate_schema(self, get_index: Callable[[ProgramABC], Optional[int]]) -> list:
+        """Modifiers are omitted, schema refers to modified type or void"""
+        return ['modifier', get_index(self._dependency) if self._dependency is not None else None]
 
 
 class ProgramTypePointer(ProgramTypeModifier):
     """Instances of this class are pointer modifiers"""
+    __slots__ = ('refsize',)
 
     def __init__(self, die: DIE) -> None:
         super().__init__(die)
@@ -206,14 +212,24 @@ class ProgramTypePointer(ProgramTypeModifier):
         """Generate code for pointer type"""
         return ''
 
+    def generate_schema(self, get_index: Callable[[ProgramABC], Optional[int]]) -> list:
+        """Pointers are described by size of pointed type"""
+        return ['pointer', self.refsize]
+
     @property
     def dependencies(self) -> list['ProgramType']:
         """Pointers have no dependencies"""
         return []
 
+    @property
+    def pointed_type(self) -> Optional[ProgramType]:
+        """Type pointed to, None for void pointer or if reference was not resolved"""
+        return self._dependency
+
 
 class ProgramTypeConst(ProgramTypeModifier):
     """Instances of this class are const modifiers"""
+    __slots__ = ()
 
     def __init__(self, die: DIE) -> None:
         super().__init__(die)
@@ -229,6 +245,7 @@ class ProgramTypeConst(ProgramTypeModifier):
 
 class ProgramTypeVolatile(ProgramTypeModifier):
     """Instances of this class are volatile modifiers"""
+    __slots__ = ()
 
     def __init__(self, die: DIE) -> None:
         super().__init__(die)
@@ -244,11 +261,15 @@ class ProgramTypeVolatile(ProgramTypeModifier):
 
 class ProgramTypeBase(ProgramType):
     """Instances of this class are base program types"""
+    __slots__ = ('_name', 'bitsize', 'bitoffset')
+
+    # Base types are imported from ctypes
+    defines_name = False
 
     def __init__(self, die: DIE) -> None:
         super().__init__(die)
 
-        self._name = str(self.get_die_attribute('DW_AT_name'), ENCODING)
+        self._name = self.get_die_name()
         self.alias = types_map[self._name]
         self.bitsize = self.get_die_attribute('DW_AT_byte_size') * BITS_IN_BYTE
         if self.bitsize is None:
@@ -277,14 +298,19 @@ class ProgramTypeBase(ProgramType):
         """Returns ctype type for given base type"""
         return self.alias
 
+    def generate_schema(self, get_index: Callable[[ProgramABC], Optional[int]]) -> list:
+        """Base types are described by name of ctypes type"""
+        return ['base', self.alias]
+
 
 class ProgramTypeEnum(ProgramType):
     """Instances of this class are enumeration types"""
-    Enumerator = namedtuple('Enumerator', ['name', 'value'])
+    __slots__ = ('size', 'enumerators')
+    Enumerator = Enumerator
 
     def __init__(self, die: DIE) -> None:
         super().__init__(die)
-        self.alias: str = str(self.get_die_attribute('DW_AT_name'), ENCODING)
+        self.alias: str = self.get_die_name()
         self.size: int = self.get_die_attribute('DW_AT_byte_size')
         self.enumerators = self._parse_enumerators()
 
@@ -313,6 +339,10 @@ class ProgramTypeEnum(ProgramType):
 
         return code
 
+    def generate_schema(self, get_index: Callable[[ProgramABC], Optional[int]]) -> list:
+        """Schema of enumeration - name, ctypes type of values and enumerators"""
+        return ['enum', self.alias, size_map[self.size], [list(enumerator) for enumerator in self.enumerators]]
+
     def _parse_enumerators(self) -> list[Enumerator]:
         """Get all structure members, their type references and offsets"""
         enumerators = []
@@ -320,7 +350,7 @@ class ProgramTypeEnum(ProgramType):
             if child.tag != 'DW_TAG_enumerator':
                 raise UnexpectedChildError(f'Enumerators {self.alias} has child of type {child.tag}')
 
-            name = str(child.attributes['DW_AT_name'].value, ENCODING)
+            name = sys.intern(str(child.attributes['DW_AT_name'].value, ENCODING))
             value = child.attributes['DW_AT_const_value'].value
 
             enumerators.append(self.Enumerator(name, value))
@@ -337,6 +367,9 @@ class ProgramTypeEnum(ProgramType):
 
 class ProgramTypeUnion(ProgramTypeCollection):
     """Instances of this class are union types"""
+    __slots__ = ()
+    ctypes_base = 'Union'
+    schema_kind = 'union'
 
     def __str__(self) -> str:
         description = super().__str__()
@@ -344,19 +377,14 @@ class ProgramTypeUnion(ProgramTypeCollection):
         description += self._get_members_str()
         return description
 
-    def generate_code(self) -> str:
-        """Generate code of ctype Union class"""
-        code = f'class {self.alias}(Union):\n'
-        code += self._generate_members()
-        return code
-
 
 class ProgramTypeTypedef(ProgramType):
     """Instances of this class are type definitions"""
+    __slots__ = ('reference', 'size', '_dependency')
 
     def __init__(self, die: DIE) -> None:
         super().__init__(die)
-        self.alias: str = str(self.get_die_attribute('DW_AT_name'), ENCODING)
+        self.alias: str = self.get_die_name()
         self.reference: int = self.get_die_attribute('DW_AT_type')
         self.size: int = self.get_die_attribute('DW_AT_size')
         self._dependency: Optional[ProgramType] = None
@@ -388,9 +416,16 @@ class ProgramTypeTypedef(ProgramType):
             code = f'{self.alias} = {self._dependency[0].alias}\n'
         return code
 
+    def generate_schema(self, get_index: Callable[[ProgramABC], Optional[int]]) -> list:
+        """Schema of type alias - aliased type or void"""
+        return ['typedef', get_index(self._dependency[0]) if self._dependency else None]
+
 
 class ProgramTypeStructure(ProgramTypeCollection):
     """Instances of this class are structure types"""
+    __slots__ = ()
+    ctypes_base = 'Structure'
+    schema_kind = 'structure'
 
     def __str__(self) -> str:
         description = super().__str__()
@@ -398,15 +433,10 @@ class ProgramTypeStructure(ProgramTypeCollection):
         description += self._get_members_str()
         return description
 
-    def generate_code(self) -> str:
-        """Generates code of structure type"""
-        code = f'class {self.alias}(Structure):\n'
-        code += self._generate_members()
-        return code
-
 
 class ProgramTypeArray(ProgramType):
     """Instances of this class are array types"""
+    __slots__ = ('reference', '_dependency', 'count')
 
     def __init__(self, die: DIE) -> None:
         super().__init__(die)
@@ -440,9 +470,14 @@ class ProgramTypeArray(ProgramType):
         """Generate definition of given array type"""
         return f'{self.alias} = {self._dependency.alias} * {self.count}'
 
+    def generate_schema(self, get_index: Callable[[ProgramABC], Optional[int]]) -> list:
+        """Schema of array - type of elements and their count"""
+        return ['array', get_index(self._dependency), self.count]
+
 
 class ProgramTypeFunction(ProgramType):
-    ArgumentType = namedtuple('ArgumentType', ['reference'])
+    __slots__ = ('reference', 'arg_types', 'size', '_dependency')
+    ArgumentType = ArgumentType
 
     def __init__(self, die: DIE):
         super().__init__(die)
@@ -479,6 +514,12 @@ class ProgramTypeFunction(ProgramType):
 
         return code
 
+    def generate_schema(self, get_index: Callable[[ProgramABC], Optional[int]]) -> list:
+        """Schema of function type - name, return type or void and argument types"""
+        args = self._dependency[1:] if self.reference else self._dependency
+        return_type = get_index(self._dependency[0]) if self.reference else None
+        return ['function', self.alias, return_type, [get_index(arg) for arg in args]]
+
     def _parse_arguments(self) -> list[ArgumentType]:
         """Get all function type argument types references"""
         arg_types = []
@@ -486,10 +527,7 @@ class ProgramTypeFunction(ProgramType):
             if child.tag != 'DW_TAG_formal_parameter':
                 raise UnexpectedChildError(f'Function type of offset {self.offset} has child of type {child.tag}')
 
-            reference = child.attributes['DW_AT_type'].value
-            if child.attributes['DW_AT_type'].form in REFERENCE_FORM_WITH_OFFSET:
-                reference += self.die.cu.cu_offset
-
+            reference = get_die_reference(child, 'DW_AT_type')
             arg_types.append(self.ArgumentType(reference))
 
         return arg_types
@@ -500,3 +538,18 @@ class ProgramTypeFunction(ProgramType):
         for arg_type in self.arg_types:
             description += f'\n\t{arg_type}'
         return description
+
+
+# Classes of types created for DIE tags
+TYPE_CLASSES: dict[str, type[ProgramType]] = {
+    'DW_TAG_pointer_type': ProgramTypePointer,
+    'DW_TAG_const_type': ProgramTypeConst,
+    'DW_TAG_volatile_type': ProgramTypeVolatile,
+    'DW_TAG_structure_type': ProgramTypeStructure,
+    'DW_TAG_union_type': ProgramTypeUnion,
+    'DW_TAG_enumeration_type': ProgramTypeEnum,
+    'DW_TAG_base_type': ProgramTypeBase,
+    'DW_TAG_typedef': ProgramTypeTypedef,
+    'DW_TAG_array_type': ProgramTypeArray,
+    'DW_TAG_subroutine_type': ProgramTypeFunction,
+}
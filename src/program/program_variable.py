@@ -1,10 +1,8 @@
-from typing import Optional
+from typing import Callable, Optional
 
 from elftools.dwarf.die import DIE
 from elftools.dwarf.dwarf_expr import DW_OP_name2opcode
 
-from elf.constants import ENCODING
-
 from program.utils import eval_dwarf_location
 from program.exceptions import LocalVariableError
 from program.program_abc import ProgramABC
@@ -13,10 +11,11 @@ from program.program_type import ProgramType
 
 class ProgramVariable(ProgramABC):
     """Instances of this class represent variables of the program"""
+    __slots__ = ('name', 'reference', 'address', '_dependency')
 
     def __init__(self, die: DIE) -> None:
         super().__init__(die)
-        self.name = str(self.get_die_attribute('DW_AT_name'), ENCODING)
+        self.name = self.get_die_name()
 
         self.reference = self.get_die_attribute('DW_AT_type')
         self.address = self._get_address()
@@ -37,7 +36,15 @@ class ProgramVariable(ProgramABC):
 
     def generate_code(self) -> str:
         """Gerenare code with definition of given variable"""
-        return f'{self.name} = Variable({self.address:#x}, {self._dependency.alias})\n'
+        return f'{self.name} = {self.generate_value()}\n'
+
+    def generate_value(self) -> str:
+        """Generate expression creating backend handle of given variable"""
+        return f'Variable({self.address:#x}, {self._dependency.alias})'
+
+    def generate_schema(self, get_index: Callable[[ProgramABC], Optional[int]]) -> list:
+        """Schema of variable - address and type"""
+        return [self.address, get_index(self._dependency)]
 
     def resolve_refs(self, obj_refs: dict[int, ProgramABC]) -> None:
         """Resolve type reference of given variable"""
@@ -45,4 +52,5 @@ class ProgramVariable(ProgramABC):
 
     @property
     def dependency(self) -> Optional[list[ProgramType]]:
-        return [self.dependency] if self._dependency is not None else None
+        """Type of variable or None if reference was not resolved"""
+        return [self._dependency] if self._dependency is not None else None
@@ -0,0 +1,165 @@
+import collections
+from enum import Enum
+from typing import Callable, Iterable, Iterator
+
+from common.profiler import profiled
+
+from program.exceptions import CyclicTypeDependencyError
+from program.program_type import (ProgramType, ProgramTypeCollection, ProgramTypeFunction, ProgramTypeModifier,
+                                  ProgramTypeTypedef)
+
+
+class TypeStep(Enum):
+    """Kind of code generated for a type at given point of generated module"""
+    DEFINE = 'define'
+    DECLARE = 'declare'
+    FIELDS = 'fields'
+
+
+# Types which refer to their dependencies by name, so declared collection is enough for them
+ALIAS_TYPES = (ProgramTypeTypedef, ProgramTypeModifier)
+NAME_ONLY_TYPES = (*ALIAS_TYPES, ProgramTypeFunction)
+
+
+def get_dependencies(type: ProgramType) -> Iterable[ProgramType]:
+    """Default dependencies of a type - resolved references"""
+    return type.dependencies
+
+
+@profiled('sort_types')
+def sort_types(types: list[ProgramType], dependencies: Callable[[ProgramType], Iterable[ProgramType]] = get_dependencies
+               ) -> Iterator[tuple[TypeStep, ProgramType]]:
+    """Yield types in order in which they can be defined, every type after its dependencies.
+
+    Order is found in linear time with Tarjan's strongly connected components algorithm.
+    Components are completed in order of dependencies, so every type which is not a part
+    of a cycle is simply defined. Collections being part of a cycle are declared first,
+    then other types of the cycle are defined and fields of collections are assigned,
+    types needing complete layout of a collection after its fields.
+    Dependencies not present in given types are assumed to be defined already.
+    """
+    members = set(types)
+    index: dict[ProgramType, int] = {}
+    lowlink: dict[ProgramType, int] = {}
+    stack: list[ProgramType] = []
+    on_stack: set[ProgramType] = set()
+
+    for root in types:
+        if root in index:
+            continue
+
+        # Depth first search without recursion, so long chains of types do not hit recursion limit
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(dependencies(root)))]
+        while work:
+            type, deps = work[-1]
+            for dep in deps:
+                if dep not in members:
+                    continue
+                if dep not in index:
+                    index[dep] = lowlink[dep] = len(index)
+                    stack.append(dep)
+                    on_stack.add(dep)
+                    work.append((dep, iter(dependencies(dep))))
+                    break
+                if dep in on_stack:
+                    lowlink[type] = min(lowlink[type], index[dep])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[type])
+
+                if lowlink[type] == index[type]:
+                    component = []
+                    while not component or component[-1] is not type:
+                        component.append(stack.pop())
+                        on_stack.discard(component[-1])
+                    yield from _sort_component(component, dependencies, index)
+
+
+def _sort_component(component: list[ProgramType], dependencies: Callable[[ProgramType], Iterable[ProgramType]],
+                    index: dict[ProgramType, int]) -> Iterator[tuple[TypeStep, ProgramType]]:
+    """Yield steps defining strongly connected component of types.
+
+    Collections are declared first, then every type is defined or gets its fields after the
+    steps it needs. Aliases and function types only need names of their dependencies, other
+    types need complete layout of them, eg. array of structure is created after fields of
+    the structure are assigned. Types containing each other raise CyclicTypeDependencyError.
+    """
+    if len(component) == 1 and component[0] not in dependencies(component[0]):
+        yield TypeStep.DEFINE, component[0]
+        return
+
+    component.sort(key=index.__getitem__)
+    members = set(component)
+    for type in component:
+        if isinstance(type, ProgramTypeCollection):
+            yield TypeStep.DECLARE, type
+
+    # Types of component whose step (definition or fields) has to precede step of the type
+    required: dict[ProgramType, set[ProgramType]] = {type: set() for type in component}
+    for type in component:
+        for dep in dependencies(type):
+            if dep not in members:
+                continue
+            if not isinstance(type, NAME_ONLY_TYPES):
+                required[type].update(_get_layout_types(dep, members, dependencies))
+            elif not isinstance(dep, ProgramTypeCollection):
+                required[type].add(dep)
+
+    dependents: dict[ProgramType, list[ProgramType]] = {type: [] for type in component}
+    for type, deps in required.items():
+        for dep in deps:
+            dependents[dep].append(type)
+    pending = {type: len(deps) for type, deps in required.items()}
+    ready = collections.deque(type for type in component if not pending[type])
+    while ready:
+        type = ready.popleft()
+        del pending[type]
+        yield (TypeStep.FIELDS if isinstance(type, ProgramTypeCollection) else TypeStep.DEFINE), type
+        for dependent in dependents[type]:
+            pending[dependent] -= 1
+            if not pending[dependent]:
+                ready.append(dependent)
+
+    if pending:
+        raise CyclicTypeDependencyError(f'Types {", ".join(str(type.alias) for type in pending)} '
+                                        'depend on each other')
+
+
+def _get_layout_types(type: ProgramType, members: set[ProgramType],
+                      dependencies: Callable[[ProgramType], Iterable[ProgramType]]) -> set[ProgramType]:
+    """Types of component completing layout of given type - the type itself and types aliased by it"""
+    layout_types = set()
+    aliases = [type]
+    while aliases:
+        type = aliases.pop()
+        if type in members and type not in layout_types:
+            layout_types.add(type)
+            if isinstance(type, ALIAS_TYPES):
+                aliases.extend(dependencies(type))
+    return layout_types
+
+
+def iter_types_code(types: list[ProgramType],
+                    dependencies: Callable[[ProgramType], Iterable[ProgramType]] = get_dependencies) -> Iterator[str]:
+    """Yield definitions of given types in order of their dependencies"""
+    for step, type in sort_types(types, dependencies):
+        match(step):
+            case TypeStep.DEFINE:
+                generated = type.generate_code()
+                if len(generated) > 0:
+                    yield generated + '\n'
+            case TypeStep.DECLARE:
+                yield type.generate_declaration() + '\n'
+            case TypeStep.FIELDS:
+                yield type.generate_fields() + '\n'
+
+
+def generate_types_code(types: list[ProgramType],
+                        dependencies: Callable[[ProgramType], Iterable[ProgramType]] = get_dependencies) -> str:
+    """Generate definitions of given types in order of their dependencies"""
+    return ''.join(iter_types_code(types, dependencies))
@@ -0,0 +1,127 @@
+import hashlib
+from collections import defaultdict
+from typing import Iterator
+
+from common.profiler import profiled
+
+from elf.constants import ENCODING
+
+from program.program_file import ProgramFile
+from program.program_type import ProgramType, ProgramTypePointer
+from program.lazy_types import iter_lazy_types_code
+from program.type_order import iter_types_code
+from program.generator.constants import GENERATED_FILE_IMPORTS, LAZY_TYPES_FILE_IMPORTS, SHARED_TYPES_MODULE
+
+
+class TypeTable(object):
+    """Table of types shared between program files.
+
+    Types are identified by structural fingerprint - generated code of the type
+    together with fingerprints of its dependencies. Types with the same fingerprint
+    found in more than one file are generated once to shared module, which is
+    imported by files using them. Types which name collides with other shared type
+    stay in files, along with all types depending on them.
+
+    Keyword Arguments:
+        - files -- all parsed files of a program
+    """
+
+    filename = f'{SHARED_TYPES_MODULE}.py'
+
+    def __init__(self, files: list[ProgramFile]) -> None:
+        self._fingerprints: dict[ProgramType, str] = {}
+        self._types: dict[str, ProgramType] = {}
+        self._files: dict[ProgramFile, list[str]] = {}
+
+        # Count files in which every fingerprint is present
+        occurrences = defaultdict(int)
+        for file in files:
+            file_fingerprints = list(dict.fromkeys(self._get_fingerprint(type) for type in file.types))
+            self._files[file] = file_fingerprints
+            for fingerprint in file_fingerprints:
+                occurrences[fingerprint] += 1
+
+        for file in files:
+            for type in file.types:
+                self._types.setdefault(self._fingerprints[type], type)
+
+        # Names defined by more than one shared type are not shared
+        candidates = set(fingerprint for fingerprint, count in occurrences.items() if count > 1)
+        fingerprints_by_name = defaultdict(set)
+        for fingerprint in candidates:
+            if self._types[fingerprint].defines_name:
+                fingerprints_by_name[self._types[fingerprint].alias].add(fingerprint)
+        colliding = set().union(*(fps for fps in fingerprints_by_name.values() if len(fps) > 1))
+
+        self._shared: set[str] = set()
+        self._excluded: set[str] = set()
+        for fingerprint in candidates:
+            self._is_shareable(fingerprint, candidates - colliding)
+
+    def shared_types(self, file: ProgramFile) -> set[ProgramType]:
+        """Return types of given file, which are generated to shared module"""
+        return set(type for type in file.types if self._fingerprints[type] in self._shared)
+
+    def generate_code(self, lazy_types: bool = False) -> str:
+        """Returns code of shared types module, with lazy types they are created on first use"""
+        return ''.join(self.iter_code(lazy_types))
+
+    @profiled('generate_code')
+    def iter_code(self, lazy_types: bool = False) -> Iterator[str]:
+        """Yield chunks of code of shared types module as they are generated"""
+        shared = dict.fromkeys(self._types[fingerprint] for fingerprints in self._files.values()
+                               for fingerprint in fingerprints if fingerprint in self._shared)
+        yield LAZY_TYPES_FILE_IMPORTS if lazy_types else GENERATED_FILE_IMPORTS
+        if lazy_types:
+            yield from iter_lazy_types_code(list(shared), self._get_shared_dependencies)
+        else:
+            yield from iter_types_code(list(shared), self._get_shared_dependencies)
+
+    def _get_shared_dependencies(self, type: ProgramType) -> list[ProgramType]:
+        """Dependencies of shared type, as types representing their fingerprints"""
+        return [self._types[self._fingerprints[dep]] for dep in type.dependencies]
+
+    def _is_shareable(self, fingerprint: str, candidates: set[str]) -> bool:
+        """Type is shared if it is a candidate and all of its dependencies are shared"""
+        if fingerprint in self._shared:
+            return True
+        if fingerprint in self._excluded or fingerprint not in candidates:
+            return False
+
+        # Assume type is shared while checking dependencies, so cycles end
+        self._shared.add(fingerprint)
+        deps = self._types[fingerprint].dependencies
+        if not all(self._is_shareable(self._fingerprints[dep], candidates) for dep in deps):
+            self._shared.discard(fingerprint)
+            self._excluded.add(fingerprint)
+            return False
+        return True
+
+    def _get_fingerprint(self, type: ProgramType) -> str:
+        """Structural fingerprint of type, computed once for every type object"""
+        return get_type_fingerprint(type, self._fingerprints)
+
+
+def get_type_fingerprint(type: ProgramType, fingerprints: dict[ProgramType, str], pointed: bool = False) -> str:
+    """Structural fingerprint of type - generated code of the type together with fingerprints of its
+    dependencies, computed once for every type object and stored in fingerprints. With pointed,
+    types pointed to are included too."""
+    fingerprint = fingerprints.get(type)
+    if fingerprint is not None:
+        return fingerprint
+
+    # Placeholder for types referenced by their own dependencies
+    fingerprints[type] = f'cycle:{type.alias}'
+
+    digest = hashlib.sha1(type.get_class().__name__.encode(ENCODING))
+    digest.update(type.generate_code().encode(ENCODING))
+    dependencies = type.dependencies
+    if pointed and type.get_class() is ProgramTypePointer:
+        digest.update(type.alias.encode(ENCODING))
+        dependencies = [type.pointed_type] if type.pointed_type is not None else []
+    for dep in dependencies:
+        digest.update(get_type_fingerprint(dep, fingerprints, pointed).encode(ENCODING))
+
+    fingerprint = digest.hexdigest()
+    fingerprints[type] = fingerprint
+    return fingerprint
@@ -1,6 +1,11 @@
 from functools import reduce
 
+from elftools.dwarf.compileunit import CompileUnit
+from elftools.dwarf.die import DIE
 from elftools.dwarf.dwarf_expr import DW_OP_name2opcode
+from elftools.dwarf.typeunit import TypeUnit
+
+from elf.constants import REFERENCE_FORM_SIGNATURE, REFERENCE_FORM_WITH_OFFSET, TYPE_UNITS_OFFSET
 
 from program.exceptions import IncorrectLocationEncodingError
 
@@ -19,3 +24,29 @@ def eval_dwarf_location(location: list[int], endian_little: bool = True) -> int:
             raise IncorrectLocationEncodingError('Location operation not supported')
 
     return addr
+
+
+def get_unit_base(unit: CompileUnit | TypeUnit) -> int:
+    """Offset added to offsets of DIEs of unit, so they are unique in elf also for type units, see TYPE_UNITS_OFFSET"""
+    return TYPE_UNITS_OFFSET if isinstance(unit, TypeUnit) else 0
+
+
+def get_die_offset(die: DIE) -> int:
+    """Offset identifying DIE in program model, see get_unit_base()"""
+    return die.offset + get_unit_base(die.cu)
+
+
+def get_signature_key(signature: int) -> int:
+    """Key of type referenced by signature of its type unit, keys of signatures do not collide with offsets"""
+    return -1 - signature
+
+
+def get_die_reference(die: DIE, attr: str) -> int:
+    """Offset of DIE referenced by given attribute, see get_die_offset(). Types of type units referenced
+    by signatures are identified by keys of signatures, see get_signature_key()."""
+    attribute = die.attributes[attr]
+    if attribute.form in REFERENCE_FORM_WITH_OFFSET:
+        return attribute.value + die.cu.cu_offset + get_unit_base(die.cu)
+    if attribute.form == REFERENCE_FORM_SIGNATURE:
+        return get_signature_key(attribute.value)
+    return attribute.value
@@ -0,0 +1,81 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from elftools.elf.elffile import ELFFile
+
+from elf.batch import BatchTarget, iter_batch_generated
+from elf.cache import MemoryCache
+from elf.elfdata import ELFData
+from elf.parallel import iter_generated
+
+from batch_parser import read_targets
+
+
+class TestBatch(unittest.TestCase):
+    """Test cases for generating many elf files sharing their compilation units"""
+
+    TEST_FILE = 'tests/testfiles/test_code.elf'
+    MULTI_TEST_FILE = 'tests/testfiles/test_code_multi.elf'
+
+    def setUp(self) -> None:
+        """Create copy of test file differing only outside of debug information"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.copy_file = Path(self.directory.name) / 'variant.elf'
+        shutil.copy(self.TEST_FILE, self.copy_file)
+        with open(self.TEST_FILE, 'rb') as file:
+            comment = ELFFile(file).get_section_by_name('.comment')['sh_offset']
+        with open(self.copy_file, 'r+b') as file:
+            file.seek(comment)
+            file.write(b'X')
+
+        self.targets = [BatchTarget(self.TEST_FILE, Path('first')), BatchTarget(str(self.copy_file), Path('copy')),
+                        BatchTarget(self.MULTI_TEST_FILE, Path('multi'))]
+
+    def tearDown(self) -> None:
+        """Remove copy of test file"""
+        self.directory.cleanup()
+
+    def test_unit_key(self):
+        """Checks if unit keys depend only on debug information of units"""
+        efile, copy = ELFData(self.TEST_FILE), ELFData(self.copy_file)
+        self.assertEqual(efile.get_unit_key('test_code.c'), copy.get_unit_key('test_code.c'))
+
+        multi = ELFData(self.MULTI_TEST_FILE)
+        keys = [multi.get_unit_key(name) for name in multi.dwarf_file_names]
+        self.assertEqual(len(set(keys)), 2, 'Different units have the same key')
+        self.assertNotIn(efile.get_unit_key('test_code.c'), keys)
+
+    def test_batch_code(self):
+        """Checks if code of every target is the same as code generated for its elf alone"""
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                generated = {}
+                for target, filename, code in iter_batch_generated(self.targets, jobs=jobs):
+                    generated.setdefault(target.dst, {})[filename] = code
+                for target in self.targets:
+                    expected = {filename: ''.join(chunks) for _, filename, chunks in iter_generated(target.elffile)}
+                    self.assertEqual(generated[target.dst], expected)
+
+    def test_batch_shared_units(self):
+        """Checks if units shared by targets and units found in cache are parsed once"""
+        cache = MemoryCache(10)
+        with mock.patch.object(ELFData, 'parse_file', autospec=True, side_effect=ELFData.parse_file) as parse_file:
+            first = list(iter_batch_generated(self.targets, cache=cache))
+            self.assertEqual(parse_file.call_count, 3, 'Shared unit was parsed more than once')
+            second = list(iter_batch_generated(self.targets, cache=cache))
+            self.assertEqual(parse_file.call_count, 3, 'Unit found in cache was parsed')
+        self.assertCountEqual(first, second)
+        self.assertEqual(len(first), 4)
+
+    def test_read_targets(self):
+        """Checks if relative paths of list file are relative to its catalogue"""
+        list_file = Path(self.directory.name) / 'list.txt'
+        list_file.write_text('# variants\nvariant.elf out/variant\n\n/abs/other.elf /abs/out\n')
+        self.assertEqual(read_targets(list_file),
+                         [BatchTarget(self.copy_file, Path(self.directory.name) / 'out' / 'variant'),
+                          BatchTarget(Path('/abs/other.elf'), Path('/abs/out'))])
+        list_file.write_text('variant.elf\n')
+        self.assertRaises(ValueError, read_targets, list_file)
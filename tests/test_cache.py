@@ -0,0 +1,99 @@
+import pickle
+import tempfile
+import unittest
+from pathlib import Path
+
+import elf.cache as cache
+from elf.cache import ParseCache
+from elf.elfdata import ELFData
+
+
+class TestParseCache(unittest.TestCase):
+    """Test cases for persistent cache of parsed elf files"""
+
+    TEST_FILE = 'tests/testfiles/test_code_multi.elf'
+
+    def setUp(self) -> None:
+        """Create empty cache directory"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ParseCache(Path(self.directory.name))
+
+    def tearDown(self) -> None:
+        """Remove cache directory"""
+        self.directory.cleanup()
+
+    def test_cache_roundtrip(self):
+        """Checks if files loaded from cache generate the same code as parsed ones"""
+        files = ELFData(self.TEST_FILE).parse_elffile()
+        key = ParseCache.get_key(self.TEST_FILE)
+        self.assertIsNone(self.cache.load(key), 'Empty cache returned entry')
+
+        self.cache.store(key, files)
+        cached_files = self.cache.load(key)
+        self.assertEqual([file.generate_code() for file in files],
+                         [file.generate_code() for file in cached_files], 'Cached files generate different code')
+
+    def test_cache_version_mismatch(self):
+        """Checks if entries of other cache version are not used"""
+        files = ELFData(self.TEST_FILE).parse_elffile()
+        key = ParseCache.get_key(self.TEST_FILE)
+        with open(self.cache._entry_path(key), 'wb') as file:
+            pickle.dump(cache.CACHE_VERSION - 1, file)
+            pickle.dump(files[0], file)
+        self.assertIsNone(self.cache.iter_entry(key), 'Entry of wrong version was used')
+        self.assertIsNone(self.cache.load(key), 'Entry of wrong version was used')
+
+    def test_cache_iter_entry(self):
+        """Checks if entry is loaded lazily, one file at a time"""
+        files = ELFData(self.TEST_FILE).parse_elffile()
+        key = ParseCache.get_key(self.TEST_FILE)
+        self.assertIsNone(self.cache.iter_entry(key), 'Empty cache returned entry')
+
+        with self.cache.writer(key) as add_file:
+            add_file(files[0])
+        cached_files = self.cache.iter_entry(key)
+        self.assertEqual(next(cached_files).generate_code(), files[0].generate_code())
+        self.assertRaises(StopIteration, next, cached_files)
+
+    def test_cache_writer_error(self):
+        """Checks if entry is not stored when writing fails"""
+        key = ParseCache.get_key(self.TEST_FILE)
+        with self.assertRaises(RuntimeError):
+            with self.cache.writer(key):
+                raise RuntimeError('Parsing failed')
+        self.assertIsNone(self.cache.load(key), 'Entry of failed write was stored')
+        self.assertEqual(list(Path(self.directory.name).iterdir()), [], 'Temporary file was left')
+
+
+class TestMemoryCache(unittest.TestCase):
+    """Test cases for in-memory cache of parsed elf files"""
+
+    TEST_FILE = 'tests/testfiles/test_code.elf'
+
+    def test_cache_eviction(self):
+        """Checks if least recently used entry is dropped above the limit"""
+        files = ELFData(self.TEST_FILE).parse_elffile()
+        memory_cache = cache.MemoryCache(2)
+        memory_cache.store('first', files)
+        memory_cache.store('second', files)
+        self.assertIs(memory_cache.load('first'), memory_cache.load('first'), 'Entry was copied')
+
+        memory_cache.store('third', files)
+        self.assertNotIn('second', memory_cache, 'Least recently used entry was kept')
+        self.assertIn('first', memory_cache)
+        self.assertIn('third', memory_cache)
+        self.assertIsNone(memory_cache.iter_entry('second'))
+
+    def test_cache_writer(self):
+        """Checks if entry collected by writer is stored only when writing succeeds"""
+        files = ELFData(self.TEST_FILE).parse_elffile()
+        memory_cache = cache.MemoryCache(1)
+        with self.assertRaises(RuntimeError):
+            with memory_cache.writer('key') as add_file:
+                add_file(files[0])
+                raise RuntimeError('Parsing failed')
+        self.assertNotIn('key', memory_cache, 'Entry of failed write was stored')
+
+        with memory_cache.writer('key') as add_file:
+            add_file(files[0])
+        self.assertEqual(list(memory_cache.iter_entry('key')), files[:1])
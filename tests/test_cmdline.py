@@ -65,12 +65,28 @@ class TestCommandLine(unittest.TestCase):
         """Check if program parses good arguments correctly"""
         elffile = 'tests/testfiles/test_code.elf'
         arg_groups = (['-v', elffile], ['--dst', 'catalog', elffile], ['-vvv', elffile],
-                      [elffile, '--verbose', '--dst', 'dst'], [elffile, '--log', 'log'])
+                      [elffile, '--verbose', '--dst', 'dst'], [elffile, '--log', 'log'], ['-j', '4', elffile],
+                      [elffile, '--jobs', '2', '--mmap'], [elffile, '--file', '*.c', '--symbol', 'main'],
+                      [elffile, '--max-memory', '--cache', 'cache'], [elffile, '--zip', 'code.zip', '--withbackend'],
+                      [elffile, '--pyc', 'checked', '-j', '2'], [elffile, '--lazytypes', '--sharetypes'],
+                      [elffile, '--schema', 'schema.json', '-j', '2'],
+                      [elffile, '--profile', 'profile.json', '--profile-top', '5', '--profile-memory'])
 
         for args in arg_groups:
             with self.subTest(args=args):
                 self.assertIsInstance(parse_args(args), argparse.Namespace, 'Arguments did not parse correctly')
 
+    def test_bytecode_without_files(self):
+        """Checks if compilation of printed or packed code is rejected"""
+        elffile = 'tests/testfiles/test_code.elf'
+        arg_groups = ([elffile, '--pyc', 'checked', '--print'], [elffile, '--pyc', 'unchecked', '--zip', 'code.zip'],
+                      [elffile, '--pyc', 'checked', '--schema', 'schema.json'])
+
+        for args in arg_groups:
+            with self.subTest(args=args):
+                self.assertRaises(SystemExit, parse_args, args)
+        self.assertRaises(argparse.ArgumentError, parse_args, [elffile, '--pyc', 'timestamp'])
+
     def test_verbosity(self):
         """Checks if program count verbosity level correctly"""
         elffile = 'tests/testfiles/test_code.elf'
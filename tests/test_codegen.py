@@ -1,10 +1,21 @@
+import io
+import sys
 import unittest
+from unittest import mock
 from elf.elfdata import ELFData, MissingDwarfInfoError
+from elf.parallel import iter_generated
+from program.generator.output import get_code_digest, write_chunks
+import program.generator.generator_backend as backend
+from program.program_type import ProgramTypeBase
 
 
 class TestCodeGeneration(unittest.TestCase):
     """Test cases for generating python code"""
 
+    def generate(self, file_name: str, **options) -> list[tuple[str, str]]:
+        """Output file names and generated code of files of elf, see iter_generated()"""
+        return [(filename, ''.join(chunks)) for _, filename, chunks in iter_generated(file_name, **options)]
+
     def test_generate_code_single_file(self):
         """Tests if code generation rises any errors (single CU)"""
         TEST_FILE = 'tests/testfiles/test_code.elf'
@@ -21,3 +32,102 @@ class TestCodeGeneration(unittest.TestCase):
         for file in file_list:
             self.assertIn(file.filename, ['test_code_multi_main_c.py', 'test_code_multi_header_c.py'], 'Wrong filename')
             self.assertNotEqual(file_list[0].generate_code(), '')
+
+    def test_defines_name(self):
+        """Checks if types defining their names are those generating code, except base types imported from ctypes"""
+        TEST_FILE = 'tests/testfiles/test_code_types.elf'
+        for file in ELFData(TEST_FILE).parse_elffile():
+            for type in file.types:
+                with self.subTest(file=file.name, type=type.alias):
+                    expected = len(type.generate_code()) > 0 and type.get_class() is not ProgramTypeBase
+                    self.assertEqual(type.defines_name, expected)
+
+    def test_iter_files_lazily(self):
+        """Tests if files are parsed one by one when iterating over elf data"""
+        TEST_FILE = 'tests/testfiles/test_code_multi.elf'
+        files = ELFData(TEST_FILE).iter_elffile()
+        first = next(files)
+        self.assertIn(first.filename, ['test_code_multi_main_c.py', 'test_code_multi_header_c.py'], 'Wrong filename')
+        self.assertEqual(len(list(files)), 1, 'Expected one more file object of elf with two CUs')
+
+    def test_generate_code_streamed(self):
+        """Tests if code written to stream chunk by chunk is the same as generated at once"""
+        TEST_FILE = 'tests/testfiles/test_code_multi.elf'
+        for file in ELFData(TEST_FILE).parse_elffile():
+            with self.subTest(file=file.name):
+                stream = io.StringIO()
+                digest = write_chunks(stream, file.iter_code())
+                self.assertEqual(stream.getvalue(), file.generate_code())
+                self.assertEqual(digest, get_code_digest(file.generate_code()))
+
+    def test_generate_code_parallel(self):
+        """Tests if code generated in worker processes is identical to serial run"""
+        TEST_FILE = 'tests/testfiles/test_code_multi.elf'
+        serial = self.generate(TEST_FILE)
+        parallel = self.generate(TEST_FILE, jobs=2)
+        self.assertEqual(serial, parallel, 'Parallel generation differs from serial one')
+
+    def test_generate_code_order_independent(self):
+        """Tests if generated code of a file does not depend on previously parsed files"""
+        TEST_FILE = 'tests/testfiles/test_code_multi.elf'
+        efile = ELFData(TEST_FILE)
+        for file_name in efile.dwarf_file_names:
+            with self.subTest(file_name=file_name):
+                self.assertEqual(efile.parse_file(file_name).generate_code(),
+                                 ELFData(TEST_FILE).parse_file(file_name).generate_code())
+
+    def test_generate_code_shared_types(self):
+        """Tests if types used by many files are generated once to shared module"""
+        TEST_FILE = 'tests/testfiles/test_code_shared.elf'
+        generated = dict(self.generate(TEST_FILE, share_types=True))
+        self.assertIn('class SharedStruct_tag(Structure):', generated['shared_types.py'])
+        for filename in ('test_code_shared_main_c.py', 'test_code_shared_other_c.py'):
+            with self.subTest(filename=filename):
+                self.assertNotIn('class SharedStruct_tag(Structure):', generated[filename])
+                self.assertIn('from shared_types import', generated[filename])
+        self.assertIn('class MainOnly(Structure):', generated['test_code_shared_main_c.py'])
+
+    def test_select_files(self):
+        """Tests if only files matching given patterns are parsed"""
+        TEST_FILE = 'tests/testfiles/test_code_shared.elf'
+        file_list = ELFData(TEST_FILE).parse_elffile(files=['*other*'])
+        self.assertEqual([file.name for file in file_list], ['test_code_shared_other.c'])
+
+    def test_select_symbols(self):
+        """Tests if only selected symbols and their types are generated"""
+        TEST_FILE = 'tests/testfiles/test_code_shared.elf'
+        efile = ELFData(TEST_FILE)
+        self.assertEqual(efile.select_file_names(symbols=['shared_function']), ['test_code_shared_other.c'],
+                         'Function should be located without parsing')
+
+        file_list = efile.parse_elffile(symbols=['main_value'])
+        self.assertEqual([file.name for file in file_list], ['test_code_shared_main.c'])
+        self.assertEqual([var.name for var in file_list[0].variables], ['main_value'])
+        self.assertEqual(file_list[0].functions, [])
+        self.assertIn('class MainOnly(Structure):', file_list[0].generate_code())
+
+    def test_generate_code_selected_parallel(self):
+        """Tests if selected code generated in worker processes is identical to serial run"""
+        TEST_FILE = 'tests/testfiles/test_code_shared.elf'
+        serial = self.generate(TEST_FILE, symbols=['other_value', 'main'])
+        parallel = self.generate(TEST_FILE, jobs=2, symbols=['other_value', 'main'])
+        self.assertEqual(serial, parallel, 'Parallel generation differs from serial one')
+        self.assertEqual(len(serial), 2)
+
+    def test_code_attributes_lazy(self):
+        """Tests if handles of generated Code class are created on first access and cached per instance"""
+        TEST_FILE = 'tests/testfiles/test_code.elf'
+        program_file = ELFData(TEST_FILE).parse_elffile()[0]
+        module = {}
+        with mock.patch.dict(sys.modules, backend=backend):
+            exec(program_file.generate_code(), module)
+
+        code = module['Code']()
+        self.assertEqual(vars(code), {}, 'Handles were created with Code instance')
+        for obj in program_file.variables + program_file.functions:
+            with self.subTest(name=obj.name):
+                handle = getattr(code, obj.name)
+                self.assertIsInstance(handle, backend.Variable if obj in program_file.variables else backend.Function)
+                self.assertEqual(handle.address, obj.address)
+                self.assertIs(getattr(code, obj.name), handle, 'Handle was not cached')
+                self.assertIsNot(getattr(module['Code'](), obj.name), handle, 'Handle is shared between instances')
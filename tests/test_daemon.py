@@ -0,0 +1,111 @@
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from daemon import ParserDaemon
+
+
+class TestParserDaemon(unittest.TestCase):
+    """Test cases for daemon serving parser requests over unix domain socket"""
+
+    TEST_FILE = 'tests/testfiles/test_code.elf'
+
+    def setUp(self) -> None:
+        """Start daemon on socket in temporary directory"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.socket_path = Path(self.directory.name) / 'parser.sock'
+        self.daemon = ParserDaemon(self.socket_path, 1)
+        self.thread = threading.Thread(target=self.daemon.serve)
+        self.thread.start()
+
+    def tearDown(self) -> None:
+        """Stop daemon and remove its socket"""
+        if self.daemon.running:
+            self.request(command='shutdown')
+        self.thread.join()
+        self.daemon.server_close()
+        self.directory.cleanup()
+
+    def request(self, **message) -> dict:
+        """Send request to daemon, returns its response"""
+        return self.send(json.dumps(message).encode())
+
+    def send(self, line: bytes) -> dict:
+        """Send raw request line to daemon, returns its response"""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(str(self.socket_path))
+            connection.sendall(line + b'\n')
+            with connection.makefile('rb') as response:
+                return json.loads(response.readline())
+
+    def test_generate(self):
+        """Checks if repeated generate requests print the same code, the second one from memory"""
+        args = [self.TEST_FILE, '--print', '-vv']
+        first = self.request(command='generate', cwd=os.getcwd(), args=args)
+        second = self.request(command='generate', cwd=os.getcwd(), args=args)
+        self.assertEqual(first['status'], os.EX_OK)
+        self.assertIn('class Code', first['stdout'])
+        self.assertEqual(first['stdout'], second['stdout'])
+        self.assertIn('Memory cache miss', first['log'])
+        self.assertIn('Memory cache hit', second['log'])
+
+    def test_generate_errors(self):
+        """Checks if errors of generate request are reported in response"""
+        response = self.request(command='generate', cwd=os.getcwd(), args=['missing.elf', '--print'])
+        self.assertNotEqual(response['status'], os.EX_OK)
+        self.assertIn('missing.elf', response['log'])
+        response = self.request(command='generate', cwd=os.getcwd(), args=[])
+        self.assertNotEqual(response['status'], os.EX_OK)
+        self.assertTrue(self.daemon.running, 'Daemon stopped on error of request')
+
+    def test_malformed_request(self):
+        """Checks if requests which are not JSON objects are rejected without stopping daemon"""
+        for line in (b'{"command": ', b'[1]', b'"generate"', b'null'):
+            with self.subTest(line=line):
+                response = self.send(line)
+                self.assertEqual(response['status'], os.EX_USAGE)
+                self.assertIn('Malformed request', response['log'])
+        self.assertTrue(self.daemon.running, 'Daemon stopped on malformed request')
+
+    def test_query(self):
+        """Checks if objects are found by name and address"""
+        response = self.request(command='query', cwd=os.getcwd(), elffile=self.TEST_FILE, kind='variable',
+                                name='structs')
+        self.assertEqual(response['results'], [dict(file='test_code.c', kind='variable', name='structs',
+                                                    address=0x4040, type='TestStruct_t_array_3', size=48)])
+        response = self.request(command='query', cwd=os.getcwd(), elffile=self.TEST_FILE, kind='address',
+                                address=0x4070)
+        self.assertEqual([result['name'] for result in response['results']], ['my_pointer'])
+        response = self.request(command='query', cwd=os.getcwd(), elffile=self.TEST_FILE, kind='function',
+                                name='main')
+        self.assertEqual(response['results'][0]['returns'], 'c_int')
+
+    def test_query_errors(self):
+        """Checks if failing queries get error response without stopping daemon"""
+        queries = (dict(elffile='README.md', kind='type', name='Unity'),
+                   dict(elffile=self.TEST_FILE, kind='address', address='0x4070'),
+                   dict(elffile=self.TEST_FILE, kind='address', address=0x4070, end=None))
+        for query in queries:
+            with self.subTest(query=query):
+                response = self.request(command='query', cwd=os.getcwd(), **query)
+                self.assertNotEqual(response['status'], os.EX_OK)
+                self.assertTrue(response['log'])
+        self.assertTrue(self.daemon.running, 'Daemon stopped on error of query')
+
+    def test_query_eviction(self):
+        """Checks if index of elf evicted from memory is dropped"""
+        other = 'tests/testfiles/test_code_multi.elf'
+        self.request(command='query', cwd=os.getcwd(), elffile=self.TEST_FILE, kind='type', name='Unity')
+        response = self.request(command='query', cwd=os.getcwd(), elffile=other, kind='variable', name='global_var')
+        self.assertEqual(len(response['results']), 1)
+        self.assertEqual(len(self.daemon._indexes), 1, 'Index of evicted elf was kept')
+
+    def test_shutdown(self):
+        """Checks if daemon stops serving after shutdown request"""
+        self.assertEqual(self.request(command='shutdown')['status'], os.EX_OK)
+        self.thread.join(timeout=5)
+        self.assertFalse(self.thread.is_alive())
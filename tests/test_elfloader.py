@@ -1,5 +1,9 @@
 import unittest
+from elftools.elf.elffile import ELFFile
+
 from elf.elfdata import ELFData, MissingDwarfInfoError
+from elf.exceptions import UnsupportedElftoolsError
+from elf.utils import read_ELF_symbol_section, release_unit_caches
 
 
 class TestElfLoader(unittest.TestCase):
@@ -20,3 +24,51 @@ class TestElfLoader(unittest.TestCase):
         """Checks if program parses correct file without errors (multiple CUs)"""
         TEST_FILE = 'tests/testfiles/test_code_multi.elf'
         ELFData(TEST_FILE)
+
+    def test_mmap_parse_same_as_read(self):
+        """Checks if memory mapped file gives the same result as file read to memory"""
+        TEST_FILE = 'tests/testfiles/test_code_multi.elf'
+        read_code = [file.generate_code() for file in ELFData(TEST_FILE).parse_elffile()]
+        with ELFData(TEST_FILE, use_mmap=True) as efile:
+            mapped_code = [file.generate_code() for file in efile.parse_elffile()]
+        self.assertEqual(read_code, mapped_code, 'Memory mapped file parsed differently')
+
+    def test_max_memory_parse_same_as_read(self):
+        """Checks if parsing with released compilation units gives the same result, also when parsed again"""
+        TEST_FILE = 'tests/testfiles/test_code_multi.elf'
+        read_code = [file.generate_code() for file in ELFData(TEST_FILE).parse_elffile()]
+        with ELFData(TEST_FILE, max_memory=True) as efile:
+            for _ in range(2):
+                bounded_code = [file.generate_code() for file in efile.parse_elffile()]
+                self.assertEqual(read_code, bounded_code, 'File parsed differently with bounded memory')
+                for file_name in efile.dwarf_file_names:
+                    self.assertFalse(efile._files[file_name]._dielist, 'DIEs of parsed unit were not released')
+
+    def test_max_memory_unsupported_elftools(self):
+        """Checks if lack of caches of elftools released with bounded memory is reported"""
+        TEST_FILE = 'tests/testfiles/test_code_multi.elf'
+        with ELFData(TEST_FILE) as efile:
+            cu = next(iter(efile._dwarfinfo.iter_CUs()))
+            del cu._diemap
+            self.assertRaises(UnsupportedElftoolsError, release_unit_caches, cu)
+
+    def test_symbol_table(self):
+        """Checks if symbol table decoded in bulk matches symbols read by elftools"""
+        TEST_FILE = 'tests/testfiles/test_code_multi.elf'
+        with open(TEST_FILE, 'rb') as file:
+            elf_file = ELFFile(file)
+            symbols = list(elf_file.get_section_by_name('.symtab').iter_symbols())
+            table = read_ELF_symbol_section(elf_file)
+
+        self.assertEqual(len(table), len(symbols), 'Wrong number of symbols')
+        for index, symbol in enumerate(symbols):
+            self.assertEqual((table.name(index), table.address(index), table.size(index)),
+                             (symbol.name, symbol['st_value'], symbol['st_size']))
+            if symbol.name:
+                self.assertIn(index, table.find(symbol.name), 'Symbol not found by name')
+        self.assertEqual(table.file_names, [symbol.name for symbol in symbols
+                                            if symbol['st_info']['type'] == 'STT_FILE'])
+
+        index = table.find('global_var')[0]
+        self.assertEqual(table.find_by_address(table.address(index) + table.size(index) - 1), index,
+                         'Symbol not found by address')
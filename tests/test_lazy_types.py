@@ -0,0 +1,67 @@
+import ctypes
+import sys
+import types
+import unittest
+from unittest import mock
+
+from elf.elfdata import ELFData
+from program.lazy_types import iter_lazy_types_code
+import program.generator.generator_backend as backend
+
+
+class TestLazyTypes(unittest.TestCase):
+    """Test cases for generated modules creating types on first use"""
+
+    TEST_FILE = 'tests/testfiles/test_code.elf'
+
+    def setUp(self) -> None:
+        """Parse test file"""
+        self.program_file = ELFData(self.TEST_FILE).parse_elffile()[0]
+        self.types = {type.alias: type for type in self.program_file.types}
+
+    def load(self, code: str) -> types.ModuleType:
+        """Execute generated code as module, with backend of parser"""
+        module = types.ModuleType('generated')
+        with mock.patch.dict(sys.modules, backend=backend):
+            exec(code, vars(module))
+        return module
+
+    def test_types_created_on_access(self):
+        """Checks if types are created only when they are used, along with their dependencies"""
+        module = self.load(self.program_file.generate_code(lazy_types=True))
+        for alias in ('TestStruct_tag', 'TestStruct_t', 'TestStruct_t_array_3', 'Values', 'size_t'):
+            self.assertNotIn(alias, vars(module), 'Type was created on import')
+            self.assertIn(alias, dir(module))
+
+        self.assertEqual(ctypes.sizeof(module.TestStruct_t_array_3), 3 * 16)
+        self.assertIs(module.TestStruct_t, module.TestStruct_tag)
+        self.assertIn('TestStruct_tag', vars(module), 'Dependency was not stored in module')
+        self.assertNotIn('Values', vars(module), 'Unused type was created')
+        self.assertEqual(module.Values.VAL_THIRD, 4)
+        self.assertRaises(AttributeError, getattr, module, 'Missing_type')
+
+    def test_backend_imports(self):
+        """Checks if only files with types created on first use import LazyTypes from backend"""
+        self.assertNotIn('LazyTypes', self.program_file.generate_code())
+        self.assertIn('LazyTypes', self.program_file.generate_code(lazy_types=True).split('\n\n')[1])
+
+    def test_code_attributes(self):
+        """Checks if handles of Code class create types they use"""
+        module = self.load(self.program_file.generate_code(lazy_types=True))
+        code = module.Code()
+        self.assertIs(code.structs.type, module.TestStruct_t_array_3)
+        self.assertEqual(code.test_function.arg_types, [ctypes.c_ulong])
+
+    def test_cycle(self):
+        """Checks if cycle of types is created from any of its types"""
+        structure, typedef = self.types['TestStruct_tag'], self.types['TestStruct_t']
+
+        def dependencies(type):
+            return type.dependencies + [typedef] if type is structure else type.dependencies
+
+        for alias in ('TestStruct_t', 'TestStruct_tag'):
+            with self.subTest(alias=alias):
+                module = self.load('from backend import *\nfrom ctypes import *\n'
+                                   + ''.join(iter_lazy_types_code([typedef, structure], dependencies)))
+                self.assertEqual(ctypes.sizeof(getattr(module, alias)), 16, 'Fields were not assigned')
+                self.assertEqual(module.__lazy_types__.types, {}, 'Not all types of cycle were created')
@@ -0,0 +1,66 @@
+import tempfile
+import unittest
+import functools
+from pathlib import Path
+
+from elf.parallel import iter_generated
+from program.generator.manifest import OutputManifest
+from program.generator.output import get_code_digest, write_file
+
+
+class TestOutputManifest(unittest.TestCase):
+    """Test cases for incremental generation of files"""
+
+    TEST_FILE = 'tests/testfiles/test_code_multi.elf'
+
+    def setUp(self) -> None:
+        """Create empty output directory"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name)
+
+    def tearDown(self) -> None:
+        """Remove output directory"""
+        self.directory.cleanup()
+
+    def generate(self) -> list[str]:
+        """Generate files to output directory, return names of written files"""
+        manifest = OutputManifest(self.path)
+        written = []
+        for source, filename, chunks in iter_generated(self.TEST_FILE, manifest=manifest):
+            code = ''.join(chunks)
+            if manifest.update(source, filename, get_code_digest(code)):
+                (self.path / filename).write_text(code)
+                written.append(filename)
+        manifest.remove_stale()
+        manifest.save()
+        return written
+
+    def test_unchanged_files_skipped(self):
+        """Checks if files are not generated again when elf did not change"""
+        self.assertEqual(len(self.generate()), 2, 'Expected two files of elf with two CUs')
+        self.assertEqual(self.generate(), [], 'Unchanged files were generated again')
+
+    def test_missing_file_regenerated(self):
+        """Checks if removed output file is generated again"""
+        self.generate()
+        (self.path / 'test_code_multi_main_c.py').unlink()
+        self.assertEqual(self.generate(), ['test_code_multi_main_c.py'], 'Only removed file should be generated')
+
+    def test_unchanged_streamed_files_not_replaced(self):
+        """Checks if files written while generated are not replaced when their code did not change"""
+        def generate_streamed() -> list[str]:
+            manifest = OutputManifest(self.path)
+            written = [filename for source, filename, chunks in iter_generated(self.TEST_FILE, manifest=manifest)
+                       if write_file(self.path / filename, chunks,
+                                     functools.partial(manifest.update, source, filename))]
+            manifest.save()
+            return written
+
+        self.assertEqual(len(generate_streamed()), 2, 'Expected two files of elf with two CUs')
+        (self.path / '.parser_manifest.json').unlink()
+        self.assertEqual(generate_streamed(), ['test_code_multi_main_c.py', 'test_code_multi_header_c.py'],
+                         'Files should be written without manifest')
+        self.assertEqual(generate_streamed(), [], 'Unchanged files were written again')
+        self.assertEqual(sorted(path.name for path in self.path.iterdir()),
+                         ['.parser_manifest.json', 'test_code_multi_header_c.py', 'test_code_multi_main_c.py'],
+                         'Temporary files were left')
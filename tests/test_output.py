@@ -0,0 +1,81 @@
+import tempfile
+import unittest
+import zipimport
+import importlib.util
+from pathlib import Path
+
+from elf.parallel import iter_generated
+from program.generator.output import compiling_bytecode, open_archive, write_file
+
+
+class TestArchiveOutput(unittest.TestCase):
+    """Test cases for packing generated files to zip archive"""
+
+    TEST_FILE = 'tests/testfiles/test_code_shared.elf'
+
+    def setUp(self) -> None:
+        """Create empty output directory"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name)
+
+    def tearDown(self) -> None:
+        """Remove output directory"""
+        self.directory.cleanup()
+
+    def pack(self, name: str, jobs: int = 1) -> Path:
+        """Pack files generated from test file to archive of given name"""
+        with open_archive(self.path / name) as add_module:
+            for _, filename, chunks in iter_generated(self.TEST_FILE, jobs=jobs, share_types=True):
+                add_module(filename, chunks)
+        return self.path / name
+
+    def test_archive_importable(self):
+        """Checks if archive holds generated modules in order of generation, readable by zipimport"""
+        archive = self.pack('generated.zip')
+        generated = list(iter_generated(self.TEST_FILE, share_types=True))
+        importer = zipimport.zipimporter(str(archive))
+        for _, filename, chunks in generated:
+            with self.subTest(filename=filename):
+                self.assertEqual(importer.get_source(filename.removesuffix('.py')), ''.join(chunks))
+        self.assertEqual(sorted(path.name for path in self.path.iterdir()), ['generated.zip'],
+                         'Temporary file was left')
+
+    def test_archive_deterministic(self):
+        """Checks if archives of the same code are identical"""
+        self.assertEqual(self.pack('first.zip').read_bytes(), self.pack('second.zip', jobs=2).read_bytes(),
+                         'Archives of the same elf differ')
+
+
+class TestBytecodeOutput(unittest.TestCase):
+    """Test cases for compiling generated files to bytecode"""
+
+    TEST_FILE = 'tests/testfiles/test_code_multi.elf'
+
+    # Flags of hash based bytecode header
+    BYTECODE_FLAGS = dict(checked=0b11, unchecked=0b01)
+
+    def setUp(self) -> None:
+        """Create empty output directory"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name)
+
+    def tearDown(self) -> None:
+        """Remove output directory"""
+        self.directory.cleanup()
+
+    def test_compile_bytecode(self):
+        """Checks if every generated file gets hash based bytecode of requested kind"""
+        for mode, jobs in (('checked', 1), ('unchecked', 2)):
+            with self.subTest(mode=mode, jobs=jobs):
+                paths = []
+                with compiling_bytecode(mode, jobs) as compile_file:
+                    for _, filename, chunks in iter_generated(self.TEST_FILE):
+                        write_file(self.path / filename, chunks)
+                        compile_file(self.path / filename)
+                        paths.append(self.path / filename)
+
+                for path in paths:
+                    with open(importlib.util.cache_from_source(str(path)), 'rb') as file:
+                        header = file.read(8)
+                    self.assertEqual(header[:4], importlib.util.MAGIC_NUMBER, 'Wrong bytecode magic number')
+                    self.assertEqual(int.from_bytes(header[4:8], 'little'), self.BYTECODE_FLAGS[mode])
@@ -0,0 +1,75 @@
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from common.profiler import Profiler, profiled, profiler
+from elf.parallel import iter_generated
+
+
+class TestProfiler(unittest.TestCase):
+    """Test cases for profiling of phases and compilation units"""
+
+    TEST_FILE = 'tests/testfiles/test_code_multi.elf'
+
+    def tearDown(self) -> None:
+        """Stop profiler of the process if test left it running"""
+        if profiler.enabled:
+            profiler.stop()
+
+    def test_phases(self):
+        """Checks if nested and repeated phases are counted once, and nothing is counted before start"""
+        profile = Profiler()
+        with profile.phase('outer'):
+            pass
+        profile.start()
+        with profile.phase('outer'):
+            with profile.phase('outer'):
+                time.sleep(0.01)
+            with profile.phase('inner'):
+                pass
+        self.assertEqual(list(profile.iterate('items', range(3))), [0, 1, 2])
+        profile.stop()
+
+        phases = profile.report(10)['phases']
+        self.assertEqual(phases['outer']['calls'], 1)
+        self.assertGreaterEqual(phases['outer']['seconds'], 0.01)
+        self.assertEqual(phases['inner']['calls'], 1)
+        self.assertEqual(phases['items']['calls'], 1, 'Iteration was not counted as single call')
+
+    def test_profiled_generator(self):
+        """Checks if only time of producing items of generator function is counted"""
+        @profiled('producer')
+        def produce():
+            yield 1
+            yield 2
+
+        profiler.start()
+        for _ in produce():
+            time.sleep(0.02)
+        profiler.stop()
+        phase = profiler.report(10)['phases']['producer']
+        self.assertEqual(phase['calls'], 1)
+        self.assertLess(phase['seconds'], 0.02, 'Time of consumer was counted')
+
+    def test_report(self):
+        """Checks if report of parsing covers every unit, in serial and parallel run"""
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs), tempfile.TemporaryDirectory() as directory:
+                profiler.start(trace_memory=jobs == 1)
+                generated = [''.join(chunks) for _, _, chunks in iter_generated(self.TEST_FILE, jobs=jobs)]
+                profiler.stop()
+                path = Path(directory) / 'profile.json'
+                profiler.write_report(path, 1)
+                report = json.loads(path.read_text())
+
+                self.assertEqual(report['units']['count'], len(generated))
+                self.assertEqual(report['units']['variables'], 2)
+                self.assertEqual(sorted(unit['file'] for unit in report['unit_statistics']),
+                                 ['test_code_multi_header.c', 'test_code_multi_main.c'])
+                self.assertEqual(len(report['slowest_units']), 1)
+                for phase in ('load_elf', 'parse_file', 'decode_dies', 'resolve_refs', 'generate_code'):
+                    self.assertIn(phase, report['phases'])
+                self.assertEqual(report['memory']['tracemalloc_peak'] is not None, jobs == 1)
+                self.assertGreater(report['memory']['max_rss'], 0)
@@ -0,0 +1,45 @@
+import unittest
+
+from elf.elfdata import ELFData
+from program.program_index import get_type_size
+
+
+class TestProgramIndex(unittest.TestCase):
+    """Test cases for querying parsed elf without generating code"""
+
+    TEST_FILE = 'tests/testfiles/test_code.elf'
+    MULTI_TEST_FILE = 'tests/testfiles/test_code_multi.elf'
+
+    def test_find_by_name(self):
+        """Checks if variables, functions and types are found by name along with their file"""
+        index = ELFData(self.TEST_FILE).index
+        (variable,) = index.find_variables('structs')
+        self.assertEqual(variable.file_name, 'test_code.c')
+        self.assertEqual(variable.object.address, 0x4040)
+        self.assertEqual(index.find_functions('main')[0].object.address, 0x1172)
+        self.assertEqual([symbol.object.alias for symbol in index.find_types('TestStruct_t')], ['TestStruct_t'])
+        self.assertEqual(index.find_variables('missing'), [])
+        self.assertEqual(index.find_types('c_int'), [], 'Base types are not indexed')
+
+    def test_find_by_address(self):
+        """Checks if variables are found by any address they occupy"""
+        index = ELFData(self.TEST_FILE).index
+        structs = index.find_variables('structs')[0].object
+        self.assertEqual(get_type_size(structs.dependency[0]), 3 * 16)
+        self.assertIs(index.variable_at(0x4040).object, structs)
+        self.assertIs(index.variable_at(0x4040 + 47).object, structs)
+        self.assertEqual(index.variable_at(0x4040 + 48).object.name, 'my_pointer')
+        self.assertIsNone(index.variable_at(0x4078))
+        self.assertIsNone(index.variable_at(0x1000))
+
+        names = [symbol.object.name for symbol in index.variables_in(0x4000, 0x5000)]
+        self.assertEqual(names, ['structs', 'my_pointer'])
+        self.assertEqual([symbol.object.name for symbol in index.variables_in(0x4050, 0x4060)], ['structs'])
+
+    def test_index_of_selection(self):
+        """Checks if index covers files returned by the last parse"""
+        efile = ELFData(self.MULTI_TEST_FILE)
+        efile.parse_elffile(files=['test_code_multi_main.c'])
+        self.assertEqual(efile.index.find_variables('global_var'), [])
+        efile.parse_elffile()
+        self.assertEqual(efile.index.find_variables('global_var')[0].file_name, 'test_code_multi_header.c')
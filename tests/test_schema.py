@@ -0,0 +1,65 @@
+import ctypes
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from elf.parallel import iter_program_files
+from program.generator.schema import write_schema
+import program.generator.generator_backend as backend
+
+
+class TestSchema(unittest.TestCase):
+    """Test cases for schema output loaded by backend"""
+
+    TEST_FILE = 'tests/testfiles/test_code.elf'
+
+    def setUp(self) -> None:
+        """Write schema of test file and generated module to compare with"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / 'schema.json'
+        program_files = list(iter_program_files(self.TEST_FILE))
+        write_schema(self.path, program_files)
+
+        self.generated = types.ModuleType('generated')
+        with mock.patch.dict(sys.modules, backend=backend):
+            exec(program_files[0].generate_code(), vars(self.generated))
+
+    def tearDown(self) -> None:
+        """Remove schema"""
+        self.directory.cleanup()
+
+    def test_load_types(self):
+        """Checks if types built from schema are the same as types of generated code"""
+        module = backend.load_schema(self.path)['test_code_c']
+        for name in ('TestStruct_tag', 'TestStruct_t', 'Unity', 'TestStruct_t_array_3', 'size_t', 'Values'):
+            with self.subTest(name=name):
+                loaded, generated = getattr(module, name), getattr(self.generated, name)
+                self.assertEqual(ctypes.sizeof(loaded), ctypes.sizeof(generated))
+                self.assertEqual([field for field, _ in getattr(loaded, '_fields_', [])],
+                                 [field for field, _ in getattr(generated, '_fields_', [])])
+        self.assertIs(module.TestStruct_t, module.TestStruct_tag)
+        self.assertEqual(module.Values.VAL_THIRD, self.generated.Values.VAL_THIRD)
+        self.assertEqual(module.FunctionType_267._args, self.generated.FunctionType_267._args)
+        self.assertRaises(AttributeError, getattr, module, 'Missing_type')
+
+    def test_load_code(self):
+        """Checks if handles of Code class built from schema are the same as in generated code"""
+        code, generated = backend.load_schema(self.path)['test_code_c'].Code(), self.generated.Code()
+        for name in ('structs', 'my_pointer'):
+            with self.subTest(name=name):
+                self.assertEqual(getattr(code, name).address, getattr(generated, name).address)
+                self.assertEqual(ctypes.sizeof(getattr(code, name).type), ctypes.sizeof(getattr(generated, name).type))
+        for name in ('main', 'static_function', 'test_function'):
+            with self.subTest(name=name):
+                self.assertEqual(getattr(code, name).address, getattr(generated, name).address)
+                self.assertEqual([ctypes.sizeof(arg) for arg in getattr(code, name).arg_types],
+                                 [ctypes.sizeof(arg) for arg in getattr(generated, name).arg_types])
+                self.assertIs(getattr(code, name).return_type, getattr(generated, name).return_type)
+
+    def test_version(self):
+        """Checks if schema of other version is rejected"""
+        self.path.write_text(self.path.read_text().replace(f'"version":{backend.SCHEMA_VERSION}', '"version":0'))
+        self.assertRaises(ValueError, backend.load_schema, self.path)
@@ -0,0 +1,109 @@
+import os
+import shutil
+import pathlib
+import tempfile
+import types
+import unittest
+
+from elf.elfdata import ELFData
+from elf.exceptions import MissingDwarfInfoError, UnsupportedElftoolsError
+from elf.parallel import iter_generated
+from elf.split_dwarf import INDEX_FORMS, read_unit_index
+from elf.utils import add_uleb128_forms
+
+from parser import parse_args, run
+
+
+class TestSplitDwarf(unittest.TestCase):
+    """Test cases for elf files built with split dwarf, with units in .dwo files or in .dwp package"""
+
+    TEST_FILE = 'tests/testfiles/test_code_split.elf'
+    PACKAGE_FILE = 'tests/testfiles/test_code_package.elf'
+    PLAIN_FILE = 'tests/testfiles/test_code_shared.elf'
+    DWARF5_FILE = 'tests/testfiles/test_code_split5.elf'
+
+    def generate(self, file_name: str, **options) -> list[tuple[str, str]]:
+        """Output file names and generated code of files of elf, see iter_generated()"""
+        return [(filename, ''.join(chunks)) for _, filename, chunks in iter_generated(file_name, **options)]
+
+    def test_generated_code_same_as_without_split_dwarf(self):
+        """Checks if split units generate the same code as units of elf"""
+        plain = self.generate(self.PLAIN_FILE)
+        for file_name in (self.TEST_FILE, self.PACKAGE_FILE):
+            with self.subTest(file_name=file_name):
+                self.assertEqual(self.generate(file_name), plain)
+
+    def test_generate_code_parallel_bounded_memory(self):
+        """Checks if split units are parsed in worker processes and with bounded memory usage"""
+        for file_name in (self.TEST_FILE, self.PACKAGE_FILE):
+            with self.subTest(file_name=file_name):
+                serial = self.generate(file_name)
+                self.assertEqual(serial, self.generate(file_name, jobs=2))
+                self.assertEqual(serial, self.generate(file_name, use_mmap=True, max_memory=True))
+
+    def test_split_units_decoded_on_demand(self):
+        """Checks if only top DIEs of split units are decoded until their files are parsed"""
+        with ELFData(self.PACKAGE_FILE) as efile:
+            main, other = efile.dwarf_file_names
+            units = {file_name: efile._split_dwarf.get_unit(efile._files[file_name])
+                     for file_name in (main, other)}
+            self.assertEqual([len(unit._dielist) for unit in units.values()], [1, 1])
+
+            program_file = efile.parse_file(main)
+            self.assertIn('main', [function.name for function in program_file.functions])
+            self.assertGreater(len(units[main]._dielist), 1)
+            self.assertEqual(len(units[other]._dielist), 1, 'Split unit of not parsed file was decoded')
+
+    def test_unit_index(self):
+        """Checks if index of package has contributions of all split units"""
+        with open(self.PACKAGE_FILE + '.dwp', 'rb') as file:
+            data = file.read()
+        with ELFData(self.PACKAGE_FILE) as efile:
+            package = efile._split_dwarf._files[self.PACKAGE_FILE + '.dwp'][1]
+            section = package.get_section_by_name('.debug_cu_index')
+            index = read_unit_index(data[section['sh_offset']:section['sh_offset'] + section['sh_size']], 'little')
+            unit_ids = [cu.get_top_DIE().attributes['DW_AT_GNU_dwo_id'].value for cu in efile._files.values()
+                        if cu is not None]
+        self.assertEqual(sorted(index), sorted(unit_ids))
+        for contributions in index.values():
+            self.assertTrue(all(size > 0 for _, size in contributions.values()))
+
+    def test_unit_key(self):
+        """Checks if keys of split units do not depend on placement of units in .dwo files or package"""
+        with ELFData(self.TEST_FILE) as efile, ELFData(self.PACKAGE_FILE) as package:
+            keys = [efile.get_unit_key(file_name) for file_name in efile.dwarf_file_names]
+            self.assertEqual(len(set(keys)), len(keys))
+            self.assertEqual(keys, [package.get_unit_key(file_name) for file_name in package.dwarf_file_names])
+
+    def test_generate_output_from_command_line(self):
+        """Checks if code of split units is generated for arguments of command line, which give elf as path"""
+        for file_name in (self.TEST_FILE, self.PACKAGE_FILE):
+            for options in ([], ['--mmap', '-j', '2'], ['--max-memory']):
+                with self.subTest(file_name=file_name, options=options), tempfile.TemporaryDirectory() as directory:
+                    self.assertEqual(run(parse_args([file_name, '--dst', directory, *options])), os.EX_OK)
+                    self.assertEqual(sorted(path.name for path in pathlib.Path(directory).glob('*.py')),
+                                     ['test_code_shared_main_c.py', 'test_code_shared_other_c.py'])
+
+    def test_missing_split_unit(self):
+        """Checks if elf without its split units is rejected"""
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = shutil.copy(self.PACKAGE_FILE, os.path.join(directory, 'test_code_package.elf'))
+            with self.assertRaises(MissingDwarfInfoError):
+                ELFData(file_name)
+
+    def test_unsupported_elftools(self):
+        """Checks if lack of table of forms of elftools is reported"""
+        unit = types.SimpleNamespace(structs=types.SimpleNamespace())
+        with self.assertRaises(UnsupportedElftoolsError):
+            add_uleb128_forms(unit, INDEX_FORMS)
+
+    def test_split_dwarf5_rejected(self):
+        """Checks if elf with split units of dwarf 5 is rejected instead of giving no files"""
+        with self.assertRaisesRegex(MissingDwarfInfoError, '-gdwarf-4'):
+            ELFData(self.DWARF5_FILE)
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertNotEqual(run(parse_args([self.DWARF5_FILE, '--dst', directory])), os.EX_OK)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import ctypes
+import unittest
+
+from elf.elfdata import ELFData
+from program.exceptions import CyclicTypeDependencyError
+from program.type_order import TypeStep, generate_types_code, sort_types
+
+
+class TestTypeOrder(unittest.TestCase):
+    """Test cases for ordering of generated types"""
+
+    TEST_FILE = 'tests/testfiles/test_code.elf'
+
+    def setUp(self) -> None:
+        """Parse types of test file"""
+        self.types = {type.alias: type for type in ELFData(self.TEST_FILE).parse_elffile()[0].types}
+
+    def test_dependencies_first(self):
+        """Checks if every type is defined after its dependencies, regardless of order of given types"""
+        types = [self.types[alias] for alias in ('TestStruct_t_array_3', 'TestStruct_t', 'TestStruct_tag')]
+        steps = list(sort_types(types))
+        self.assertEqual(steps, [(TypeStep.DEFINE, type) for type in reversed(types)])
+
+    def test_cycle_declares_collection(self):
+        """Checks if collection in a cycle is declared first and gets fields after the rest of cycle"""
+        structure, function = self.types['TestStruct_tag'], self.types['FunctionType_267']
+        cycle = {structure: [function], function: [structure]}
+
+        def dependencies(type):
+            return type.dependencies + cycle.get(type, [])
+
+        steps = list(sort_types([function, structure], dependencies))
+        self.assertEqual(steps, [(TypeStep.DECLARE, structure), (TypeStep.DEFINE, function),
+                                 (TypeStep.FIELDS, structure)])
+
+        namespace = dict(vars(ctypes), PointerClass=lambda size: ctypes.c_void_p, FunctionType=object)
+        exec(generate_types_code([function, structure], dependencies), namespace)
+        self.assertEqual(ctypes.sizeof(namespace['TestStruct_tag']), 16, 'Fields were not assigned to declared class')
+
+    def test_cycle_array_of_declared_collection(self):
+        """Checks if array of collection in a cycle is created after fields of the collection"""
+        structure, typedef, array = (self.types[alias] for alias in ('TestStruct_tag', 'TestStruct_t',
+                                                                     'TestStruct_t_array_3'))
+        union, function = self.types['Unity'], self.types['FunctionType_267']
+        cycle = {structure: [function], function: [union], union: [array]}
+
+        def dependencies(type):
+            return type.dependencies + cycle.get(type, [])
+
+        types = [structure, typedef, array, union, function]
+        steps = list(sort_types(types, dependencies))
+        self.assertLess(steps.index((TypeStep.FIELDS, structure)), steps.index((TypeStep.DEFINE, array)))
+        self.assertLess(steps.index((TypeStep.DEFINE, array)), steps.index((TypeStep.FIELDS, union)))
+
+        namespace = dict(vars(ctypes), PointerClass=lambda size: ctypes.c_void_p, FunctionType=object)
+        exec(generate_types_code(types, dependencies), namespace)
+        self.assertEqual(ctypes.sizeof(namespace['TestStruct_t_array_3']), 48, 'Array of declared class is empty')
+
+    def test_cycle_by_value(self):
+        """Checks if collection containing itself by value is reported"""
+        structure, array = self.types['TestStruct_tag'], self.types['TestStruct_t_array_3']
+
+        def dependencies(type):
+            return type.dependencies + [array] if type is structure else type.dependencies
+
+        types = [structure, self.types['TestStruct_t'], array]
+        self.assertRaises(CyclicTypeDependencyError, list, sort_types(types, dependencies))
+
+    def test_cycle_without_collection(self):
+        """Checks if cycle of types which can not be declared is reported"""
+        typedef, array = self.types['TestStruct_t'], self.types['TestStruct_t_array_3']
+        cycle = {typedef: [array], array: [typedef]}
+        self.assertRaises(CyclicTypeDependencyError, list, sort_types([typedef, array], cycle.__getitem__))
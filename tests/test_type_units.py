@@ -0,0 +1,92 @@
+import ctypes
+import sys
+import unittest
+from unittest import mock
+
+from elf.elfdata import ELFData
+from elf.parallel import iter_generated
+import program.generator.generator_backend as backend
+
+
+class TestTypeUnits(unittest.TestCase):
+    """Test cases for types placed in type units, referenced by signatures"""
+
+    TEST_FILE = 'tests/testfiles/test_code_types.elf'
+    PLAIN_FILE = 'tests/testfiles/test_code_shared.elf'
+
+    def generate(self, file_name: str, **options) -> list[tuple[str, str]]:
+        """Output file names and generated code of files of elf, see iter_generated()"""
+        return [(filename, ''.join(chunks)) for _, filename, chunks in iter_generated(file_name, **options)]
+
+    @staticmethod
+    def _load_modules(file_name: str) -> dict[str, dict]:
+        """Execute generated code of every file of elf"""
+        modules = {}
+        with mock.patch.dict(sys.modules, backend=backend):
+            for program_file in ELFData(file_name).parse_elffile():
+                modules[program_file.name] = {}
+                exec(program_file.generate_code(), modules[program_file.name])
+        return modules
+
+    def test_generated_types_same_as_without_type_units(self):
+        """Checks if types referenced by signatures generate the same types as types of compilation units"""
+        modules, plain_modules = self._load_modules(self.TEST_FILE), self._load_modules(self.PLAIN_FILE)
+        self.assertEqual(modules.keys(), plain_modules.keys())
+        for file_name, module in modules.items():
+            plain = plain_modules[file_name]
+            for name in ('SharedStruct_t', 'SharedStruct_tag', 'SharedInner', 'SharedMode_t', 'MainOnly'):
+                if name not in plain:
+                    continue
+                with self.subTest(file_name=file_name, name=name):
+                    self.assertEqual(ctypes.sizeof(module[name]), ctypes.sizeof(plain[name]))
+                    self.assertEqual([field for field, _ in getattr(module[name], '_fields_', [])],
+                                     [field for field, _ in getattr(plain[name], '_fields_', [])])
+            self.assertEqual(module['SharedMode_t'].MODE_ON, plain['SharedMode_t'].MODE_ON)
+
+            code, plain_code = module['Code'](), plain['Code']()
+            for name in [name for name in vars(plain['Code']) if not name.startswith('_')]:
+                with self.subTest(file_name=file_name, handle=name):
+                    handle, plain_handle = getattr(code, name), getattr(plain_code, name)
+                    if isinstance(plain_handle, backend.Variable):
+                        self.assertEqual(ctypes.sizeof(handle.type), ctypes.sizeof(plain_handle.type))
+
+    def test_type_units_parsed_once(self):
+        """Checks if every type unit is parsed once and its types are shared by files referring to it"""
+        efile = ELFData(self.TEST_FILE)
+        type_units = len(list(efile._dwarfinfo.iter_TUs()))
+        with mock.patch.object(ELFData, '_create_objects', autospec=True,
+                               side_effect=ELFData._create_objects) as create_objects:
+            main, other = efile.parse_elffile()
+            self.assertEqual(create_objects.call_count, 2 + type_units)
+            efile.parse_elffile()
+            self.assertEqual(create_objects.call_count, 4 + type_units, 'Type units were parsed again')
+
+        main_struct, = [type for type in main.types if type.alias == 'SharedStruct_tag']
+        other_struct, = [type for type in other.types if type.alias == 'SharedStruct_tag']
+        self.assertIs(main_struct, other_struct, 'Type of type unit is not shared by files')
+
+    def test_generate_code_order_independent(self):
+        """Checks if code of file does not depend on files parsed before, also for unnamed types of type units"""
+        efile = ELFData(self.TEST_FILE)
+        for file_name in reversed(efile.dwarf_file_names):
+            with self.subTest(file_name=file_name):
+                self.assertEqual(efile.parse_file(file_name).generate_code(),
+                                 ELFData(self.TEST_FILE).parse_file(file_name).generate_code())
+
+    def test_generate_code_parallel_shared(self):
+        """Checks if types of type units are generated in worker processes and to shared module"""
+        serial = self.generate(self.TEST_FILE)
+        self.assertEqual(serial, self.generate(self.TEST_FILE, jobs=2),
+                         'Parallel generation differs from serial one')
+        generated = dict(self.generate(self.TEST_FILE, share_types=True))
+        self.assertIn('class SharedStruct_tag(Structure):', generated['shared_types.py'])
+
+    def test_unit_key(self):
+        """Checks if keys of units referring to type units are computed"""
+        efile = ELFData(self.TEST_FILE)
+        keys = [efile.get_unit_key(file_name) for file_name in efile.dwarf_file_names]
+        self.assertEqual(len(set(keys)), len(keys))
+
+
+if __name__ == '__main__':
+    unittest.main()
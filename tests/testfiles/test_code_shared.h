@@ -0,0 +1,25 @@
+#ifndef TEST_CODE_SHARED_H_
+#define TEST_CODE_SHARED_H_
+
+typedef enum
+{
+    MODE_OFF = 0,
+    MODE_ON = 1
+} SharedMode_t;
+
+struct SharedInner
+{
+    short x;
+    short y;
+};
+
+typedef struct SharedStruct_tag
+{
+    int id;
+    SharedMode_t mode;
+    struct SharedInner inner[2];
+} SharedStruct_t;
+
+int shared_function(SharedStruct_t *value);
+
+#endif
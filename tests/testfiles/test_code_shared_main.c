@@ -0,0 +1,15 @@
+#include "test_code_shared.h"
+
+struct MainOnly
+{
+    char tag;
+    SharedStruct_t shared;
+};
+
+struct MainOnly main_value;
+
+int main(int argc, char *argv[])
+{
+    main_value.shared.mode = MODE_ON;
+    return shared_function(&main_value.shared);
+}
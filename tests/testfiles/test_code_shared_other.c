@@ -0,0 +1,9 @@
+#include "test_code_shared.h"
+
+SharedStruct_t other_value;
+
+int shared_function(SharedStruct_t *value)
+{
+    other_value = *value;
+    return value->inner[1].y + value->id;
+}